@@ -0,0 +1,323 @@
+"""
+Prometheus-style metrics for the API and the service layer.
+
+A small in-process registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format by the root /metrics endpoint, and an ASGI
+middleware recording per-route request latency and in-flight requests.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Tuple, Iterator, Pattern, Any
+
+from starlette.routing import compile_path
+
+
+# Default latency buckets in seconds, from sub-millisecond cache hits to slow MetricFlow runs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Size buckets in bytes for command output
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a label set, e.g. {route="/query",method="POST"}."""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """Base class of a named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """Return the label values of a sample in label-name order."""
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        """Return the exposition lines of every sample."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the family with its HELP and TYPE lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Increase the count of a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Increase the value of a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        """Decrease the value of a label set."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the value of a label set."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        """Add a metric family and return it."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Return every family in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP layer
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent", ("method", "route")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method", "route")
+))
+
+# Service layer
+MF_SPAWN_SECONDS = REGISTRY.register(Histogram(
+    "mf_subprocess_spawn_seconds", "Time to start an mf subprocess", ("command",)
+))
+MF_SUBPROCESS_SECONDS = REGISTRY.register(Histogram(
+    "mf_subprocess_seconds", "Time from mf subprocess start to exit", ("command",)
+))
+MF_STDOUT_BYTES = REGISTRY.register(Histogram(
+    "mf_stdout_bytes", "Size of mf subprocess output", ("command",), buckets=SIZE_BUCKETS
+))
+MF_JSON_PARSE_SECONDS = REGISTRY.register(Histogram(
+    "mf_json_parse_seconds", "Time to parse JSON mf output", ("command",)
+))
+MF_ENGINE_SECONDS = REGISTRY.register(Histogram(
+    "mf_engine_seconds", "Time spent in in-process MetricFlow engine calls", ("command",)
+))
+MF_PLANNING_SECONDS = REGISTRY.register(Histogram(
+    "mf_planning_seconds", "Time to compile a query shape to SQL through MetricFlow (plan cache misses)", ("command",)
+))
+WAREHOUSE_SECONDS = REGISTRY.register(Histogram(
+    "warehouse_execution_seconds", "Time spent running SQL on the warehouse pool", ("command",)
+))
+
+# Health
+WAREHOUSE_UP = REGISTRY.register(Gauge(
+    "warehouse_up", "Outcome of the last background warehouse probe (1 healthy, 0 failed)"
+))
+CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "warehouse_circuit_open", "1 while queries fail fast because the warehouse is known to be down"
+))
+CIRCUIT_REJECTIONS = REGISTRY.register(Counter(
+    "warehouse_circuit_rejections_total", "Requests failed fast while the warehouse circuit was open", ("operation",)
+))
+
+# Deadlines and cancellation
+DEADLINES_EXCEEDED = REGISTRY.register(Counter(
+    "query_deadline_exceeded_total", "Requests answered with 504 because their deadline passed", ("operation",)
+))
+CLIENT_DISCONNECTS = REGISTRY.register(Counter(
+    "client_disconnects_total", "Requests abandoned by the client before the response was ready", ("route",)
+))
+CANCELLED_WORK = REGISTRY.register(Counter(
+    "cancelled_work_total", "mf subprocesses killed and warehouse statements cancelled after their caller went away", ("kind",)
+))
+
+# Admission control
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "admission_queue_wait_seconds", "Time spent waiting for a slot of a workload lane", ("lane",)
+))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    "admission_queued", "Calls waiting for a slot of a workload lane", ("lane",)
+))
+ADMISSION_ACTIVE = REGISTRY.register(Gauge(
+    "admission_active", "Calls holding a slot of a workload lane", ("lane",)
+))
+ADMISSION_REJECTIONS = REGISTRY.register(Counter(
+    "admission_rejections_total", "Calls shed with 429 because the queue of their lane was full", ("lane",)
+))
+
+# Time-chunked queries
+QUERY_TIME_CHUNKS = REGISTRY.register(Counter(
+    "query_time_chunks_total", "Pieces of time-chunked queries: closed months read from (hit) or added to (miss) the chunk cache and live tails; fallback counts chunked queries rerun whole", ("outcome",)
+))
+
+
+def route_patterns(app: Any) -> List[Tuple[Pattern[str], str]]:
+    """
+    Return (regex, path template) for every route of an application.
+
+    Templates come from the OpenAPI paths (which carry router prefixes) and from
+    top-level routes, e.g. /semantic-models/metrics/{metric_name}.
+    """
+    paths = list(app.openapi().get("paths", {}))
+    paths.extend(route.path for route in app.routes if isinstance(getattr(route, "path", None), str))
+    return [(compile_path(path)[0], path) for path in dict.fromkeys(paths)]
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests per route."""
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._patterns: Optional[List[Tuple[Pattern[str], str]]] = None
+
+    def _route(self, scope: Dict[str, Any]) -> str:
+        """Return the path template of the route a request is for, or "unmatched"."""
+        if self._patterns is None:
+            self._patterns = route_patterns(scope["app"])
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):] or "/"
+        for regex, template in self._patterns:
+            if regex.match(path):
+                return template
+        return "unmatched"
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method, route=route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method, route=route)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status["code"])
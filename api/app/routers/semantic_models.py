@@ -3,12 +3,39 @@ FastAPI router for semantic model operations.
 Provides REST API endpoints for querying metrics, dimensions, and executing queries.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Body
-from typing import Optional, List
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, Body, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Any, Dict, Awaitable, TypeVar
 from pathlib import Path
 
+from app.core import telemetry
+from app.services.admission import AdmissionControl, Lane, METADATA, DIMENSION_VALUES, QUERY, VALIDATE
+from app.services.dbt_artifacts import RunResultsTracker
+from app.services.dimension_values import DimensionValueIndex
+from app.services.disk_cache import DiskQueryCache, cache_call
+from app.services.health import HealthMonitor
+from app.services.query_cache import QueryResultCache
+from app.services.rollups import RollupCatalog
+from app.services.result_formats import (
+    RESULT_MEDIA_TYPES,
+    COLUMNAR_MEDIA_TYPES,
+    NDJSON_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE,
+    encode_arrow_stream,
+    encode_csv,
+    encode_ndjson,
+    encode_parquet,
+    negotiate_media_type,
+    pyarrow_available,
+)
 from app.services.semantic_model_service import SemanticModelService
-from app.schemas.semantic_models import QueryRequest, SimpleQueryRequest, ValidationRequest
+from app.services.warehouse import WarehousePool
+from app.schemas.semantic_models import (
+    QueryRequest, BatchQueryRequest, SimpleQueryRequest, ValidationRequest, MetricSummary, DimensionSummary
+)
 import app.core.config as config
 
 router = APIRouter()
@@ -19,15 +46,125 @@ router = APIRouter()
 project_dir = Path(config.settings.DBT_PROJECT_DIR)
 venv_path = project_dir.parent / config.settings.Config.env_file
 
+
+def _cache(name: str, max_entries: int, ttl_seconds: Optional[int], max_bytes: int):
+    """Build a result, plan or time-chunk cache on the configured backend."""
+    if config.settings.CACHE_BACKEND == "disk":
+        return DiskQueryCache(
+            str(Path(config.settings.CACHE_DIR) / f"{name}.sqlite3"),
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes
+        )
+    return QueryResultCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
 semantic_service = SemanticModelService(
     project_dir=str(project_dir),
-    venv_path=str(venv_path) if venv_path.exists() else None
+    venv_path=str(venv_path) if venv_path.exists() else None,
+    execution_mode=config.settings.MF_EXECUTION_MODE,
+    max_concurrency=config.settings.MF_MAX_CONCURRENCY,
+    manifest_path=config.settings.DBT_SEMANTIC_MANIFEST_PATH,
+    result_cache=_cache(
+        "results",
+        config.settings.QUERY_CACHE_MAX_ENTRIES,
+        config.settings.QUERY_CACHE_TTL_SECONDS,
+        config.settings.QUERY_CACHE_MAX_BYTES
+    ) if config.settings.QUERY_CACHE_ENABLED else None,
+    build_tracker=RunResultsTracker(
+        config.settings.DBT_RUN_RESULTS_PATH,
+        config.settings.DATA_VERSION_MODEL
+    ),
+    plan_cache=_cache(
+        "plans",
+        config.settings.PLAN_CACHE_MAX_ENTRIES,
+        config.settings.PLAN_CACHE_TTL_SECONDS,
+        config.settings.PLAN_CACHE_MAX_BYTES
+    ) if config.settings.DIRECT_EXECUTION_ENABLED else None,
+    warehouse=WarehousePool(
+        config.settings.DATABASE_URL,
+        min_size=config.settings.DB_POOL_MIN_SIZE,
+        max_size=config.settings.DB_POOL_MAX_SIZE,
+        max_streams=config.settings.DB_POOL_MAX_STREAMS
+    ) if config.settings.DIRECT_EXECUTION_ENABLED else None,
+    stream_batch_size=config.settings.STREAM_BATCH_SIZE,
+    rollups=RollupCatalog(
+        config.settings.DBT_MANIFEST_PATH
+    ) if config.settings.AGGREGATE_NAVIGATION_ENABLED else None,
+    dimension_values=DimensionValueIndex(
+        max_values=config.settings.DIMENSION_VALUE_INDEX_MAX_VALUES
+    ) if config.settings.DIMENSION_VALUE_INDEX_ENABLED else None,
+    health_monitor=HealthMonitor(
+        interval_seconds=config.settings.HEALTH_CHECK_INTERVAL_SECONDS,
+        timeout_seconds=config.settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        failure_threshold=config.settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    ) if config.settings.HEALTH_MONITOR_ENABLED else None,
+    query_timeout_seconds=config.settings.QUERY_TIMEOUT_SECONDS or None,
+    admission=AdmissionControl({
+        METADATA: Lane(
+            METADATA,
+            config.settings.METADATA_LANE_CONCURRENCY,
+            config.settings.METADATA_LANE_QUEUE_DEPTH
+        ),
+        DIMENSION_VALUES: Lane(
+            DIMENSION_VALUES,
+            config.settings.DIMENSION_VALUES_LANE_CONCURRENCY,
+            config.settings.DIMENSION_VALUES_LANE_QUEUE_DEPTH
+        ),
+        QUERY: Lane(
+            QUERY,
+            config.settings.QUERY_LANE_CONCURRENCY,
+            config.settings.QUERY_LANE_QUEUE_DEPTH
+        ),
+        VALIDATE: Lane(
+            VALIDATE,
+            config.settings.VALIDATE_LANE_CONCURRENCY,
+            config.settings.VALIDATE_LANE_QUEUE_DEPTH
+        ),
+    }) if config.settings.ADMISSION_CONTROL_ENABLED else None,
+    # Closed months only change with a new build, which invalidates the cache: no TTL
+    chunk_cache=_cache(
+        "chunks",
+        config.settings.TIME_CHUNK_CACHE_MAX_ENTRIES,
+        None,
+        config.settings.TIME_CHUNK_CACHE_MAX_BYTES
+    ) if config.settings.TIME_CHUNKS_ENABLED else None,
+    chunk_lookback_days=config.settings.TIME_CHUNK_LOOKBACK_DAYS
 )
 
+# How often a running query checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+
+async def _until_disconnected(http_request: Request, work: Awaitable[T]) -> T:
+    """
+    Await a service call, cancelling it if the client disconnects first.
+    
+    Cancelling kills the mf subprocess or cancels the warehouse statement of the
+    query, unless other requests are waiting for the same query.
+    
+    Raises:
+        HTTPException: 499 if the client went away
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                telemetry.CLIENT_DISCONNECTS.inc(route=http_request.url.path)
+                raise HTTPException(status_code=499, detail="Client closed the request")
+    finally:
+        if not task.done():
+            task.cancel()
+
 
 # Endpoints
 
-@router.get("/metrics")
+@router.get("/metrics", response_model=List[MetricSummary])
 async def list_metrics(
     search: Optional[str] = Query(None, description="Filter metrics by search term"),
     show_all_dimensions: bool = Query(False, description="Show all dimensions for each metric")
@@ -35,13 +172,16 @@ async def list_metrics(
     """
     List all available metrics with their dimensions.
     
+    Every metric has the same fields whether the manifest index, the in-process engine
+    or the mf CLI answered; fields the answering source does not report are null.
+    
     - **search**: Optional search term to filter metrics
     - **show_all_dimensions**: Include all dimensions in the response
     """
-    result = semantic_service.list_metrics(search=search, show_all_dimensions=show_all_dimensions)
+    result = await semantic_service.list_metrics(search=search, show_all_dimensions=show_all_dimensions)
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
@@ -53,27 +193,30 @@ async def get_metric_details(metric_name: str):
     
     - **metric_name**: Name of the metric to retrieve
     """
-    result = semantic_service.get_metric_details(metric_name)
+    result = await semantic_service.get_metric_details(metric_name)
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
 
-@router.get("/dimensions")
+@router.get("/dimensions", response_model=List[DimensionSummary])
 async def list_dimensions(
     metrics: List[str] = Query(..., description="Metrics to get dimensions for")
 ):
     """
     List all unique dimensions for specified metrics.
     
+    Every dimension has the same fields whichever source answered; fields it does not
+    report are null.
+    
     - **metrics**: List of metric names (returns intersection of dimensions)
     """
-    result = semantic_service.list_dimensions(metrics=metrics)
+    result = await semantic_service.list_dimensions(metrics=metrics)
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
@@ -83,7 +226,9 @@ async def list_dimension_values(
     dimension: str = Query(..., description="Dimension to query values from"),
     metrics: List[str] = Query(..., description="Metrics associated with the dimension"),
     start_time: Optional[str] = Query(None, description="ISO8601 start time"),
-    end_time: Optional[str] = Query(None, description="ISO8601 end time")
+    end_time: Optional[str] = Query(None, description="ISO8601 end time"),
+    prefix: Optional[str] = Query(None, description="Only values starting with this prefix (case-insensitive)"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of values")
 ):
     """
     List all values for a specific dimension.
@@ -92,16 +237,36 @@ async def list_dimension_values(
     - **metrics**: List of metrics that use this dimension
     - **start_time**: Optional time filter start
     - **end_time**: Optional time filter end
+    - **prefix**: Optional value prefix, for autocomplete
+    - **limit**: Optional maximum number of values
     """
-    result = semantic_service.list_dimension_values(
+    result = await semantic_service.list_dimension_values(
         dimension=dimension,
         metrics=metrics,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        prefix=prefix,
+        limit=limit
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
+    
+    return result["data"]
+
+
+@router.post("/dimension-values/refresh")
+async def refresh_dimension_values():
+    """
+    Rebuild the dimension value index from the warehouse (e.g. after a dbt run).
+    
+    Returns the number of indexed dimensions and values, the build time and
+    dimensions that could not be indexed.
+    """
+    result = await semantic_service.refresh_dimension_values()
+    
+    if not result["success"]:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
@@ -115,10 +280,10 @@ async def list_entities(
     
     - **metrics**: Optional list of metrics to filter entities by
     """
-    result = semantic_service.list_entities(metrics=metrics)
+    result = await semantic_service.list_entities(metrics=metrics)
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
@@ -134,25 +299,45 @@ async def list_saved_queries(
     - **show_exports**: Include export configurations
     - **show_parameters**: Include full query parameters
     """
-    result = semantic_service.list_saved_queries(
+    result = await semantic_service.list_saved_queries(
         show_exports=show_exports,
         show_parameters=show_parameters
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
 
 @router.post("/query")
-async def query_metrics(request: QueryRequest = Body(...)):
+async def query_metrics(
+    response: Response,
+    http_request: Request,
+    request: QueryRequest = Body(...),
+    accept: Optional[str] = Header(None)
+):
     """
     Execute a query against semantic models.
     
     Supports querying metrics with dimensions, filters, ordering, and limits.
     Can also execute saved queries.
     
+    Send `Accept: application/x-ndjson` or `Accept: text/csv` to stream rows
+    as they are fetched instead of receiving one JSON document, or
+    `Accept: application/vnd.apache.arrow.stream` / `application/vnd.apache.parquet`
+    for typed columnar results (dictionary-encoded categorical dimensions).
+    
+    The `X-Query-Route` response header names the rollup model that answered
+    the query, or `metricflow`.
+    
+    With `"paginate": true`, `limit` rows are returned along with a
+    `next_cursor`; send it back as `cursor` (same query) to get the next page.
+    
+    `timeout_seconds` overrides the default deadline; a query past its deadline
+    is cancelled and answered with 504. Queries are also cancelled when the
+    client disconnects.
+    
     Example request body:
     ```json
     {
@@ -164,7 +349,25 @@ async def query_metrics(request: QueryRequest = Body(...)):
     }
     ```
     """
-    result = semantic_service.query(
+    media_type = negotiate_media_type(accept, RESULT_MEDIA_TYPES)
+    if media_type and not request.compile_sql and not request.paginate and request.cursor is None:
+        return await _formatted_query(
+            dict(
+                metrics=request.metrics,
+                group_by=request.group_by,
+                where=request.where,
+                order_by=request.order_by,
+                limit=request.limit,
+                start_time=request.start_time,
+                end_time=request.end_time,
+                saved_query=request.saved_query,
+                timeout_seconds=request.timeout_seconds
+            ),
+            media_type,
+            http_request
+        )
+    
+    result = await _until_disconnected(http_request, semantic_service.query(
         metrics=request.metrics,
         group_by=request.group_by,
         where=request.where,
@@ -173,21 +376,122 @@ async def query_metrics(request: QueryRequest = Body(...)):
         start_time=request.start_time,
         end_time=request.end_time,
         saved_query=request.saved_query,
-        compile_sql=request.compile_sql
-    )
+        compile_sql=request.compile_sql,
+        paginate=request.paginate,
+        cursor=request.cursor,
+        timeout_seconds=request.timeout_seconds
+    ))
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
+    response.headers["X-Cache"] = "HIT" if result.get("cached") else "MISS"
+    response.headers["X-Query-Route"] = result["route"]
     return result["data"]
 
 
+async def _formatted_query(query_args: Dict[str, Any], media_type: str, http_request: Request) -> Response:
+    """Run a query and return its rows in a non-JSON media type (streamed where the format allows)."""
+    if media_type in COLUMNAR_MEDIA_TYPES and not pyarrow_available():
+        raise HTTPException(status_code=406, detail=f"{media_type} responses require pyarrow")
+    
+    result = await _until_disconnected(http_request, semantic_service.stream_query(**query_args))
+    
+    if not result["success"]:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
+    
+    encoders = {
+        NDJSON_MEDIA_TYPE: encode_ndjson,
+        CSV_MEDIA_TYPE: encode_csv,
+        ARROW_STREAM_MEDIA_TYPE: encode_arrow_stream,
+    }
+    headers = {"X-Query-Route": result["route"]}
+    # Arrow and Parquet columns are typed from the warehouse cursor or the semantic manifest
+    typed = {"column_types": result.get("column_types")} if media_type in COLUMNAR_MEDIA_TYPES else {}
+    if media_type in encoders:
+        return StreamingResponse(
+            encoders[media_type](result["columns"], result["batches"], **typed),
+            media_type=media_type,
+            headers=headers
+        )
+    
+    # Parquet keeps its metadata in a footer, so the file is built before responding
+    content = await encode_parquet(result["columns"], result["batches"], **typed)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@router.post("/query/batch")
+async def query_metrics_batch(http_request: Request, request: BatchQueryRequest = Body(...)):
+    """
+    Execute several queries concurrently in one call.
+    
+    Queries that share group_by, where, order_by, limit and time bounds are merged
+    into a single multi-metric query. Each item gets its own result or error;
+    an item past its deadline gets the error and the others are unaffected.
+    
+    Example request body:
+    ```json
+    {
+        "queries": [
+            {"metrics": ["total_revenue"], "group_by": ["metric_time__month"]},
+            {"metrics": ["total_rentals"], "group_by": ["metric_time__month"]},
+            {"metrics": ["distinct_customers"], "group_by": ["store"]}
+        ]
+    }
+    ```
+    """
+    if len(request.queries) > config.settings.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch accepts at most {config.settings.BATCH_MAX_QUERIES} queries"
+        )
+    
+    results = await _until_disconnected(http_request, semantic_service.query_batch(
+        [
+            dict(
+                metrics=item.metrics,
+                group_by=item.group_by,
+                where=item.where,
+                order_by=item.order_by,
+                limit=item.limit,
+                start_time=item.start_time,
+                end_time=item.end_time,
+                saved_query=item.saved_query,
+                compile_sql=item.compile_sql,
+                timeout_seconds=item.timeout_seconds
+            )
+            for item in request.queries
+        ],
+        merge=request.merge
+    ))
+    
+    return {
+        "results": [
+            {
+                "success": result["success"],
+                "data": result.get("data"),
+                "error": result.get("error"),
+                "merged": result.get("merged", False),
+                "cached": result.get("cached", False),
+                "route": result.get("route"),
+            }
+            for result in results
+        ]
+    }
+
+
 @router.post("/query/simple")
-async def query_metrics_simple(request: SimpleQueryRequest = Body(...)):
+async def query_metrics_simple(
+    response: Response,
+    http_request: Request,
+    request: SimpleQueryRequest = Body(...),
+    accept: Optional[str] = Header(None)
+):
     """
     Execute a simplified query with automatic filter formatting.
     
     This endpoint provides a more user-friendly interface for common queries.
+    Supports the same `Accept` media types as `/query`.
     
     Example request body:
     ```json
@@ -202,20 +506,76 @@ async def query_metrics_simple(request: SimpleQueryRequest = Body(...)):
     }
     ```
     """
-    result = semantic_service.query_with_filters(
+    media_type = negotiate_media_type(accept, RESULT_MEDIA_TYPES)
+    if media_type:
+        return await _formatted_query(
+            semantic_service.build_simple_query(
+                metrics=request.metrics,
+                dimensions=request.dimensions,
+                filters=request.filters,
+                time_grain=request.time_grain,
+                limit=request.limit
+            ),
+            media_type,
+            http_request
+        )
+    
+    result = await _until_disconnected(http_request, semantic_service.query_with_filters(
         metrics=request.metrics,
         dimensions=request.dimensions,
         filters=request.filters,
         time_grain=request.time_grain,
         limit=request.limit
-    )
+    ))
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
+    response.headers["X-Cache"] = "HIT" if result.get("cached") else "MISS"
+    response.headers["X-Query-Route"] = result["route"]
     return result["data"]
 
 
+@router.get("/cache")
+async def cache_stats():
+    """
+    Return result, compiled-plan and time-chunk cache counters (entries, hits, misses, evictions,
+    invalidations) and query coalescing counters (in-flight queries, executions, coalesced waiters, abandoned runs cancelled).
+    """
+    caches = {
+        "results": semantic_service.result_cache,
+        "plans": semantic_service.plan_cache,
+        "chunks": semantic_service.chunk_cache,
+    }
+    stats = {
+        name: {"enabled": True, **await cache_call(cache, "stats")} if cache else {"enabled": False}
+        for name, cache in caches.items()
+    }
+    return {**stats, "coalescing": semantic_service.singleflight.stats()}
+
+
+@router.get("/admission")
+async def admission_stats():
+    """
+    Return the concurrency limit, queue depth and counters (active, queued, admitted,
+    rejected) of every admission lane.
+    """
+    admission = semantic_service.admission
+    return {"enabled": True, "lanes": admission.stats()} if admission else {"enabled": False}
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """
+    Drop every cached query result, compiled plan and time chunk.
+    """
+    for cache in (semantic_service.result_cache, semantic_service.plan_cache, semantic_service.chunk_cache):
+        if cache is not None:
+            await cache_call(cache, "clear")
+    
+    return {"status": "cleared"}
+
+
 @router.post("/validate")
 async def validate_configs(request: ValidationRequest = Body(...)):
     """
@@ -224,7 +584,7 @@ async def validate_configs(request: ValidationRequest = Body(...)):
     Performs validation checks against defined semantic models and optionally
     validates against the data warehouse.
     """
-    result = semantic_service.validate(
+    result = await semantic_service.validate(
         skip_dw=request.skip_dw,
         show_all=request.show_all,
         verbose_issues=request.verbose_issues,
@@ -232,7 +592,7 @@ async def validate_configs(request: ValidationRequest = Body(...)):
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result.get("error", "Unknown error"))
     
     return result["data"]
 
@@ -243,9 +603,11 @@ async def health_check():
     Perform health check against the data platform.
     
     Verifies that the MetricFlow service can connect to the configured
-    data warehouse.
+    data warehouse. With the health monitor enabled, the status of the last
+    background probe is returned (its age, latency, consecutive failures and
+    circuit breaker state) without contacting the warehouse.
     """
-    result = semantic_service.health_checks()
+    result = await semantic_service.health_status()
     
     if not result["success"]:
         raise HTTPException(status_code=503, detail=result.get("error", "Health check failed"))
@@ -17,6 +17,15 @@ class QueryRequest(BaseModel):
     end_time: Optional[str] = Field(None, description="ISO8601 timestamp for end time")
     saved_query: Optional[str] = Field(None, description="Name of saved query to execute")
     compile_sql: bool = Field(False, description="Show compiled SQL")
+    paginate: bool = Field(False, description="Return one page of `limit` rows with a next_cursor (keyset pagination)")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page (implies paginate)")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Deadline of the query in seconds (defaults to QUERY_TIMEOUT_SECONDS)")
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for executing several queries in one call."""
+    queries: List[QueryRequest] = Field(..., description="Queries to execute")
+    merge: bool = Field(True, description="Merge queries sharing group_by/where/order_by/limit/time bounds into multi-metric queries")
 
 
 class SimpleQueryRequest(BaseModel):
@@ -34,3 +43,20 @@ class ValidationRequest(BaseModel):
     show_all: bool = Field(False, description="Show all warnings and errors")
     verbose_issues: bool = Field(False, description="Show verbose issue details")
     dw_timeout: Optional[int] = Field(None, description="Data warehouse timeout in seconds")
+
+
+class MetricSummary(BaseModel):
+    """A metric as listed by GET /metrics; fields the answering source does not know are null."""
+    name: str = Field(..., description="Metric name")
+    label: Optional[str] = Field(None, description="Display label")
+    description: Optional[str] = Field(None, description="Metric description")
+    type: Optional[str] = Field(None, description="Metric type (simple, ratio, derived, cumulative, conversion)")
+    dimensions: Optional[List[str]] = Field(None, description="Every dimension the metric can be grouped by (show_all_dimensions)")
+
+
+class DimensionSummary(BaseModel):
+    """A dimension as listed by GET /dimensions; fields the answering source does not know are null."""
+    name: str = Field(..., description="Qualified dimension name, e.g. customer__country")
+    type: Optional[str] = Field(None, description="Dimension type (categorical or time)")
+    semantic_model: Optional[str] = Field(None, description="Semantic model defining the dimension")
+    granularities: Optional[List[str]] = Field(None, description="Group-by names of a time dimension per granularity")
@@ -0,0 +1,142 @@
+"""
+Admission control per workload class.
+
+Each lane (metadata, dimension values, queries, validation) has its own concurrency
+limit and bounded queue, so a burst of heavy queries queues behind itself instead of
+delaying cheap metadata calls, and a lane whose queue is full sheds new work (429)
+instead of letting it wait without bound.
+
+Service methods declare their lane with the @admitted decorator; slots are only taken
+where work reaches MetricFlow or the warehouse, so answers from the manifest index,
+the dimension value index or the result cache never queue.
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Awaitable
+
+from app.core import telemetry
+
+
+METADATA = "metadata"
+DIMENSION_VALUES = "dimension_values"
+QUERY = "query"
+VALIDATE = "validate"
+
+# Lane of the service call running in the current task (inherited by tasks it starts)
+_current_lane: ContextVar[Optional[str]] = ContextVar("admission_lane", default=None)
+
+
+class LaneFull(Exception):
+    """Raised when a lane has no free slot and its queue is full."""
+
+
+class Lane:
+    """Concurrency limit and bounded wait queue of one workload class."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        """
+        Initialize the lane.
+
+        Args:
+            name: Workload class, used in errors and metric labels
+            max_concurrency: Calls of this class running at the same time
+            max_queue: Calls allowed to wait for a slot; further calls are rejected
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot of the lane for the duration of the block, waiting in its queue if needed.
+
+        Raises:
+            LaneFull: If every slot is taken and the queue is full
+        """
+        if self.active + self.queued >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            telemetry.ADMISSION_REJECTIONS.inc(lane=self.name)
+            raise LaneFull(f"Too many {self.name.replace('_', ' ')} requests in progress, retry later")
+
+        started = time.perf_counter()
+        self.queued += 1
+        telemetry.ADMISSION_QUEUED.set(self.queued, lane=self.name)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+            telemetry.ADMISSION_QUEUED.set(self.queued, lane=self.name)
+        telemetry.ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, lane=self.name)
+
+        self.active += 1
+        self.admitted += 1
+        telemetry.ADMISSION_ACTIVE.set(self.active, lane=self.name)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            telemetry.ADMISSION_ACTIVE.set(self.active, lane=self.name)
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the lane limits and counters."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionControl:
+    """The lanes of the service, one per workload class."""
+
+    def __init__(self, lanes: Dict[str, Lane]):
+        self.lanes = lanes
+
+    @property
+    def total_concurrency(self) -> int:
+        """Return the number of slots over all lanes."""
+        return sum(lane.max_concurrency for lane in self.lanes.values())
+
+    def current(self) -> Optional[Lane]:
+        """Return the lane of the service call running in this task, if any."""
+        name = _current_lane.get()
+        return self.lanes.get(name) if name else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the stats of every lane."""
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+def admitted(lane: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Run a service method in a lane.
+
+    The lane applies to the MetricFlow and warehouse calls the method makes (see
+    SemanticModelService._slot); calls made from within another lane keep the outer one.
+    """
+    def decorator(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(method)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_lane.get() is not None:
+                return await method(*args, **kwargs)
+            token = _current_lane.set(lane)
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _current_lane.reset(token)
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+"""
+Helpers for reading dbt run artifacts.
+Used to detect when the warehouse data behind the semantic layer was rebuilt.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+class RunResultsTracker:
+    """Tracks the latest successful build of a dbt model from target/run_results.json."""
+
+    def __init__(self, run_results_path: str, model_name: str):
+        """
+        Initialize the tracker.
+
+        Args:
+            run_results_path: Path to target/run_results.json
+            model_name: Name of the model whose builds are tracked (e.g. fact_sales)
+        """
+        self.run_results_path = Path(run_results_path)
+        self.model_name = model_name
+        self._mtime: Optional[float] = None
+        self._version: Optional[str] = None
+
+    def _find_result(self, run_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the run result entry for the tracked model, if the run built it."""
+        suffix = f".{self.model_name}"
+        for result in run_results.get("results", []):
+            unique_id = result.get("unique_id", "")
+            if unique_id.startswith("model.") and unique_id.endswith(suffix):
+                return result
+        return None
+
+    def refresh(self) -> None:
+        """Re-read run_results.json if it changed since the last read."""
+        try:
+            mtime = os.stat(self.run_results_path).st_mtime
+        except OSError:
+            return
+
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        try:
+            run_results = json.loads(self.run_results_path.read_text())
+        except (OSError, ValueError):
+            return
+
+        # run_results.json is overwritten by every dbt command (test, compile, ...),
+        # so keep the previous version when the latest run did not build the model
+        result = self._find_result(run_results)
+        if result is None or result.get("status") != "success":
+            return
+
+        completed_at = None
+        for timing in result.get("timing", []):
+            if timing.get("name") == "execute":
+                completed_at = timing.get("completed_at")
+        self._version = completed_at or run_results.get("metadata", {}).get("generated_at")
+
+    @property
+    def version(self) -> Optional[str]:
+        """Completion timestamp of the latest successful build of the model, if known."""
+        self.refresh()
+        return self._version
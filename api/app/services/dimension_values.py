@@ -0,0 +1,183 @@
+"""
+In-memory index of categorical dimension values for autocomplete.
+
+Values (with the number of fact rows carrying them) are read from the warehouse
+once per dbt build and kept sorted by their lowercased form, so a prefix lookup is
+a binary search followed by a scan over the matching range.
+"""
+
+import bisect
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.services.manifest_index import SemanticManifestIndex
+
+
+@dataclass
+class SortedValues:
+    """Values of one dimension sorted by lowercased value, with per-value fact row counts."""
+    keys: List[str]
+    values: List[str]
+    counts: List[int]
+
+    def search(self, prefix: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return values starting with prefix (case-insensitive), in sorted order."""
+        prefix = (prefix or "").lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        matches = []
+        for position in range(start, len(self.keys)):
+            if limit is not None and len(matches) >= limit:
+                break
+            if not self.keys[position].startswith(prefix):
+                break
+            matches.append({"value": self.values[position], "count": self.counts[position]})
+        return matches
+
+
+def _quote(identifier: str) -> str:
+    """Quote a Postgres identifier."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _relation(model: Dict[str, Any]) -> str:
+    """Return the warehouse relation of a semantic model."""
+    node_relation = model["node_relation"]
+    if node_relation.get("relation_name"):
+        return node_relation["relation_name"]
+    return f"{_quote(node_relation['schema_name'])}.{_quote(node_relation['alias'])}"
+
+
+def _entity_expr(model: Dict[str, Any], entity_name: str) -> Optional[str]:
+    """Return the SQL expression of an entity in a semantic model."""
+    for entity in model.get("entities", []):
+        if entity["name"] == entity_name:
+            return entity.get("expr") or entity["name"]
+    return None
+
+
+class DimensionValueIndex:
+    """Sorted categorical dimension values per (measure semantic model, qualified dimension)."""
+
+    def __init__(self, max_values: int = 100000):
+        """
+        Initialize an empty index. Values are loaded by build().
+
+        Args:
+            max_values: Dimensions with more distinct values are not indexed
+        """
+        self.max_values = max_values
+        self.version: Optional[Tuple[Any, ...]] = None
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self.errors: Dict[str, str] = {}
+        self._dimensions: Dict[Tuple[str, str], SortedValues] = {}
+
+    @property
+    def available(self) -> bool:
+        """Return True once the index has been built."""
+        return self.built_at is not None
+
+    def lookup(self, metrics: List[str], dimension: str, index: SemanticManifestIndex) -> Optional[SortedValues]:
+        """
+        Return the indexed values of a dimension for the given metrics.
+
+        Args:
+            metrics: Metrics the dimension values are requested for
+            dimension: Qualified dimension name (e.g. film__title)
+            index: Semantic manifest index resolving metrics to their semantic model
+
+        Returns:
+            Sorted values, or None if the metrics span several semantic models or
+            the dimension is not indexed
+        """
+        models = {
+            index.measure_model.get(measure)
+            for metric in metrics
+            for measure in index.metric_measures.get(metric, [])
+        }
+        if len(models) != 1:
+            return None
+        return self._dimensions.get((models.pop(), dimension.strip().lower()))
+
+    def build(self, index: SemanticManifestIndex, warehouse: Any, version: Tuple[Any, ...]) -> None:
+        """
+        Read every categorical dimension reachable from a measure semantic model.
+
+        Blocking; runs one GROUP BY per dimension over the warehouse pool. Dimensions whose
+        query fails are skipped and reported in `errors`. The new values replace the
+        previous ones at once, so lookups never see a partial index.
+
+        Args:
+            index: Loaded semantic manifest index
+            warehouse: Open WarehousePool
+            version: Data version the values are read at
+        """
+        started = time.monotonic()
+        dimensions: Dict[Tuple[str, str], SortedValues] = {}
+        errors: Dict[str, str] = {}
+        measure_models = sorted({model for model in index.measure_model.values()})
+        for fact_name in measure_models:
+            for qualified_name, sql in self._dimension_queries(fact_name, index):
+                try:
+                    rows = warehouse.execute(sql, {"max_values": self.max_values + 1})["rows"]
+                except Exception as e:
+                    errors[qualified_name] = str(e)
+                    continue
+                if len(rows) > self.max_values:
+                    errors[qualified_name] = f"More than {self.max_values} distinct values"
+                    continue
+                entries = sorted((str(value).lower(), str(value), int(count)) for value, count in rows)
+                dimensions[(fact_name, qualified_name)] = SortedValues(
+                    keys=[entry[0] for entry in entries],
+                    values=[entry[1] for entry in entries],
+                    counts=[entry[2] for entry in entries],
+                )
+
+        self._dimensions = dimensions
+        self.errors = errors
+        self.version = version
+        self.built_at = time.time()
+        self.build_seconds = time.monotonic() - started
+
+    @staticmethod
+    def _dimension_queries(fact_name: str, index: SemanticManifestIndex) -> List[Tuple[str, str]]:
+        """Return (qualified dimension, SQL) for each categorical dimension reachable from a fact model."""
+        fact = index.semantic_models[fact_name]
+        queries = []
+        primary_entity = SemanticManifestIndex._primary_entity(fact)
+        sources: List[Tuple[Optional[str], str]] = [(primary_entity, fact_name)]
+        sources.extend(index.join_graph.get(fact_name, []))
+
+        for entity_name, model_name in sources:
+            if entity_name is None:
+                continue
+            model = index.semantic_models[model_name]
+            for dimension in model.get("dimensions", []):
+                if str(dimension["type"]).lower() != "categorical":
+                    continue
+                expression = dimension.get("expr") or _quote(dimension["name"])
+                if model_name == fact_name:
+                    source = f"(select {expression} as value from {_relation(fact)}) d"
+                else:
+                    source = (
+                        f"(select {_entity_expr(fact, entity_name)} as entity_key from {_relation(fact)}) f "
+                        f"join (select {_entity_expr(model, entity_name)} as entity_key, {expression} as value "
+                        f"from {_relation(model)}) d on d.entity_key = f.entity_key"
+                    )
+                queries.append((
+                    f"{entity_name}__{dimension['name']}".lower(),
+                    f"select d.value, count(*) from {source} where d.value is not null "
+                    f"group by 1 limit %(max_values)s",
+                ))
+        return queries
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and build information."""
+        return {
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "dimensions": len(self._dimensions),
+            "values": sum(len(values.keys) for values in self._dimensions.values()),
+            "errors": self.errors,
+        }
@@ -0,0 +1,199 @@
+"""
+On-disk cache for query results and compiled plans shared by the worker processes of a node.
+
+A drop-in replacement for QueryResultCache backed by a SQLite database in WAL mode:
+every uvicorn worker opening the same file reads and warms one copy. Writes are
+transactional (a reader never sees a partial entry), the cache is bounded by entry
+count and total size with least-recently-used eviction, and entries are tagged with
+the data version they were computed from so a new manifest or build invalidates them.
+
+Values are pickled, so the cache directory must only be writable by the API user.
+Its methods block (SQLite I/O, pickling, waiting for another worker's write lock), so
+async code calls them through cache_call().
+"""
+
+import asyncio
+import functools
+import json
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Iterator
+
+
+_SCHEMA = """
+create table if not exists entries (
+    key text primary key,
+    version text not null,
+    value blob not null,
+    size integer not null,
+    expires_at real not null,
+    accessed_at real not null
+);
+create index if not exists entries_accessed_at on entries (accessed_at);
+"""
+
+
+class DiskQueryCache:
+    """SQLite-backed LRU cache with per-entry TTL, shared between processes, invalidated when the data version changes."""
+
+    def __init__(self, path: str, max_entries: int = 512, ttl_seconds: Optional[float] = 300, max_bytes: Optional[int] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file; processes opening the same file share the cache
+            max_entries: Maximum number of cached values; least recently used entries are evicted
+            ttl_seconds: Lifetime of an entry in seconds, or None for entries that only
+                expire with their data version
+            max_bytes: Optional bound on the total size of the pickled values
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.version: Optional[Tuple[Any, ...]] = None
+        self._version_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.executescript(_SCHEMA)
+
+    def ensure_version(self, version: Tuple[Any, ...]) -> None:
+        """
+        Drop every entry computed from another data version.
+
+        Args:
+            version: Identifies the manifest and data the cached values were computed from
+        """
+        if version == self.version:
+            return
+        self.version = version
+        self._version_key = json.dumps(list(version), default=str)
+        with self._lock, self._transaction():
+            deleted = self._conn.execute("delete from entries where version != ?", (self._version_key,)).rowcount
+        if deleted:
+            self.invalidations += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None if missing, expired or from another data version."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "select value, expires_at from entries where key = ? and version = ?",
+                (key, self._version_key or "")
+            ).fetchone()
+            value = None
+            if row is not None and row[1] >= now:
+                try:
+                    value = pickle.loads(row[0])
+                except Exception:
+                    value = None
+            if value is None:
+                if row is not None:
+                    self._conn.execute("delete from entries where key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("update entries set accessed_at = ? where key = ?", (now, key))
+
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_entries and max_bytes."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else math.inf
+        with self._lock, self._transaction():
+            self._conn.execute(
+                "insert or replace into entries (key, version, value, size, expires_at, accessed_at) "
+                "values (?, ?, ?, ?, ?, ?)",
+                (key, self._version_key or "", blob, len(blob), expires_at, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is within its bounds (inside a transaction)."""
+        count, size = self._conn.execute("select count(*), coalesce(sum(size), 0) from entries").fetchone()
+        while count > self.max_entries or (self.max_bytes is not None and size > self.max_bytes and count > 1):
+            key, entry_size = self._conn.execute(
+                "select key, size from entries order by accessed_at limit 1"
+            ).fetchone()
+            self._conn.execute("delete from entries where key = ?", (key,))
+            count -= 1
+            size -= entry_size
+            self.evictions += 1
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the block in one immediate (write-locked) transaction, rolled back if it raises."""
+        self._conn.execute("begin immediate")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("rollback")
+            raise
+        self._conn.execute("commit")
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute("delete from entries")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters (hits, misses and evictions are counted per process)."""
+        with self._lock:
+            entries, size = self._conn.execute("select count(*), coalesce(sum(size), 0) from entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "disk",
+            "path": str(self.path),
+            "pid": os.getpid(),
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+async def cache_call(cache: Any, method: str, *args: Any) -> Any:
+    """
+    Call a method of a result, plan or time-chunk cache from the event loop.
+
+    DiskQueryCache calls run on the default thread pool, since they can wait up to the
+    SQLite busy timeout for a write lock held by another worker; the in-memory
+    QueryResultCache is called directly.
+
+    Args:
+        cache: QueryResultCache or DiskQueryCache
+        method: Name of the method (get, set, ensure_version, clear, stats)
+        *args: Arguments of the method
+    """
+    func = getattr(cache, method)
+    if not isinstance(cache, DiskQueryCache):
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
@@ -0,0 +1,121 @@
+"""
+Background health probing of the warehouse with a circuit breaker.
+
+A task started with the application probes the warehouse on an interval and keeps
+the last result, so /health is answered without starting MetricFlow or opening a
+connection per call. After a number of consecutive failed probes the circuit opens
+and queries fail fast until a probe succeeds again.
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any, Awaitable, Callable
+
+from app.core import telemetry
+
+
+Probe = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class HealthMonitor:
+    """Periodically probes the warehouse and keeps its last known status."""
+
+    def __init__(self, interval_seconds: float = 10.0, timeout_seconds: float = 5.0, failure_threshold: int = 3):
+        """
+        Initialize the monitor. Probing starts with start().
+
+        Args:
+            interval_seconds: Time between the end of a probe and the next one
+            timeout_seconds: Probes taking longer count as failed
+            failure_threshold: Consecutive failed probes that open the circuit
+        """
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.failure_threshold = failure_threshold
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.latency_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.details: Any = None
+        self.consecutive_failures = 0
+        self._task: Optional["asyncio.Task"] = None
+        self._inflight: Optional["asyncio.Future"] = None
+
+    @property
+    def circuit_open(self) -> bool:
+        """Return True while the warehouse is known to be down."""
+        return self.consecutive_failures >= self.failure_threshold
+
+    async def probe(self, probe: Probe) -> None:
+        """
+        Run one probe and record its outcome. Concurrent callers share the probe in flight.
+
+        Args:
+            probe: Coroutine factory returning a result dictionary ("success", "data" or "error")
+        """
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._probe(probe))
+            self._inflight.add_done_callback(lambda _: setattr(self, "_inflight", None))
+        await asyncio.shield(self._inflight)
+
+    async def _probe(self, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(probe(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": f"Health probe timed out after {self.timeout_seconds}s"}
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        self.checked_at = time.time()
+        self.latency_seconds = time.perf_counter() - started
+        self.healthy = result["success"]
+        if result["success"]:
+            self.consecutive_failures = 0
+            self.last_success_at = self.checked_at
+            self.last_error = None
+            self.details = result.get("data")
+        else:
+            self.consecutive_failures += 1
+            self.last_error = result.get("error", "Health check failed")
+            self.details = None
+        telemetry.WAREHOUSE_UP.set(1 if self.healthy else 0)
+        telemetry.CIRCUIT_OPEN.set(1 if self.circuit_open else 0)
+
+    async def _run(self, probe: Probe) -> None:
+        """Probe forever, one interval apart."""
+        while True:
+            await self.probe(probe)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self, probe: Probe) -> None:
+        """Start probing in the background (no-op if already started)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run(probe))
+
+    async def stop(self) -> None:
+        """Stop the background probing."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the last known status."""
+        now = time.time()
+        return {
+            "status": "unknown" if self.healthy is None else "healthy" if self.healthy else "unhealthy",
+            "circuit": "open" if self.circuit_open else "closed",
+            "checked_at": self.checked_at,
+            "age_seconds": round(now - self.checked_at, 3) if self.checked_at else None,
+            "latency_ms": round(self.latency_seconds * 1000, 3) if self.latency_seconds is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success_at": self.last_success_at,
+            "last_error": self.last_error,
+            "details": self.details,
+        }
@@ -0,0 +1,360 @@
+"""
+In-memory index over dbt's semantic_manifest.json.
+Answers metadata questions (metrics, dimensions, entities) without starting
+MetricFlow or connecting to the warehouse.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+
+# Granularities MetricFlow accepts as `__<grain>` suffixes on time dimensions, finest first
+TIME_GRANULARITIES = ["day", "week", "month", "quarter", "year"]
+
+# Entity types a dimension-bearing semantic model can be joined on
+JOINABLE_ENTITY_TYPES = {"primary", "unique", "natural"}
+
+# Measure aggregations whose values are whole numbers
+INTEGER_AGGREGATIONS = {"count", "count_distinct", "sum_boolean"}
+
+
+class SemanticManifestIndex:
+    """Parses semantic_manifest.json once and keeps indexed lookups in memory."""
+
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the index.
+
+        Args:
+            manifest_path: Path to target/semantic_manifest.json
+        """
+        self.manifest_path = Path(manifest_path)
+        self.manifest_hash: Optional[str] = None
+        self.load_error: Optional[str] = None
+        self._mtime: Optional[float] = None
+
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self.semantic_models: Dict[str, Dict[str, Any]] = {}
+        self.saved_queries: Dict[str, Dict[str, Any]] = {}
+        self.metric_measures: Dict[str, List[str]] = {}
+        self.measure_model: Dict[str, str] = {}
+        self.entity_models: Dict[str, List[Tuple[str, str]]] = {}
+        self.join_graph: Dict[str, List[Tuple[str, str]]] = {}
+        self.model_dimensions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.metric_dimensions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.metric_entities: Dict[str, List[str]] = {}
+
+    @property
+    def available(self) -> bool:
+        """Return True if the manifest is loaded (reloading it if the file changed)."""
+        self.refresh()
+        return self.manifest_hash is not None
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Reload the manifest if the file changed since the last load.
+
+        Args:
+            force: Reload even if the modification time is unchanged
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError as e:
+            self._clear(f"Semantic manifest not found: {e}")
+            return
+
+        if not force and mtime == self._mtime:
+            return
+
+        try:
+            raw = self.manifest_path.read_bytes()
+            self._build(json.loads(raw))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._clear(f"Could not parse semantic manifest: {e}")
+            return
+
+        self._mtime = mtime
+        self.manifest_hash = hashlib.sha256(raw).hexdigest()
+        self.load_error = None
+
+    def _clear(self, error: str) -> None:
+        """Drop the loaded manifest and remember why."""
+        self.manifest_hash = None
+        self._mtime = None
+        self.load_error = error
+
+    def _build(self, manifest: Dict[str, Any]) -> None:
+        """Build every lookup structure from the parsed manifest."""
+        semantic_models = {model["name"]: model for model in manifest.get("semantic_models", [])}
+        metrics = {metric["name"]: metric for metric in manifest.get("metrics", [])}
+
+        measure_model = {}
+        entity_models: Dict[str, List[Tuple[str, str]]] = {}
+        model_dimensions = {}
+        for model_name, model in semantic_models.items():
+            for measure in model.get("measures", []):
+                measure_model[measure["name"]] = model_name
+            for entity in model.get("entities", []):
+                entity_models.setdefault(entity["name"], []).append((model_name, entity["type"]))
+            model_dimensions[model_name] = {
+                dimension["name"]: dimension for dimension in model.get("dimensions", [])
+            }
+
+        # Edges from each semantic model to the models it can join to through one of its entities
+        join_graph: Dict[str, List[Tuple[str, str]]] = {}
+        for model_name, model in semantic_models.items():
+            edges = []
+            for entity in model.get("entities", []):
+                for other_model, entity_type in entity_models.get(entity["name"], []):
+                    if other_model != model_name and entity_type in JOINABLE_ENTITY_TYPES:
+                        edges.append((entity["name"], other_model))
+            join_graph[model_name] = edges
+
+        self.semantic_models = semantic_models
+        self.metrics = metrics
+        self.saved_queries = {query["name"]: query for query in manifest.get("saved_queries", [])}
+        self.measure_model = measure_model
+        self.entity_models = entity_models
+        self.model_dimensions = model_dimensions
+        self.join_graph = join_graph
+        self.metric_measures = {name: self._resolve_measures(name, set()) for name in metrics}
+        self.metric_dimensions = {name: self._reachable_dimensions(name) for name in metrics}
+        self.metric_entities = {name: self._reachable_entities(name) for name in metrics}
+
+    def _resolve_measures(self, metric_name: str, seen: Set[str]) -> List[str]:
+        """Return the measures a metric is ultimately computed from."""
+        metric = self.metrics.get(metric_name)
+        if metric is None or metric_name in seen:
+            return []
+        seen.add(metric_name)
+
+        type_params = metric.get("type_params") or {}
+        input_measures = [measure["name"] for measure in type_params.get("input_measures") or []]
+        if input_measures:
+            return sorted(set(input_measures))
+
+        measures: Set[str] = set()
+        if type_params.get("measure"):
+            measures.add(type_params["measure"]["name"])
+        for key in ("numerator", "denominator"):
+            if type_params.get(key):
+                measures.update(self._resolve_measures(type_params[key]["name"], seen))
+        for input_metric in type_params.get("metrics") or []:
+            measures.update(self._resolve_measures(input_metric["name"], seen))
+        return sorted(measures)
+
+    @staticmethod
+    def _primary_entity(model: Dict[str, Any]) -> Optional[str]:
+        """Return the entity local dimensions of a semantic model are qualified with."""
+        if model.get("primary_entity"):
+            return model["primary_entity"]
+        for entity in model.get("entities", []):
+            if entity["type"] == "primary":
+                return entity["name"]
+        return None
+
+    def _measure_models(self, metric_name: str) -> List[str]:
+        """Return the semantic models holding a metric's input measures."""
+        return sorted({
+            self.measure_model[measure]
+            for measure in self.metric_measures.get(metric_name, [])
+            if measure in self.measure_model
+        })
+
+    def _reachable_dimensions(self, metric_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the dimensions a metric can be grouped by, keyed by qualified name.
+
+        Covers metric_time, the local dimensions of the measure's semantic model and
+        the dimensions of every model one entity join away.
+        """
+        dimensions: Dict[str, Dict[str, Any]] = {}
+        models = self._measure_models(metric_name)
+        if models:
+            dimensions["metric_time"] = {"type": "time", "semantic_model": None, "granularity": "day"}
+
+        for model_name in models:
+            sources = [(self._primary_entity(self.semantic_models[model_name]), model_name)]
+            sources.extend(self.join_graph.get(model_name, []))
+            for entity_name, source_model in sources:
+                if entity_name is None:
+                    continue
+                for dimension in self.model_dimensions[source_model].values():
+                    granularity = (dimension.get("type_params") or {}).get("time_granularity")
+                    dimensions[f"{entity_name}__{dimension['name']}"] = {
+                        "type": dimension["type"].lower(),
+                        "semantic_model": source_model,
+                        "granularity": granularity,
+                    }
+        return dimensions
+
+    def _reachable_entities(self, metric_name: str) -> List[str]:
+        """Return the entities a metric can be grouped by."""
+        entities: Set[str] = set()
+        for model_name in self._measure_models(metric_name):
+            local = [entity["name"] for entity in self.semantic_models[model_name].get("entities", [])]
+            entities.update(local)
+            for entity_name, other_model in self.join_graph.get(model_name, []):
+                for entity in self.semantic_models[other_model].get("entities", []):
+                    if entity["name"] != entity_name:
+                        entities.add(f"{entity_name}__{entity['name']}")
+        return sorted(entities)
+
+    @staticmethod
+    def expand_granularities(name: str, granularity: Optional[str]) -> List[str]:
+        """Return a time dimension's `__<grain>` variants at or above its defined granularity."""
+        start = TIME_GRANULARITIES.index(granularity) if granularity in TIME_GRANULARITIES else 0
+        return [f"{name}__{grain}" for grain in TIME_GRANULARITIES[start:]]
+
+    def list_metrics(self, search: Optional[str] = None, show_all_dimensions: bool = False) -> List[Dict[str, Any]]:
+        """
+        List metrics, optionally filtered by a search term.
+
+        Args:
+            search: Case-insensitive substring of the metric name
+            show_all_dimensions: Include every dimension the metric can be grouped by
+
+        Returns:
+            List of metric summaries
+        """
+        result = []
+        for name in sorted(self.metrics):
+            if search and search.lower() not in name.lower():
+                continue
+            metric = self.metrics[name]
+            item = {
+                "name": name,
+                "label": metric.get("label"),
+                "description": metric.get("description"),
+                "type": metric.get("type"),
+            }
+            if show_all_dimensions:
+                item["dimensions"] = sorted(self.metric_dimensions[name])
+            result.append(item)
+        return result
+
+    def get_metric(self, metric_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return full details for a metric, or None if it does not exist.
+
+        Args:
+            metric_name: Name of the metric
+        """
+        metric = self.metrics.get(metric_name)
+        if metric is None:
+            return None
+
+        return {
+            "name": metric_name,
+            "label": metric.get("label"),
+            "description": metric.get("description"),
+            "type": metric.get("type"),
+            "type_params": metric.get("type_params"),
+            "filter": metric.get("filter"),
+            "measures": self.metric_measures[metric_name],
+            "semantic_models": self._measure_models(metric_name),
+            "dimensions": sorted(self.metric_dimensions[metric_name]),
+            "entities": self.metric_entities[metric_name],
+        }
+
+    def list_dimensions(self, metrics: List[str]) -> List[Dict[str, Any]]:
+        """
+        List the dimensions shared by all given metrics.
+
+        Args:
+            metrics: Metric names
+
+        Returns:
+            Dimension descriptions, with granularity variants for time dimensions
+
+        Raises:
+            KeyError: If a metric does not exist
+        """
+        shared: Optional[Set[str]] = None
+        for metric_name in metrics:
+            if metric_name not in self.metrics:
+                raise KeyError(f"Metric '{metric_name}' not found")
+            names = set(self.metric_dimensions[metric_name])
+            shared = names if shared is None else shared & names
+
+        reference = self.metric_dimensions[metrics[0]] if metrics else {}
+        result = []
+        for name in sorted(shared or []):
+            dimension = reference[name]
+            item = {"name": name, "type": dimension["type"], "semantic_model": dimension["semantic_model"]}
+            if dimension["type"] == "time":
+                item["granularities"] = self.expand_granularities(name, dimension["granularity"])
+            result.append(item)
+        return result
+
+    def list_entities(self, metrics: Optional[List[str]] = None) -> List[str]:
+        """
+        List entities, optionally restricted to those shared by the given metrics.
+
+        Args:
+            metrics: Optional metric names
+
+        Raises:
+            KeyError: If a metric does not exist
+        """
+        if not metrics:
+            return sorted(self.entity_models)
+
+        shared: Optional[Set[str]] = None
+        for metric_name in metrics:
+            if metric_name not in self.metrics:
+                raise KeyError(f"Metric '{metric_name}' not found")
+            names = set(self.metric_entities[metric_name])
+            shared = names if shared is None else shared & names
+        return sorted(shared or [])
+
+    def column_types(self, metrics: Optional[List[str]], group_by: Optional[List[str]]) -> Dict[str, str]:
+        """
+        Return the type of the result columns of a metric query, keyed by lower-cased column name.
+
+        Simple metrics counting rows (count, count_distinct, sum_boolean measures) are
+        "integer" and other metrics "float"; time dimensions are "timestamp" at every
+        grain and categorical dimensions "string". A time dimension grouped by without a
+        grain (e.g. metric_time) is also keyed by its `__<grain>` names, since MetricFlow
+        names its result column after the grain it resolves to. Entities and names the
+        index does not know are left out.
+
+        Args:
+            metrics: Metric names of the query
+            group_by: Group-by names of the query
+        """
+        types = {}
+        reachable: Dict[str, Dict[str, Any]] = {}
+        for metric_name in metrics or []:
+            metric = self.metrics.get(metric_name)
+            if metric is None:
+                continue
+            reachable.update(self.metric_dimensions.get(metric_name, {}))
+            types[metric_name.lower()] = "integer" if self._counts_rows(metric) else "float"
+
+        for item in group_by or []:
+            name = item.strip().lower()
+            base, _, grain = name.rpartition("__")
+            dimension = reachable.get(name) or (reachable.get(base) if grain in TIME_GRANULARITIES else None)
+            if dimension is None:
+                continue
+            if dimension["type"] != "time":
+                types[name] = "string"
+                continue
+            types[name] = "timestamp"
+            if dimension is reachable.get(name):
+                for column in self.expand_granularities(name, dimension.get("granularity")):
+                    types[column] = "timestamp"
+        return types
+
+    def _counts_rows(self, metric: Dict[str, Any]) -> bool:
+        """Return True if a metric is a simple metric over a counting measure."""
+        if str(metric.get("type", "")).lower() != "simple":
+            return False
+        measure_name = ((metric.get("type_params") or {}).get("measure") or {}).get("name")
+        model = self.semantic_models.get(self.measure_model.get(measure_name, ""), {})
+        measure = next((item for item in model.get("measures", []) if item["name"] == measure_name), None)
+        return measure is not None and str(measure.get("agg", "")).lower() in INTEGER_AGGREGATIONS
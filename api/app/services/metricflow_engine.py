@@ -0,0 +1,190 @@
+"""
+In-process MetricFlow engine.
+Loads the dbt project and its semantic manifest once and keeps a MetricFlowEngine
+in memory, so requests no longer pay for interpreter startup, manifest parsing
+and warehouse connection setup on every call.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from app.services.manifest_index import SemanticManifestIndex
+
+try:
+    from dbt_metricflow.cli.dbt_connectors.adapter_backed_client import AdapterBackedSqlClient
+    from dbt_metricflow.cli.dbt_connectors.dbt_config_accessor import dbtArtifacts, dbtProjectMetadata
+    from metricflow.engine.metricflow_engine import MetricFlowEngine, MetricFlowQueryRequest
+    from metricflow.model.semantic_manifest_lookup import SemanticManifestLookup
+except ImportError:  # MetricFlow is optional, the service falls back to the `mf` CLI
+    MetricFlowEngine = None
+
+
+def metricflow_available() -> bool:
+    """Return True if MetricFlow can be imported in this interpreter."""
+    return MetricFlowEngine is not None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional ISO8601 string into a datetime."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def _jsonable(obj: Any) -> Any:
+    """Convert MetricFlow / dbt-semantic-interfaces objects to plain Python structures."""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, (list, tuple, set)):
+        return [_jsonable(item) for item in obj]
+    if isinstance(obj, dict):
+        return {key: _jsonable(value) for key, value in obj.items()}
+    if hasattr(obj, "model_dump"):
+        return _jsonable(obj.model_dump())
+    if hasattr(obj, "dict"):
+        return _jsonable(obj.dict())
+    return str(obj)
+
+
+def _enum_value(obj: Any) -> Optional[str]:
+    """Return the value of a dbt-semantic-interfaces enum (MetricType, DimensionType, TimeGranularity)."""
+    if obj is None:
+        return None
+    return str(getattr(obj, "value", obj)).lower()
+
+
+def data_table_to_dict(table: Any) -> Dict[str, Any]:
+    """
+    Convert a MetricFlow result table into a columns/rows dictionary.
+
+    Handles both MetricFlowDataTable (newer releases) and pandas DataFrames (older releases).
+    """
+    if hasattr(table, "column_names"):
+        return {"columns": list(table.column_names), "rows": [list(row) for row in table.rows]}
+    return {"columns": [str(column) for column in table.columns], "rows": table.values.tolist()}
+
+
+class InProcessEngine:
+    """Long-lived MetricFlow engine bound to a single dbt project."""
+
+    def __init__(self, project_dir: Path):
+        """
+        Build the engine for a dbt project.
+
+        Args:
+            project_dir: Path to the dbt project directory (must contain target/semantic_manifest.json)
+
+        Raises:
+            RuntimeError: If MetricFlow is not installed
+        """
+        if not metricflow_available():
+            raise RuntimeError("MetricFlow is not installed in this environment")
+
+        project_metadata = dbtProjectMetadata.load_from_project_path(Path(project_dir))
+        artifacts = dbtArtifacts.load_from_project_metadata(project_metadata)
+
+        self.sql_client = AdapterBackedSqlClient(artifacts.adapter)
+        self.semantic_manifest_lookup = SemanticManifestLookup(artifacts.semantic_manifest)
+        self.engine = MetricFlowEngine(
+            semantic_manifest_lookup=self.semantic_manifest_lookup,
+            sql_client=self.sql_client,
+        )
+
+    def list_metrics(self, search: Optional[str] = None, show_all_dimensions: bool = False) -> List[Dict[str, Any]]:
+        """List metrics, optionally filtered by a search term."""
+        metrics = []
+        for metric in self.engine.list_metrics():
+            if search and search.lower() not in metric.name.lower():
+                continue
+            item = {
+                "name": metric.name,
+                "label": getattr(metric, "label", None),
+                "description": metric.description,
+                "type": _enum_value(getattr(metric, "type", None)),
+            }
+            if show_all_dimensions:
+                item["dimensions"] = sorted(dimension.qualified_name for dimension in metric.dimensions)
+            metrics.append(item)
+        return metrics
+
+    def list_dimensions(self, metrics: List[str]) -> List[Dict[str, Any]]:
+        """List the dimensions shared by the given metrics, in the shape of the manifest index listing."""
+        dimensions = {}
+        for dimension in self.engine.list_dimensions(metric_names=metrics):
+            dimension_type = _enum_value(getattr(dimension, "type", None))
+            item = {"name": dimension.qualified_name, "type": dimension_type}
+            if dimension_type == "time":
+                type_params = getattr(dimension, "type_params", None)
+                granularity = _enum_value(getattr(type_params, "time_granularity", None))
+                item["granularities"] = SemanticManifestIndex.expand_granularities(dimension.qualified_name, granularity)
+            dimensions.setdefault(dimension.qualified_name, item)
+        return [dimensions[name] for name in sorted(dimensions)]
+
+    def list_dimension_values(
+        self,
+        dimension: str,
+        metrics: List[str],
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> List[Any]:
+        """List the values of a dimension for the given metrics."""
+        return list(self.engine.get_dimension_values(
+            metric_names=metrics,
+            get_group_by_values=dimension,
+            time_constraint_start=_parse_time(start_time),
+            time_constraint_end=_parse_time(end_time),
+        ))
+
+    def list_entities(self, metrics: Optional[List[str]] = None) -> List[str]:
+        """List entities, optionally restricted to the given metrics."""
+        return sorted(entity.name for entity in self.engine.list_entities(metric_names=metrics or None))
+
+    def list_saved_queries(self, show_exports: bool = False, show_parameters: bool = False) -> List[Dict[str, Any]]:
+        """List saved queries defined in the semantic manifest."""
+        saved_queries = []
+        for saved_query in self.engine.list_saved_queries():
+            item = {"name": saved_query.name, "description": saved_query.description}
+            if show_exports:
+                item["exports"] = _jsonable(saved_query.exports)
+            if show_parameters:
+                item["query_params"] = _jsonable(saved_query.query_params)
+            saved_queries.append(item)
+        return saved_queries
+
+    def _build_request(
+        self,
+        metrics: Optional[List[str]] = None,
+        group_by: Optional[List[str]] = None,
+        where: Optional[List[str]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        saved_query: Optional[str] = None
+    ) -> "MetricFlowQueryRequest":
+        """Translate service query arguments into a MetricFlowQueryRequest."""
+        return MetricFlowQueryRequest.create_with_random_request_id(
+            saved_query_name=saved_query,
+            metric_names=None if saved_query else metrics,
+            group_by_names=group_by,
+            where_constraints=where,
+            order_by_names=order_by,
+            limit=limit,
+            time_constraint_start=_parse_time(start_time),
+            time_constraint_end=_parse_time(end_time),
+        )
+
+    def explain(self, **query_args: Any) -> str:
+        """Return the SQL MetricFlow would run for a query."""
+        explain_result = self.engine.explain(mf_request=self._build_request(**query_args))
+        rendered = getattr(explain_result, "rendered_sql_without_descriptions", None) or explain_result.rendered_sql
+        return rendered.sql_query
+
+    def query(self, **query_args: Any) -> Dict[str, Any]:
+        """Run a query and return its result as columns/rows."""
+        query_result = self.engine.query(mf_request=self._build_request(**query_args))
+        return data_table_to_dict(query_result.result_df)
+
+    def health_checks(self) -> Dict[str, Any]:
+        """Run a trivial statement against the warehouse over the engine's connection."""
+        self.sql_client.query("SELECT 1")
+        return {"status": "SUCCESS"}
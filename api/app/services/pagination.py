@@ -0,0 +1,138 @@
+"""
+Keyset pagination over compiled query SQL.
+
+A page is the query wrapped in a predicate selecting the rows after the last row
+of the previous page, in the order of the query's order_by followed by its
+group-by columns (which make the order total). The position is carried by an
+opaque cursor holding those key values and a hash of the query it belongs to.
+"""
+
+import base64
+import json
+import re
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Tuple
+
+
+_METRIC_TIME = re.compile(r"^metric_time$")
+
+
+class CursorError(ValueError):
+    """Raised when a cursor is malformed or belongs to another query."""
+
+
+def _output_column(name: str) -> str:
+    """Return the result column of a group-by or order-by item (metric_time defaults to day)."""
+    name = name.strip().lower()
+    return "metric_time__day" if _METRIC_TIME.match(name) else name
+
+
+def keyset_keys(group_by: Optional[List[str]], order_by: Optional[List[str]]) -> List[Tuple[str, bool]]:
+    """
+    Return the (column, descending) keys pages are ordered by.
+
+    Args:
+        group_by: Group-by items of the query
+        order_by: Order-by items of the query (prefix with - for DESC)
+    """
+    keys: List[Tuple[str, bool]] = []
+    for item in order_by or []:
+        item = item.strip()
+        column = _output_column(item.lstrip("-"))
+        if column not in [key[0] for key in keys]:
+            keys.append((column, item.startswith("-")))
+    for item in group_by or []:
+        column = _output_column(item)
+        if column not in [key[0] for key in keys]:
+            keys.append((column, False))
+    return keys
+
+
+def _cursor_value(value: Any) -> Any:
+    """Convert a key value into its JSON form; it is bound back as text and cast by Postgres."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(query_hash: str, values: List[Any]) -> str:
+    """Return the opaque cursor positioned after a row with the given key values."""
+    payload = json.dumps({"q": query_hash, "k": [_cursor_value(value) for value in values]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, query_hash: str, key_count: int) -> List[Any]:
+    """
+    Return the key values of a cursor.
+
+    Raises:
+        CursorError: If the cursor is malformed or was issued for another query
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        issued_for, values = payload["q"], payload["k"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+    if issued_for != query_hash or not isinstance(values, list) or len(values) != key_count:
+        raise CursorError("Cursor does not belong to this query")
+    return values
+
+
+def _quote(identifier: str) -> str:
+    """Quote a Postgres identifier."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _after(column: str, descending: bool, param: str, value: Any) -> str:
+    """
+    Predicate for rows strictly after a key value, under Postgres' default null
+    ordering (NULLS LAST ascending, NULLS FIRST descending).
+    """
+    if descending:
+        return f"{column} is not null" if value is None else f"{column} < %({param})s"
+    return "false" if value is None else f"({column} > %({param})s or {column} is null)"
+
+
+def keyset_page_sql(
+    sql: str,
+    keys: List[Tuple[str, bool]],
+    values: Optional[List[Any]],
+    page_size: int
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Wrap a query so it returns the page following the given key values.
+
+    Args:
+        sql: Query SQL (pyformat placeholders allowed), without ORDER BY or LIMIT
+        keys: Keys from keyset_keys
+        values: Key values of the previous page's last row, or None for the first page
+        page_size: Rows per page; one extra row is fetched to tell whether a next page exists
+
+    Returns:
+        Tuple of (SQL, bind parameters for the key values and the page size)
+    """
+    params: Dict[str, Any] = {"page_size": page_size + 1}
+    where = ""
+    if values is not None:
+        alternatives = []
+        for position, (column, descending) in enumerate(keys):
+            terms = []
+            for previous in range(position):
+                params[f"cursor_{previous}"] = values[previous]
+                terms.append(f"{_quote(keys[previous][0])} is not distinct from %(cursor_{previous})s")
+            params[f"cursor_{position}"] = values[position]
+            terms.append(_after(_quote(column), descending, f"cursor_{position}", values[position]))
+            alternatives.append("(" + " and ".join(terms) + ")")
+        where = " where " + " or ".join(alternatives)
+
+    order_by = ""
+    if keys:
+        order_by = " order by " + ", ".join(
+            f"{_quote(column)}{' desc' if descending else ''}" for column, descending in keys
+        )
+    inner = sql.strip().rstrip(";")
+    return f"select * from ({inner}) page{where}{order_by} limit %(page_size)s", params
@@ -0,0 +1,159 @@
+"""
+Bounded TTL/LRU cache for query results.
+Entries are keyed on a canonical form of the query so that equivalent requests
+(different metric order, whitespace in where clauses, ...) share one entry.
+"""
+
+import hashlib
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+
+_JINJA_OPEN = re.compile(r"\{\{\s*")
+_JINJA_CLOSE = re.compile(r"\s*\}\}")
+_DOUBLE_QUOTED_ARG = re.compile(r'\(\s*"([^"]*)"\s*\)')
+_STRING_OR_SPACE = re.compile(r"('(?:[^']|'')*')|\s+")
+
+
+def canonical_where(condition: str) -> str:
+    """
+    Normalize a MetricFlow where condition.
+
+    Collapses whitespace outside string literals and normalizes Jinja spacing and
+    quoting, e.g. `{{Dimension("x")}}  >  1` becomes `{{ Dimension('x') }} > 1`.
+    """
+    condition = _DOUBLE_QUOTED_ARG.sub(r"('\1')", condition.strip())
+    condition = _STRING_OR_SPACE.sub(lambda match: match.group(1) or " ", condition)
+    condition = _JINJA_OPEN.sub("{{ ", condition)
+    return _JINJA_CLOSE.sub(" }}", condition)
+
+
+def canonical_time(value: Optional[str]) -> Optional[str]:
+    """Resolve an ISO8601 bound to a single representation (e.g. 2024-01-01 -> 2024-01-01T00:00:00)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        return value.strip()
+
+
+def canonical_query(
+    metrics: Optional[List[str]] = None,
+    group_by: Optional[List[str]] = None,
+    where: Optional[List[str]] = None,
+    order_by: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    saved_query: Optional[str] = None,
+    compile_sql: bool = False
+) -> Dict[str, Any]:
+    """
+    Return a normalized representation of query arguments.
+
+    Where conditions are order-independent and sorted. Metrics and group-bys keep
+    their order (without duplicates) since it is the column order of the result, and
+    order_by keeps its order since it changes the row order.
+    """
+    return {
+        "metrics": list(dict.fromkeys(metric.strip().lower() for metric in metrics or [])),
+        "group_by": list(dict.fromkeys(item.strip().lower() for item in group_by or [])),
+        "where": sorted({canonical_where(condition) for condition in where or []}),
+        "order_by": [item.strip().lower() for item in order_by or []],
+        "limit": limit,
+        "start_time": canonical_time(start_time),
+        "end_time": canonical_time(end_time),
+        "saved_query": saved_query,
+        "compile_sql": compile_sql,
+    }
+
+
+def query_key(**query_args: Any) -> str:
+    """Return a stable hash of the canonical form of the query arguments."""
+    payload = json.dumps(canonical_query(**query_args), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class QueryResultCache:
+    """In-process LRU cache with per-entry TTL, invalidated when the data version changes."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: Optional[float] = 300):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results; least recently used entries are evicted
+            ttl_seconds: Lifetime of an entry in seconds, or None for entries that only
+                expire with their data version
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[Tuple[Any, ...]] = None
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ensure_version(self, version: Tuple[Any, ...]) -> None:
+        """
+        Drop every entry if the data version changed.
+
+        Args:
+            version: Identifies the manifest and data the cached results were computed from
+        """
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else math.inf
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def close(self) -> None:
+        """Release the cache (nothing to do for the in-process cache)."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,183 @@
+"""
+Parameterized compiled-SQL plans for MetricFlow queries.
+
+A query is reduced to its shape by replacing time bounds and where-clause literals
+with sentinels. The shape is compiled once through MetricFlow (explain), the sentinels
+in the generated SQL are turned into bind parameters, and later queries with the same
+shape run the cached SQL directly with their own values.
+"""
+
+import calendar
+import re
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.services.manifest_index import TIME_GRANULARITIES
+
+
+# Sentinel bounds are aligned to the start/end of every granularity MetricFlow snaps to
+# (except week), so they survive its time constraint adjustment unchanged
+START_SENTINEL = "1111-01-01T00:00:00"
+END_SENTINEL = "8888-12-31T00:00:00"
+_START_SENTINEL_LITERAL = re.compile(r"'1111-01-01[^']*'")
+_END_SENTINEL_LITERAL = re.compile(r"'8888-12-31[^']*'")
+
+_JINJA_BLOCK = re.compile(r"\{\{.*?\}\}")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_METRIC_TIME = re.compile(r"^metric_time(?:__(\w+))?$")
+_SQL_HEADER = re.compile(r"^.*\bSQL\b.*:\s*$", re.MULTILINE)
+
+
+def _sentinel(name: str) -> str:
+    """Return the SQL string literal standing in for a where-clause parameter."""
+    return f"'__mf{name}__'"
+
+
+def _literal_value(literal: str) -> Any:
+    """Convert a SQL literal from a where clause into the Python value to bind."""
+    if literal.startswith("'"):
+        return literal[1:-1].replace("''", "'")
+    return float(literal) if "." in literal else int(literal)
+
+
+def _parameterize_where(condition: str, params: Dict[str, Any]) -> str:
+    """Replace the literals of a where condition (outside Jinja blocks) with sentinels."""
+    pieces = []
+    position = 0
+    for block in list(_JINJA_BLOCK.finditer(condition)) + [None]:
+        end = block.start() if block else len(condition)
+        segment = condition[position:end]
+
+        def replace(match: "re.Match") -> str:
+            name = f"p{len(params)}"
+            params[name] = _literal_value(match.group(0))
+            return _sentinel(name)
+
+        pieces.append(_LITERAL.sub(replace, segment))
+        if block:
+            pieces.append(block.group(0))
+            position = block.end()
+    return "".join(pieces)
+
+
+def metric_time_grain(group_by: Optional[List[str]]) -> Optional[str]:
+    """Return the coarsest metric_time granularity in a group-by list, if any."""
+    grains = []
+    for item in group_by or []:
+        match = _METRIC_TIME.match(item.strip().lower())
+        if match:
+            grains.append(match.group(1) or "day")
+    known = [grain for grain in grains if grain in TIME_GRANULARITIES]
+    return max(known, key=TIME_GRANULARITIES.index) if known else None
+
+
+def snap_bounds(
+    start_time: Optional[str],
+    end_time: Optional[str],
+    grain: Optional[str]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Widen time bounds to whole periods of a granularity, as MetricFlow does.
+
+    Args:
+        start_time: ISO8601 start bound
+        end_time: ISO8601 end bound
+        grain: metric_time granularity being grouped by
+
+    Returns:
+        Tuple of (start of the first period, last day of the final period)
+    """
+    start = datetime.fromisoformat(start_time) if start_time else None
+    end = datetime.fromisoformat(end_time) if end_time else None
+    if grain in (None, "day"):
+        return start, end
+
+    if start is not None:
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if grain == "week":
+            start -= timedelta(days=start.weekday())
+        elif grain == "month":
+            start = start.replace(day=1)
+        elif grain == "quarter":
+            start = start.replace(month=start.month - (start.month - 1) % 3, day=1)
+        elif grain == "year":
+            start = start.replace(month=1, day=1)
+
+    if end is not None:
+        end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if grain == "week":
+            end += timedelta(days=6 - end.weekday())
+        else:
+            month = end.month
+            if grain == "quarter":
+                month = month + (3 - month) % 3
+            elif grain == "year":
+                month = 12
+            end = end.replace(month=month, day=calendar.monthrange(end.year, month)[1])
+
+    return start, end
+
+
+def parameterize_query(query_args: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split query arguments into a shape and the values bound to it.
+
+    Args:
+        query_args: Query arguments (metrics, group_by, where, order_by, limit,
+            start_time, end_time, saved_query)
+
+    Returns:
+        Tuple of (shape arguments with sentinels, parameter values by name)
+    """
+    params: Dict[str, Any] = {}
+    shape = dict(query_args)
+    shape["where"] = [_parameterize_where(condition, params) for condition in query_args.get("where") or []]
+
+    start, end = snap_bounds(
+        query_args.get("start_time"),
+        query_args.get("end_time"),
+        metric_time_grain(query_args.get("group_by"))
+    )
+    if start is not None:
+        params["start_time"] = start
+        shape["start_time"] = START_SENTINEL
+    if end is not None:
+        params["end_time"] = end
+        shape["end_time"] = END_SENTINEL
+
+    return shape, params
+
+
+def extract_explain_sql(output: Any) -> str:
+    """Return the SQL from `mf query --explain` output (the text after its SQL header line)."""
+    if isinstance(output, dict):
+        return output["sql"]
+    text = str(output)
+    header = _SQL_HEADER.search(text)
+    return text[header.end():].strip() if header else text.strip()
+
+
+def bind_compiled_sql(sql: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    Turn the SQL compiled for a query shape into a pyformat template.
+
+    Args:
+        sql: SQL generated by MetricFlow for the shape arguments
+        params: Parameter values from parameterize_query (only the names are used)
+
+    Returns:
+        SQL with %(name)s placeholders, or None if a sentinel could not be located
+        (e.g. MetricFlow rewrote it), in which case the shape cannot be reused
+    """
+    template = sql.replace("%", "%%")
+    for name in params:
+        if name == "start_time":
+            template, count = _START_SENTINEL_LITERAL.subn("%(start_time)s", template)
+        elif name == "end_time":
+            template, count = _END_SENTINEL_LITERAL.subn("%(end_time)s", template)
+        else:
+            count = template.count(_sentinel(name))
+            template = template.replace(_sentinel(name), f"%({name})s")
+        if count == 0:
+            return None
+    return template
@@ -0,0 +1,253 @@
+"""
+Serialization of tabular query results (columns + row batches) into response formats.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Optional, List, Any, AsyncIterator
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional, Arrow and Parquet responses are unavailable without it
+    pyarrow = None
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+STREAMING_MEDIA_TYPES = [NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE]
+COLUMNAR_MEDIA_TYPES = [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+RESULT_MEDIA_TYPES = [NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+
+# Column types a result can declare (from the warehouse cursor or the semantic manifest):
+# boolean, integer, float, date, timestamp, timestamptz and string
+COLUMN_TYPES = ("boolean", "integer", "float", "date", "timestamp", "timestamptz", "string")
+
+
+def pyarrow_available() -> bool:
+    """Return True if pyarrow can be imported in this interpreter."""
+    return pyarrow is not None
+
+
+def negotiate_media_type(accept: Optional[str], supported: List[str]) -> Optional[str]:
+    """
+    Pick the first supported media type listed in an Accept header.
+
+    Args:
+        accept: Value of the Accept header
+        supported: Media types the endpoint can produce besides JSON
+
+    Returns:
+        The matching media type, or None to respond with plain JSON
+    """
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in supported:
+            return media_type
+    return None
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize warehouse values json.dumps does not handle natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+async def encode_ndjson(columns: List[str], batches: AsyncIterator[List[List[Any]]]) -> AsyncIterator[bytes]:
+    """Encode row batches as newline-delimited JSON objects, one per row."""
+    async for rows in batches:
+        chunk = "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+            for row in rows
+        )
+        yield chunk.encode()
+
+
+async def encode_csv(columns: List[str], batches: AsyncIterator[List[List[Any]]]) -> AsyncIterator[bytes]:
+    """Encode row batches as CSV with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def _declared_arrow_type(column_type: str) -> "pyarrow.DataType":
+    """Return the Arrow type of a declared column type; strings (categorical dimensions) are dictionary-encoded."""
+    return {
+        "boolean": pyarrow.bool_(),
+        "integer": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "date": pyarrow.date32(),
+        "timestamp": pyarrow.timestamp("us"),
+        "timestamptz": pyarrow.timestamp("us", tz="UTC"),
+    }.get(column_type, pyarrow.dictionary(pyarrow.int32(), pyarrow.string()))
+
+
+def _inferred_arrow_type(values: List[Any]) -> "pyarrow.DataType":
+    """
+    Choose the Arrow type of a column without a declared type from its first non-null value.
+
+    Numbers become float64/int64 and strings (categorical dimensions) are dictionary-encoded.
+    """
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, bool):
+        return pyarrow.bool_()
+    if isinstance(sample, int):
+        return pyarrow.int64()
+    if isinstance(sample, (float, Decimal)):
+        return pyarrow.float64()
+    if isinstance(sample, datetime):
+        # Aware values are normalized to UTC by pyarrow
+        return pyarrow.timestamp("us", tz="UTC" if sample.tzinfo else None)
+    if isinstance(sample, date):
+        return pyarrow.date32()
+    return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+
+
+def _arrow_value(value: Any, column_type: Optional[str]) -> Any:
+    """
+    Convert a result value into one pyarrow accepts for its column type.
+
+    Values of the CSV export of the mf CLI are strings (empty for null) and are parsed
+    into the declared type; warehouse and engine values are only normalized.
+    """
+    if isinstance(value, str) and column_type not in (None, "string"):
+        if value == "":
+            return None
+        if column_type == "boolean":
+            return value.strip().lower() in ("true", "t", "1")
+        if column_type == "integer":
+            return int(Decimal(value))
+        if column_type == "float":
+            return float(value)
+        if column_type == "date":
+            return date.fromisoformat(value.strip()[:10])
+        value = datetime.fromisoformat(value.strip())
+    if isinstance(value, Decimal):
+        return int(value) if column_type == "integer" else float(value)
+    if isinstance(value, datetime):
+        if column_type == "timestamp" and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        if column_type == "timestamptz" and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        if column_type == "date":
+            return value.date()
+    elif isinstance(value, date) and column_type in ("timestamp", "timestamptz"):
+        value = datetime.combine(value, datetime.min.time())
+        return value.replace(tzinfo=timezone.utc) if column_type == "timestamptz" else value
+    return value
+
+
+def _arrow_schema(
+    columns: List[str],
+    column_types: Optional[List[Optional[str]]],
+    rows: List[List[Any]]
+) -> "pyarrow.Schema":
+    """Build an Arrow schema from the declared column types, inferring undeclared ones from the first batch."""
+    column_types = column_types or [None] * len(columns)
+    return pyarrow.schema([
+        (name, _declared_arrow_type(column_type) if column_type else _inferred_arrow_type([row[index] for row in rows]))
+        for index, (name, column_type) in enumerate(zip(columns, column_types))
+    ])
+
+
+def _record_batch(
+    schema: "pyarrow.Schema",
+    column_types: Optional[List[Optional[str]]],
+    rows: List[List[Any]]
+) -> "pyarrow.RecordBatch":
+    """Convert a batch of rows into an Arrow record batch with the given schema."""
+    column_types = column_types or [None] * len(schema)
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [_arrow_value(row[index], column_types[index]) for row in rows]
+        if pyarrow.types.is_dictionary(field.type):
+            values = [None if value is None else str(value) for value in values]
+            arrays.append(pyarrow.array(values, type=pyarrow.string()).dictionary_encode())
+        else:
+            arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Minimal writable file collecting the bytes pyarrow writes, drained after each batch."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def encode_arrow_stream(
+    columns: List[str],
+    batches: AsyncIterator[List[List[Any]]],
+    column_types: Optional[List[Optional[str]]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Encode row batches as an Arrow IPC stream, one record batch per row batch.
+
+    Args:
+        columns: Column names
+        batches: Row batches
+        column_types: Declared type of each column (see COLUMN_TYPES), None where unknown
+    """
+    sink = _ChunkSink()
+    schema = None
+    writer = None
+    async for rows in batches:
+        if writer is None:
+            schema = _arrow_schema(columns, column_types, rows)
+            writer = pyarrow.ipc.new_stream(sink, schema)
+        writer.write_batch(_record_batch(schema, column_types, rows))
+        yield sink.drain()
+
+    if writer is None:
+        writer = pyarrow.ipc.new_stream(sink, _arrow_schema(columns, column_types, []))
+    writer.close()
+    yield sink.drain()
+
+
+async def encode_parquet(
+    columns: List[str],
+    batches: AsyncIterator[List[List[Any]]],
+    column_types: Optional[List[Optional[str]]] = None
+) -> bytes:
+    """Encode row batches as a single Parquet file (dictionary-encoded string columns), typed as in encode_arrow_stream."""
+    schema = None
+    record_batches = []
+    async for rows in batches:
+        if schema is None:
+            schema = _arrow_schema(columns, column_types, rows)
+        record_batches.append(_record_batch(schema, column_types, rows))
+
+    table = pyarrow.Table.from_batches(record_batches, schema=schema or _arrow_schema(columns, column_types, []))
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
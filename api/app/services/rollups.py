@@ -0,0 +1,361 @@
+"""
+Aggregate navigation over the rollup models declared in dbt's manifest.json.
+
+Rollups are dbt models with a `meta.rollup` block listing the semantic model,
+time granularity, group-by columns and additive measures they pre-aggregate.
+A metric query is answered from the smallest rollup holding every metric,
+group-by and filter it needs; otherwise it goes through MetricFlow.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.services.manifest_index import SemanticManifestIndex, TIME_GRANULARITIES
+from app.services.query_cache import canonical_where
+from app.services.query_plans import metric_time_grain, snap_bounds
+
+
+# Measure aggregations that can be re-aggregated with sum() from partial aggregates
+ADDITIVE_AGGREGATIONS = {"sum", "count", "sum_boolean"}
+
+_METRIC_TIME = re.compile(r"^metric_time(?:__(\w+))?$")
+_WHERE_REFERENCE = re.compile(
+    r"\{\{ (Dimension|TimeDimension|Entity)\('([^']*)'(?:\s*,\s*'([^']*)')?\) \}\}"
+)
+
+
+@dataclass
+class Rollup:
+    """A materialized rollup model."""
+    name: str
+    relation: str
+    schema: str
+    alias: str
+    semantic_model: str
+    time_granularity: Optional[str]
+    dimensions: List[str]
+    measures: List[str]
+    estimated_rows: Optional[float] = None
+
+    @property
+    def time_column(self) -> Optional[str]:
+        """Column holding metric_time at the rollup's granularity."""
+        return f"metric_time__{self.time_granularity}" if self.time_granularity else None
+
+    def size_key(self) -> Tuple[Any, ...]:
+        """Sort key ranking smaller rollups first: estimated rows, then number of group-by columns."""
+        return (
+            self.estimated_rows is None,
+            self.estimated_rows or 0,
+            len(self.dimensions),
+            -TIME_GRANULARITIES.index(self.time_granularity) if self.time_granularity else 0,
+        )
+
+
+@dataclass
+class RollupPlan:
+    """SQL answering a query from a rollup."""
+    rollup: Rollup
+    sql: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _quote(identifier: str) -> str:
+    """Quote a Postgres identifier."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class RollupCatalog:
+    """Reads rollup declarations from manifest.json and routes queries to them."""
+
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the catalog.
+
+        Args:
+            manifest_path: Path to target/manifest.json
+        """
+        self.manifest_path = Path(manifest_path)
+        self.load_error: Optional[str] = None
+        self.rollups: Dict[str, Rollup] = {}
+        self._mtime: Optional[float] = None
+
+    def refresh(self) -> bool:
+        """
+        Reload the rollup declarations if manifest.json changed.
+
+        Returns:
+            True if the declarations were (re)loaded, so row estimates are stale
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError as e:
+            self.rollups = {}
+            self._mtime = None
+            self.load_error = f"dbt manifest not found: {e}"
+            return False
+
+        if mtime == self._mtime:
+            return False
+
+        try:
+            manifest = json.loads(self.manifest_path.read_bytes())
+            self.rollups = self._parse(manifest)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.rollups = {}
+            self.load_error = f"Could not parse dbt manifest: {e}"
+            return False
+
+        self._mtime = mtime
+        self.load_error = None
+        return True
+
+    @staticmethod
+    def _parse(manifest: Dict[str, Any]) -> Dict[str, Rollup]:
+        """Collect enabled models carrying a meta.rollup declaration."""
+        rollups = {}
+        for node in manifest.get("nodes", {}).values():
+            if node.get("resource_type") != "model":
+                continue
+            config = node.get("config") or {}
+            meta = config.get("meta") or node.get("meta") or {}
+            declaration = meta.get("rollup")
+            if not declaration or config.get("enabled") is False:
+                continue
+
+            alias = node.get("alias") or node["name"]
+            relation = node.get("relation_name") or f"{_quote(node['schema'])}.{_quote(alias)}"
+            rollups[node["name"]] = Rollup(
+                name=node["name"],
+                relation=relation,
+                schema=node["schema"],
+                alias=alias,
+                semantic_model=declaration["semantic_model"],
+                time_granularity=declaration.get("time_granularity"),
+                dimensions=[dimension.lower() for dimension in declaration.get("dimensions") or []],
+                measures=list(declaration.get("measures") or []),
+            )
+        return rollups
+
+    def load_estimates(self, warehouse: Any) -> None:
+        """
+        Read each rollup's row estimate from pg_class (reltuples).
+
+        Rollups never analyzed (or missing) keep no estimate and rank after the others.
+
+        Args:
+            warehouse: Open WarehousePool
+        """
+        for rollup in self.rollups.values():
+            result = warehouse.execute(
+                "select c.reltuples from pg_class c "
+                "join pg_namespace n on n.oid = c.relnamespace "
+                "where n.nspname = %(schema)s and c.relname = %(alias)s",
+                {"schema": rollup.schema, "alias": rollup.alias},
+            )
+            rows = result["rows"]
+            estimate = float(rows[0][0]) if rows else -1
+            rollup.estimated_rows = estimate if estimate >= 0 else None
+
+    def plan(self, query_args: Dict[str, Any], index: SemanticManifestIndex) -> Optional[RollupPlan]:
+        """
+        Build the SQL answering a query from the smallest eligible rollup.
+
+        Args:
+            query_args: Query arguments (metrics, group_by, where, order_by, limit,
+                start_time, end_time, saved_query)
+            index: Loaded semantic manifest index, used to resolve metrics to measures
+
+        Returns:
+            A RollupPlan, or None if no rollup can answer the query
+        """
+        if query_args.get("saved_query") or not query_args.get("metrics"):
+            return None
+
+        for rollup in sorted(self.rollups.values(), key=Rollup.size_key):
+            plan = self._plan_rollup(rollup, query_args, index)
+            if plan is not None:
+                return plan
+        return None
+
+    def _plan_rollup(
+        self,
+        rollup: Rollup,
+        query_args: Dict[str, Any],
+        index: SemanticManifestIndex
+    ) -> Optional[RollupPlan]:
+        """Return the SQL answering a query from one rollup, or None if it is not eligible."""
+        select: List[str] = []
+        group_by: List[str] = []
+        outputs: List[str] = []
+        for item in query_args.get("group_by") or []:
+            resolved = self._group_by_column(rollup, item.strip().lower())
+            if resolved is None:
+                return None
+            expression, output = resolved
+            select.append(f"{expression} as {_quote(output)}")
+            group_by.append(expression)
+            outputs.append(output)
+
+        for metric in query_args["metrics"]:
+            expression = self._metric_expression(rollup, metric, index)
+            if expression is None:
+                return None
+            select.append(f"{expression} as {_quote(metric)}")
+            outputs.append(metric.lower())
+
+        conditions = []
+        for condition in query_args.get("where") or []:
+            translated = self._translate_where(rollup, condition)
+            if translated is None:
+                return None
+            # The condition is sent with bind parameters, so literal % must be escaped
+            conditions.append(f"({translated.replace('%', '%%')})")
+
+        params: Dict[str, Any] = {}
+        if query_args.get("start_time") or query_args.get("end_time"):
+            if rollup.time_column is None:
+                return None
+            # Bounds are snapped to the queried grain (as MetricFlow does) and must then
+            # fall on whole periods of the rollup
+            grain = metric_time_grain(query_args.get("group_by")) or "day"
+            start, end = snap_bounds(query_args.get("start_time"), query_args.get("end_time"), grain)
+            aligned = snap_bounds(
+                start.isoformat() if start else None,
+                end.isoformat() if end else None,
+                rollup.time_granularity
+            )
+            if aligned != (start, end):
+                return None
+            if start is not None:
+                params["start_time"] = start
+                conditions.append(f"{_quote(rollup.time_column)} >= %(start_time)s")
+            if end is not None:
+                params["end_time"] = end
+                conditions.append(f"{_quote(rollup.time_column)} <= %(end_time)s")
+
+        order_by = []
+        for item in query_args.get("order_by") or []:
+            item = item.strip().lower()
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name not in outputs:
+                return None
+            order_by.append(f"{_quote(name)}{' desc' if descending else ''}")
+
+        sql = f"select {', '.join(select)} from {rollup.relation}"
+        if conditions:
+            sql += f" where {' and '.join(conditions)}"
+        if group_by:
+            sql += f" group by {', '.join(group_by)}"
+        if order_by:
+            sql += f" order by {', '.join(order_by)}"
+        if query_args.get("limit"):
+            sql += f" limit {int(query_args['limit'])}"
+        return RollupPlan(rollup=rollup, sql=sql, params=params)
+
+    @staticmethod
+    def _time_expression(rollup: Rollup, grain: Optional[str]) -> Optional[str]:
+        """Return metric_time truncated to a granularity, if the rollup is at least that fine."""
+        grain = grain or "day"
+        if rollup.time_column is None or grain not in TIME_GRANULARITIES:
+            return None
+        if TIME_GRANULARITIES.index(grain) < TIME_GRANULARITIES.index(rollup.time_granularity):
+            return None
+        return f"date_trunc('{grain}', {_quote(rollup.time_column)})"
+
+    def _group_by_column(self, rollup: Rollup, name: str) -> Optional[Tuple[str, str]]:
+        """Resolve a group-by item to (SQL expression, output column name)."""
+        match = _METRIC_TIME.match(name)
+        if match:
+            grain = match.group(1) or "day"
+            expression = self._time_expression(rollup, grain)
+            return (expression, f"metric_time__{grain}") if expression else None
+        if name in rollup.dimensions:
+            return _quote(name), name
+        return None
+
+    def _translate_where(self, rollup: Rollup, condition: str) -> Optional[str]:
+        """
+        Replace the Jinja dimension references of a where condition with rollup columns.
+
+        Returns:
+            Plain SQL, or None if the condition references something the rollup lacks
+        """
+        unresolved = False
+
+        def replace(match: "re.Match") -> str:
+            nonlocal unresolved
+            kind, name, grain = match.group(1), match.group(2).strip().lower(), match.group(3)
+            time_match = _METRIC_TIME.match(name)
+            if time_match:
+                expression = self._time_expression(rollup, grain or time_match.group(1))
+            elif kind != "TimeDimension" and name in rollup.dimensions:
+                expression = _quote(name)
+            else:
+                expression = None
+            if expression is None:
+                unresolved = True
+                return ""
+            return expression
+
+        translated = _WHERE_REFERENCE.sub(replace, canonical_where(condition))
+        if unresolved or "{{" in translated or "{%" in translated:
+            return None
+        return translated
+
+    def _metric_expression(
+        self,
+        rollup: Rollup,
+        metric_name: str,
+        index: SemanticManifestIndex
+    ) -> Optional[str]:
+        """
+        Return the SQL aggregating a metric from rollup columns.
+
+        Simple metrics over additive measures re-aggregate with sum(); ratio metrics
+        divide two such sums. Filtered, offset and other metric types are not eligible.
+        """
+        metric = index.metrics.get(metric_name)
+        if metric is None or metric.get("filter"):
+            return None
+
+        type_params = metric.get("type_params") or {}
+        metric_type = str(metric.get("type", "")).lower()
+        if metric_type == "simple":
+            measure = type_params.get("measure") or {}
+            if measure.get("filter") or measure.get("join_to_timespine") or measure.get("fill_nulls_with") is not None:
+                return None
+            return self._measure_expression(rollup, measure.get("name"), index)
+
+        if metric_type == "ratio":
+            parts = []
+            for key in ("numerator", "denominator"):
+                metric_input = type_params.get(key) or {}
+                if metric_input.get("filter") or metric_input.get("offset_window") or metric_input.get("offset_to_grain"):
+                    return None
+                expression = self._metric_expression(rollup, metric_input.get("name"), index)
+                if expression is None:
+                    return None
+                parts.append(expression)
+            numerator, denominator = parts
+            return f"cast({numerator} as double precision) / cast(nullif({denominator}, 0) as double precision)"
+
+        return None
+
+    @staticmethod
+    def _measure_expression(rollup: Rollup, measure_name: Optional[str], index: SemanticManifestIndex) -> Optional[str]:
+        """Return sum() over the rollup column of an additive measure of the rollup's semantic model."""
+        if measure_name not in rollup.measures or index.measure_model.get(measure_name) != rollup.semantic_model:
+            return None
+        model = index.semantic_models[rollup.semantic_model]
+        measure = next((item for item in model.get("measures", []) if item["name"] == measure_name), None)
+        if measure is None or measure.get("non_additive_dimension"):
+            return None
+        if str(measure.get("agg", "")).lower() not in ADDITIVE_AGGREGATIONS:
+            return None
+        return f"sum({_quote(measure_name)})"
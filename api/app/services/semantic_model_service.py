@@ -3,25 +3,130 @@ Service for interacting with dbt MetricFlow commands.
 Wraps MetricFlow CLI commands for querying semantic models, metrics, and dimensions.
 """
 
-import subprocess
+import asyncio
+import csv
+import functools
+import itertools
 import json
 import os
-from typing import Optional, List, Dict, Any
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Optional, List, Dict, Any, Callable, Tuple, AsyncIterator, AsyncContextManager, Awaitable, IO, Union
 from pathlib import Path
 
+from app.core import telemetry
+from app.services.admission import AdmissionControl, LaneFull, admitted, METADATA, DIMENSION_VALUES, QUERY, VALIDATE
+from app.services.dbt_artifacts import RunResultsTracker
+from app.services.dimension_values import DimensionValueIndex
+from app.services.disk_cache import DiskQueryCache, cache_call
+from app.services.health import HealthMonitor
+from app.services.manifest_index import SemanticManifestIndex
+from app.services.metricflow_engine import InProcessEngine, metricflow_available
+from app.services.pagination import CursorError, keyset_keys, encode_cursor, decode_cursor, keyset_page_sql
+from app.services.query_cache import QueryResultCache, query_key, canonical_query
+from app.services.query_plans import parameterize_query, extract_explain_sql, bind_compiled_sql
+from app.services.rollups import RollupCatalog, RollupPlan
+from app.services.singleflight import SingleFlight
+from app.services.time_chunks import plan_chunks, chunk_args, split, stitch
+from app.services.warehouse import WarehousePool, ResultStream, Statement, PoolExhausted, psycopg2_available
+
 
 class SemanticModelService:
-    """Service for executing MetricFlow commands against dbt semantic models."""
+    """
+    Service for executing MetricFlow commands against dbt semantic models.
+    
+    Commands never block the event loop: CLI calls run as asyncio subprocesses and
+    engine or warehouse calls on a thread pool, under one concurrency budget or, with
+    admission control, per-workload lanes. Each collaborator passed to the constructor
+    (engine, manifest index, caches, warehouse pool, rollups, health monitor) takes
+    over part of the work from the `mf` CLI when configured and falls back to it
+    otherwise.
+    """
     
-    def __init__(self, project_dir: Optional[str] = None, venv_path: Optional[str] = None):
+    def __init__(
+        self,
+        project_dir: Optional[str] = None,
+        venv_path: Optional[str] = None,
+        execution_mode: str = "subprocess",
+        max_concurrency: int = 4,
+        manifest_path: Optional[str] = None,
+        result_cache: Optional[Union[QueryResultCache, DiskQueryCache]] = None,
+        build_tracker: Optional[RunResultsTracker] = None,
+        plan_cache: Optional[Union[QueryResultCache, DiskQueryCache]] = None,
+        warehouse: Optional[WarehousePool] = None,
+        stream_batch_size: int = 1000,
+        rollups: Optional[RollupCatalog] = None,
+        dimension_values: Optional[DimensionValueIndex] = None,
+        health_monitor: Optional[HealthMonitor] = None,
+        query_timeout_seconds: Optional[float] = None,
+        admission: Optional[AdmissionControl] = None,
+        chunk_cache: Optional[Union[QueryResultCache, DiskQueryCache]] = None,
+        chunk_lookback_days: int = 3
+    ):
         """
         Initialize the semantic model service.
         
         Args:
             project_dir: Path to the dbt project directory. If None, uses current directory.
             venv_path: Path to the virtual environment. If None, tries to detect it.
+            execution_mode: "engine" to serve commands from an in-process MetricFlow engine
+                (see load_engine), or "subprocess" to always shell out to the `mf` CLI.
+            max_concurrency: Maximum number of MetricFlow commands executing at the same time
+                (with admission control: outside the lanes, e.g. warmup and background refreshes)
+            manifest_path: Path to semantic_manifest.json used to answer metadata calls.
+                If None or missing, metadata calls go through MetricFlow.
+            result_cache: Optional cache for query results (in-process, or on disk and shared
+                by the workers of a node)
+            build_tracker: Optional tracker of the fact model build; a new build invalidates cached results
+            plan_cache: Optional cache of compiled SQL templates per query shape
+            warehouse: Optional connection pool used to run cached plans directly
+            stream_batch_size: Rows per batch when streaming query results
+            rollups: Optional catalog of rollup models queries are routed to (requires the warehouse pool)
+            dimension_values: Optional index answering dimension-value lookups (requires the warehouse pool)
+            health_monitor: Optional background warehouse probe serving /health and opening
+                a circuit breaker on queries while the warehouse is down
+            query_timeout_seconds: Default deadline of a query; None or 0 for no deadline
+            admission: Optional per-workload lanes limiting concurrency and queueing of
+                metadata, dimension-value, query and validation calls
+            chunk_cache: Optional cache of the closed-month pieces of metric time series
+                (requires the manifest index); entries live until the data version changes
+            chunk_lookback_days: Days before today that fact builds may still rewrite;
+                months ending before that window are closed
         """
         self.project_dir = Path(project_dir) if project_dir else Path.cwd()
+        self.execution_mode = execution_mode
+        self.engine: Optional[InProcessEngine] = None
+        self.engine_error: Optional[str] = None
+        self.manifest_index = SemanticManifestIndex(manifest_path) if manifest_path else None
+        self.result_cache = result_cache
+        self.build_tracker = build_tracker
+        self.plan_cache = plan_cache
+        self.warehouse = warehouse
+        self.warehouse_error: Optional[str] = None
+        self.stream_batch_size = stream_batch_size
+        self.rollups = rollups
+        self._rollup_estimates_version: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self.dimension_values = dimension_values
+        self._dimension_values_task: Optional["asyncio.Future"] = None
+        self._dimension_values_attempt: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self.health_monitor = health_monitor
+        self.query_timeout_seconds = query_timeout_seconds
+        self.admission = admission
+        self.chunk_cache = chunk_cache
+        self.chunk_lookback_days = chunk_lookback_days
+        self.warmup_report: Optional[Dict[str, Any]] = None
+        self._warmup_task: Optional["asyncio.Task"] = None
+        self.singleflight = SingleFlight()
+        
+        # Concurrency budget for subprocesses and engine calls outside the admission lanes
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        workers = max_concurrency + (admission.total_concurrency if admission else 0)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metricflow")
+        if warehouse is not None:
+            # Every worker thread may hold a pooled connection, on top of the open streams
+            warehouse.reserve(workers)
         
         # Determine the mf command path
         if venv_path:
@@ -35,10 +140,367 @@ class SemanticModelService:
                 # Fall back to system mf command
                 self.mf_command = "mf"
     
-    def _run_command(self, command: List[str]) -> Dict[str, Any]:
+    def load_engine(self) -> bool:
+        """
+        Build the in-process MetricFlow engine if engine mode is enabled.
+        
+        The engine parses the semantic manifest and connects to the warehouse once;
+        subsequent commands reuse it. On failure the service keeps using the CLI.
+        
+        Returns:
+            True if the engine is loaded and will serve requests
+        """
+        if self.execution_mode != "engine":
+            return False
+        
+        if not metricflow_available():
+            self.engine_error = "MetricFlow is not installed"
+            return False
+        
+        try:
+            self.engine = InProcessEngine(self.project_dir)
+            self.engine_error = None
+        except Exception as e:
+            self.engine = None
+            self.engine_error = str(e)
+        
+        return self.engine is not None
+    
+    def open_warehouse(self) -> bool:
+        """
+        Open the warehouse connection pool used for direct execution of cached plans.
+        
+        A connection failure is recorded and the pool retries lazily on first use;
+        without psycopg2, direct execution is disabled.
+        
+        Returns:
+            True if the pool is open
+        """
+        if self.warehouse is None:
+            return False
+        
+        if not psycopg2_available():
+            self.warehouse = None
+            self.warehouse_error = "psycopg2 is not installed"
+            return False
+        
+        try:
+            self.warehouse.open()
+            self.warehouse_error = None
+        except Exception as e:
+            self.warehouse_error = str(e)
+        
+        return self.warehouse.is_open
+    
+    def start_health_monitor(self) -> bool:
+        """
+        Start probing warehouse health in the background.
+        
+        Must be called from the running event loop (the application lifespan).
+        
+        Returns:
+            True if the monitor is enabled and started
+        """
+        if self.health_monitor is None:
+            return False
+        self.health_monitor.start(self.probe_health)
+        return True
+    
+    async def stop_health_monitor(self) -> None:
+        """Stop the background health probe."""
+        if self.health_monitor is not None:
+            await self.health_monitor.stop()
+    
+    def start_warmup(self, saved_queries: bool = True, queries: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Run warmup() in the background; readiness() reports ready once it finishes.
+        
+        Must be called from the running event loop (the application lifespan).
+        """
+        self.warmup_report = {"status": "warming_up", "steps": {}}
+        self._warmup_task = asyncio.ensure_future(self.warmup(saved_queries=saved_queries, queries=queries))
+    
+    async def stop_warmup(self) -> None:
+        """Cancel a warmup still in progress."""
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except asyncio.CancelledError:
+                pass
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Return whether the service is ready to take traffic, with the warmup report."""
+        ready = self._warmup_task is None or self._warmup_task.done()
+        return {"ready": ready, "warmup": self.warmup_report}
+    
+    async def warmup(self, saved_queries: bool = True, queries: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Pay the cold costs of the first requests ahead of traffic.
+        
+        Loads the semantic manifest and rollup declarations, opens the warehouse pool,
+        builds the dimension value index, compiles a plan for every saved query and
+        runs the given queries into the result cache. A failing step is recorded in
+        the report and does not stop the others.
+        
+        Args:
+            saved_queries: Compile a plan for every saved query
+            queries: query() keyword arguments of hot queries to run into the result cache
+            
+        Returns:
+            Report with the duration, item count and errors of every step
+        """
+        started = time.time()
+        steps: Dict[str, Dict[str, Any]] = {}
+        self.warmup_report = {"status": "warming_up", "started_at": started, "steps": steps}
+        
+        async def step(name: str, func: Callable[[], Awaitable[Tuple[int, List[str]]]]) -> None:
+            step_started = time.perf_counter()
+            try:
+                count, errors = await func()
+            except Exception as e:
+                count, errors = 0, [str(e)]
+            steps[name] = {"count": count, "errors": errors, "seconds": round(time.perf_counter() - step_started, 4)}
+        
+        async def manifest() -> Tuple[int, List[str]]:
+            if self.manifest_index is None:
+                return 0, []
+            self.manifest_index.refresh()
+            if self.rollups is not None:
+                self.rollups.refresh()
+            if not self._manifest_ready():
+                return 0, [self.manifest_index.load_error]
+            return len(self.manifest_index.metrics), []
+        
+        async def warehouse() -> Tuple[int, List[str]]:
+            if self.warehouse is None:
+                return 0, []
+            opened = self.warehouse.is_open or await asyncio.get_running_loop().run_in_executor(None, self.open_warehouse)
+            return (1, []) if opened else (0, [self.warehouse_error or "Warehouse pool not opened"])
+        
+        async def dimension_values() -> Tuple[int, List[str]]:
+            if self.dimension_values is None or not self.warehouse or not self._manifest_ready():
+                return 0, []
+            self._dimension_values_attempt = self.data_version()
+            result = await self.refresh_dimension_values()
+            if not result["success"]:
+                return 0, [result["error"]]
+            return result["data"]["dimensions"], [f"{name}: {error}" for name, error in result["data"]["errors"].items()]
+        
+        async def saved_query_plans() -> Tuple[int, List[str]]:
+            if not saved_queries or not self.warehouse or self.plan_cache is None:
+                return 0, []
+            names = await self._saved_query_names()
+            plans = await asyncio.gather(*(self._get_plan(self._query_args(saved_query=name)) for name in names))
+            errors = [f"{name}: could not be planned" for name, plan in zip(names, plans) if plan is None]
+            return len(names) - len(errors), errors
+        
+        async def hot_queries() -> Tuple[int, List[str]]:
+            errors = []
+            for position, item in enumerate(queries or []):
+                result = await self.query(**item)
+                if not result["success"]:
+                    errors.append(f"#{position}: {result['error']}")
+            return len(queries or []) - len(errors), errors
+        
+        await step("manifest", manifest)
+        await step("warehouse", warehouse)
+        await step("dimension_values", dimension_values)
+        await step("saved_query_plans", saved_query_plans)
+        await step("queries", hot_queries)
+        
+        finished = time.time()
+        self.warmup_report = {
+            "status": "ready",
+            "started_at": started,
+            "finished_at": finished,
+            "seconds": round(finished - started, 4),
+            "steps": steps,
+        }
+        return self.warmup_report
+    
+    async def _saved_query_names(self) -> List[str]:
+        """Return the names of every saved query, from the manifest or list_saved_queries()."""
+        if self._manifest_ready():
+            return sorted(self.manifest_index.saved_queries)
+        
+        result = await self.list_saved_queries()
+        if not result["success"]:
+            raise RuntimeError(result.get("error", "Could not list saved queries"))
+        data = result["data"]
+        if isinstance(data, list):
+            return [item["name"] if isinstance(item, dict) else str(item) for item in data]
+        # CLI output lists one "• name: description" line per saved query
+        return [
+            line.strip()[1:].split(":")[0].strip()
+            for line in str(data).splitlines()
+            if line.strip().startswith("•")
+        ]
+    
+    @staticmethod
+    def _query_args(**overrides: Any) -> Dict[str, Any]:
+        """Return query arguments with every key present (None unless overridden)."""
+        query_args = dict.fromkeys(
+            ("metrics", "group_by", "where", "order_by", "limit", "start_time", "end_time", "saved_query")
+        )
+        query_args.update(overrides)
+        return query_args
+    
+    def shutdown(self) -> None:
+        """Release the engine thread pool, warehouse connections and caches."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.warehouse is not None:
+            self.warehouse.close()
+        for cache in (self.result_cache, self.plan_cache, self.chunk_cache):
+            if cache is not None:
+                cache.close()
+    
+    def _manifest_ready(self) -> bool:
+        """Return True if metadata calls can be answered from the manifest index."""
+        return self.manifest_index is not None and self.manifest_index.available
+    
+    def _run_manifest(self, func: Callable[..., Any], **kwargs: Any) -> Dict[str, Any]:
+        """
+        Answer a metadata call from the manifest index.
+        
+        Args:
+            func: Bound SemanticManifestIndex method
+            **kwargs: Arguments forwarded to the method
+            
+        Returns:
+            Dictionary containing success status and data or error message
+        """
+        try:
+            return {"success": True, "data": func(**kwargs)}
+        except KeyError as e:
+            return {"success": False, "error": e.args[0], "status_code": 404}
+    
+    async def _run_blocking(
+        self,
+        func: Callable[..., Any],
+        observe: Optional[Tuple[telemetry.Histogram, str]] = None,
+        cancel: Optional[Callable[[], None]] = None,
+        discard: Optional[Callable[[Any], None]] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Execute a blocking call (engine or warehouse) on the worker pool and return the result.
+        
+        A thread cannot be interrupted: if the caller is cancelled, the call keeps its
+        worker until it returns, unless cancel makes it return early.
+        
+        Args:
+            func: Bound InProcessEngine or WarehousePool method
+            observe: Optional (histogram, command label) recording the call duration,
+                excluding the wait for a concurrency slot
+            cancel: Optional callback interrupting the call when the caller is cancelled
+            discard: Optional callback releasing the return value of a call whose caller
+                was cancelled (e.g. closing a stream nobody will read)
+            **kwargs: Arguments forwarded to the method
+            
+        Returns:
+            Dictionary containing success status and data or error message
+        """
+        try:
+            async with self._slot():
+                started = time.perf_counter()
+                future = self._executor.submit(functools.partial(func, **kwargs))
+                try:
+                    data = await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    if cancel is not None:
+                        cancel()
+                    if discard is not None:
+                        future.add_done_callback(
+                            lambda done: done.cancelled() or done.exception() is not None or discard(done.result())
+                        )
+                    raise
+                finally:
+                    if observe:
+                        histogram, command = observe
+                        histogram.observe(time.perf_counter() - started, command=command)
+            return {"success": True, "data": data}
+        except (LaneFull, PoolExhausted) as e:
+            # Saturation of the service, not a warehouse failure
+            return {"success": False, "error": str(e), "status_code": 429}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _slot(self) -> AsyncContextManager[Any]:
+        """Return the concurrency slot of the current call: its admission lane, or the shared budget."""
+        lane = self.admission.current() if self.admission else None
+        return lane.slot() if lane is not None else self._semaphore
+    
+    async def _run_statement(
+        self,
+        func: Callable[..., Any],
+        command: str,
+        discard: Optional[Callable[[Any], None]] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        Run SQL through a WarehousePool method, cancelling the statement if the caller is cancelled.
+        
+        Args:
+            func: WarehousePool.execute or WarehousePool.open_stream
+            command: Label of the call in the warehouse latency histogram
+            discard: See _run_blocking
+            **kwargs: Arguments forwarded to the method
+            
+        Returns:
+            Dictionary containing success status and data or error message
+        """
+        statement = Statement()
+        
+        def cancel() -> None:
+            statement.cancel()
+            telemetry.CANCELLED_WORK.inc(kind="statement")
+        
+        return await self._run_blocking(
+            func,
+            observe=(telemetry.WAREHOUSE_SECONDS, command),
+            cancel=cancel,
+            discard=discard,
+            statement=statement,
+            **kwargs
+        )
+    
+    async def _with_deadline(
+        self,
+        work: Awaitable[Dict[str, Any]],
+        timeout_seconds: Optional[float],
+        operation: str
+    ) -> Dict[str, Any]:
+        """
+        Await a query under its deadline.
+        
+        When the deadline passes the work is cancelled, which kills its mf subprocess
+        or cancels its warehouse statement.
+        
+        Args:
+            work: Coroutine producing a result dictionary
+            timeout_seconds: Deadline of this request; None uses the service default
+            operation: Label of the call in the deadline counter
+            
+        Returns:
+            The result of the work, or a 504 result if the deadline passed
+        """
+        timeout = timeout_seconds or self.query_timeout_seconds
+        if not timeout:
+            return await work
+        try:
+            return await asyncio.wait_for(work, timeout=timeout)
+        except asyncio.TimeoutError:
+            telemetry.DEADLINES_EXCEEDED.inc(operation=operation)
+            return {"success": False, "error": f"Query exceeded its {timeout:g}s deadline", "status_code": 504}
+    
+    async def _run_command(self, command: List[str]) -> Dict[str, Any]:
         """
         Execute a MetricFlow command and return the result.
         
+        The `mf` subprocess is killed if the caller is cancelled (deadline passed or
+        every caller gone).
+        
         Args:
             command: List of command arguments
             
@@ -52,44 +514,88 @@ class SemanticModelService:
             
             # Set up environment - copy current env to preserve HOME and dbt profiles
             env = os.environ.copy()
+            label = self._command_label(command)
             
-            result = subprocess.run(
-                command,
-                cwd=self.project_dir,
-                capture_output=True,
-                text=True,
-                check=True,
-                env=env
-            )
+            async with self._slot():
+                started = time.perf_counter()
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    cwd=self.project_dir,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=env
+                )
+                telemetry.MF_SPAWN_SECONDS.observe(time.perf_counter() - started, command=label)
+                try:
+                    stdout_bytes, stderr_bytes = await process.communicate()
+                except asyncio.CancelledError:
+                    # Deadline passed or the client went away: do not leave mf (and its query) running
+                    process.kill()
+                    await process.wait()
+                    telemetry.CANCELLED_WORK.inc(kind="subprocess")
+                    raise
+                telemetry.MF_SUBPROCESS_SECONDS.observe(time.perf_counter() - started, command=label)
+            
+            telemetry.MF_STDOUT_BYTES.observe(len(stdout_bytes), command=label)
+            stdout = stdout_bytes.decode()
+            stderr = stderr_bytes.decode()
+            
+            if process.returncode != 0:
+                return {
+                    "success": False,
+                    "error": stderr or stdout,
+                    "exit_code": process.returncode
+                }
             
             # Try to parse JSON output
             try:
-                data = json.loads(result.stdout)
+                with telemetry.MF_JSON_PARSE_SECONDS.time(command=label):
+                    data = json.loads(stdout)
                 return {"success": True, "data": data}
             except json.JSONDecodeError:
                 # Return raw text if not JSON
-                return {"success": True, "data": result.stdout}
+                return {"success": True, "data": stdout}
                 
-        except subprocess.CalledProcessError as e:
-            return {
-                "success": False,
-                "error": e.stderr or e.stdout,
-                "exit_code": e.returncode
-            }
+        except LaneFull as e:
+            return {"success": False, "error": str(e), "status_code": 429}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def list_metrics(self, search: Optional[str] = None, show_all_dimensions: bool = False) -> Dict[str, Any]:
+    @staticmethod
+    def _command_label(command: List[str]) -> str:
+        """Return the metrics label of an mf command, e.g. "list metrics" or "query --explain"."""
+        words = list(itertools.takewhile(lambda arg: not arg.startswith("-"), command[1:3]))
+        if "--explain" in command:
+            words.append("--explain")
+        return " ".join(words)
+    
+    @admitted(METADATA)
+    async def list_metrics(self, search: Optional[str] = None, show_all_dimensions: bool = False) -> Dict[str, Any]:
         """
         List all metrics with their available dimensions.
         
+        Answered from the semantic manifest index when the manifest is available, and
+        otherwise by the engine or the CLI.
+        
         Args:
             search: Filter metrics by search term
             show_all_dimensions: Show all dimensions associated with metrics
             
         Returns:
-            Dictionary with metrics data
+            Dictionary with a list of metric summaries (name, label, description, type and,
+            with show_all_dimensions, dimensions) whichever source answers; fields the
+            engine or the CLI does not report are None
         """
+        if self._manifest_ready():
+            return self._run_manifest(
+                self.manifest_index.list_metrics,
+                search=search,
+                show_all_dimensions=show_all_dimensions
+            )
+        
+        if self.engine:
+            return await self._run_blocking(self.engine.list_metrics, observe=(telemetry.MF_ENGINE_SECONDS, "list metrics"), search=search, show_all_dimensions=show_all_dimensions)
+        
         command = ["mf", "list", "metrics"]
         
         if search:
@@ -98,9 +604,25 @@ class SemanticModelService:
         if show_all_dimensions:
             command.append("--show-all-dimensions")
         
-        return self._run_command(command)
+        result = await self._run_command(command)
+        if not result["success"]:
+            return result
+        return {
+            "success": True,
+            "data": [
+                {
+                    "name": name,
+                    "label": None,
+                    "description": None,
+                    "type": None,
+                    **({"dimensions": sorted(set(dimensions or []))} if show_all_dimensions else {}),
+                }
+                for name, dimensions in self._cli_list_items(result["data"])
+            ]
+        }
     
-    def list_dimensions(self, metrics: List[str]) -> Dict[str, Any]:
+    @admitted(METADATA)
+    async def list_dimensions(self, metrics: List[str]) -> Dict[str, Any]:
         """
         List all unique dimensions for specified metrics.
         
@@ -108,30 +630,95 @@ class SemanticModelService:
             metrics: List of metric names to get dimensions for
             
         Returns:
-            Dictionary with dimensions data
+            Dictionary with a list of dimension summaries (name, type, semantic_model and,
+            for time dimensions, granularities) whichever source answers; fields the
+            engine or the CLI does not report are None
         """
+        if self._manifest_ready():
+            return self._run_manifest(self.manifest_index.list_dimensions, metrics=metrics)
+        
+        if self.engine:
+            return await self._run_blocking(self.engine.list_dimensions, observe=(telemetry.MF_ENGINE_SECONDS, "list dimensions"), metrics=metrics)
+        
         command = ["mf", "list", "dimensions", "--metrics", ",".join(metrics)]
-        return self._run_command(command)
+        result = await self._run_command(command)
+        if not result["success"]:
+            return result
+        names = sorted({name for name, _ in self._cli_list_items(result["data"])})
+        return {
+            "success": True,
+            "data": [{"name": name, "type": None, "semantic_model": None, "granularities": None} for name in names]
+        }
+    
+    @staticmethod
+    def _cli_list_items(output: Any) -> List[Tuple[str, Optional[List[str]]]]:
+        """
+        Parse the bullet lines of `mf list` output ("• name" or "• name: item, item, ...").
+        
+        Returns:
+            (name, listed items or None) per bullet, in output order
+        """
+        items = []
+        for line in str(output).splitlines():
+            line = line.strip()
+            if not line.startswith("•"):
+                continue
+            name, _, rest = line[1:].partition(":")
+            listed = [item.strip() for item in rest.split(",") if item.strip()] if rest.strip() else None
+            items.append((name.strip(), listed))
+        return items
     
-    def list_dimension_values(
+    @admitted(DIMENSION_VALUES)
+    async def list_dimension_values(
         self,
         dimension: str,
         metrics: List[str],
         start_time: Optional[str] = None,
-        end_time: Optional[str] = None
+        end_time: Optional[str] = None,
+        prefix: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         List dimension values for specified metrics.
         
+        Unconstrained lookups are answered from the dimension value index once it is
+        built; a new data version triggers a rebuild in the background while the
+        previous values keep being served.
+        
         Args:
             dimension: Dimension to query values from
             metrics: List of metrics associated with the dimension
             start_time: Optional ISO8601 timestamp to constraint start time
             end_time: Optional ISO8601 timestamp to constraint end time
+            prefix: Optional case-insensitive prefix the values must start with
+            limit: Optional maximum number of values returned
             
         Returns:
-            Dictionary with dimension values
+            Dictionary with {"value", "count"} items; count (fact rows carrying the
+            value) is only known when the index answers and None otherwise
         """
+        if not start_time and not end_time:
+            values = self._indexed_dimension_values(dimension, metrics)
+            if values is not None:
+                return {"success": True, "data": values.search(prefix, limit)}
+        
+        rejected = self._reject_if_circuit_open("dimension-values")
+        if rejected:
+            return rejected
+        
+        if self.engine:
+            result = await self._run_blocking(
+                self.engine.list_dimension_values,
+                observe=(telemetry.MF_ENGINE_SECONDS, "list dimension-values"),
+                dimension=dimension,
+                metrics=metrics,
+                start_time=start_time,
+                end_time=end_time
+            )
+            if result["success"]:
+                result["data"] = self._filter_values(result["data"], prefix, limit)
+            return result
+        
         command = [
             "mf", "list", "dimension-values",
             "--dimension", dimension,
@@ -144,9 +731,87 @@ class SemanticModelService:
         if end_time:
             command.extend(["--end-time", end_time])
         
-        return self._run_command(command)
+        result = await self._run_command(command)
+        if result["success"]:
+            # One "• value" bullet per value; values may contain ":" (timestamps)
+            lines = (line.strip() for line in str(result["data"]).splitlines())
+            values = [line[1:].strip() for line in lines if line.startswith("•")]
+            result["data"] = self._filter_values(values, prefix, limit)
+        return result
+    
+    @staticmethod
+    def _filter_values(values: List[Any], prefix: Optional[str], limit: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Build {"value", "count": None} items from raw dimension values, as the index returns them.
+        
+        Args:
+            values: Values in the order MetricFlow listed them (None is dropped)
+            prefix: Optional case-insensitive prefix the values must start with
+            limit: Optional maximum number of values returned
+        """
+        items = [
+            {"value": str(value), "count": None}
+            for value in values
+            if value is not None and str(value).lower().startswith((prefix or "").lower())
+        ]
+        return items[:limit] if limit is not None else items
+    
+    def _indexed_dimension_values(self, dimension: str, metrics: List[str]) -> Optional[Any]:
+        """
+        Return the indexed values of a dimension, scheduling a rebuild if the data version changed.
+        
+        Returns:
+            SortedValues, or None if the index cannot answer (disabled, not built yet or
+            dimension not indexed)
+        """
+        if self.dimension_values is None or not self.warehouse or not self._manifest_ready():
+            return None
+        
+        version = self.data_version()
+        if version != self.dimension_values.version and version != self._dimension_values_attempt:
+            self._dimension_values_attempt = version
+            asyncio.ensure_future(self.refresh_dimension_values())
+        
+        if not self.dimension_values.available:
+            return None
+        return self.dimension_values.lookup(metrics, dimension, self.manifest_index)
     
-    def list_entities(self, metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+    @admitted(DIMENSION_VALUES)
+    async def refresh_dimension_values(self) -> Dict[str, Any]:
+        """
+        Rebuild the dimension value index from the warehouse.
+        
+        A rebuild already in progress is awaited instead of starting another one.
+        
+        Returns:
+            Dictionary with the index statistics or an error message
+        """
+        if self.dimension_values is None:
+            return {"success": False, "error": "The dimension value index is disabled", "status_code": 404}
+        
+        if not self.warehouse or not self._manifest_ready():
+            return {
+                "success": False,
+                "error": "The dimension value index requires the semantic manifest and a warehouse pool",
+                "status_code": 503
+            }
+        
+        if self._dimension_values_task is None or self._dimension_values_task.done():
+            self._dimension_values_task = asyncio.ensure_future(self._run_blocking(
+                self.dimension_values.build,
+                observe=(telemetry.WAREHOUSE_SECONDS, "dimension-values index"),
+                index=self.manifest_index,
+                warehouse=self.warehouse,
+                version=self.data_version()
+            ))
+        
+        result = await asyncio.shield(self._dimension_values_task)
+        if not result["success"]:
+            return result
+        return {"success": True, "data": self.dimension_values.stats()}
+    
+    @admitted(METADATA)
+    async def list_entities(self, metrics: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         List all unique entities.
         
@@ -156,14 +821,21 @@ class SemanticModelService:
         Returns:
             Dictionary with entities data
         """
+        if self._manifest_ready():
+            return self._run_manifest(self.manifest_index.list_entities, metrics=metrics)
+        
+        if self.engine:
+            return await self._run_blocking(self.engine.list_entities, observe=(telemetry.MF_ENGINE_SECONDS, "list entities"), metrics=metrics)
+        
         command = ["mf", "list", "entities"]
         
         if metrics:
             command.extend(["--metrics", ",".join(metrics)])
         
-        return self._run_command(command)
+        return await self._run_command(command)
     
-    def list_saved_queries(self, show_exports: bool = False, show_parameters: bool = False) -> Dict[str, Any]:
+    @admitted(METADATA)
+    async def list_saved_queries(self, show_exports: bool = False, show_parameters: bool = False) -> Dict[str, Any]:
         """
         List all available saved queries.
         
@@ -174,6 +846,14 @@ class SemanticModelService:
         Returns:
             Dictionary with saved queries data
         """
+        if self.engine:
+            return await self._run_blocking(
+                self.engine.list_saved_queries,
+                observe=(telemetry.MF_ENGINE_SECONDS, "list saved-queries"),
+                show_exports=show_exports,
+                show_parameters=show_parameters
+            )
+        
         command = ["mf", "list", "saved-queries"]
         
         if show_exports:
@@ -182,9 +862,10 @@ class SemanticModelService:
         if show_parameters:
             command.append("--show-parameters")
         
-        return self._run_command(command)
+        return await self._run_command(command)
     
-    def query(
+    @admitted(QUERY)
+    async def query(
         self,
         metrics: Optional[List[str]] = None,
         group_by: Optional[List[str]] = None,
@@ -195,11 +876,20 @@ class SemanticModelService:
         end_time: Optional[str] = None,
         saved_query: Optional[str] = None,
         compile_sql: bool = False,
-        output_csv: Optional[str] = None
+        output_csv: Optional[str] = None,
+        paginate: bool = False,
+        cursor: Optional[str] = None,
+        timeout_seconds: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Execute a query against semantic models.
         
+        A query is answered from the result cache when possible; otherwise identical
+        queries running at the same time share one execution, which is time-chunked
+        (_execute_chunked), routed to a rollup or a compiled plan, or run through
+        MetricFlow, in that order of preference. While the warehouse circuit is open
+        the query fails fast with status_code 503.
+        
         Args:
             metrics: List of metrics to query
             group_by: List of dimensions/entities to group by
@@ -211,38 +901,369 @@ class SemanticModelService:
             saved_query: Name of saved query to execute
             compile_sql: Show the SQL that will be executed
             output_csv: Optional file path to export results to CSV
+            paginate: Return one page of `limit` rows and a "next_cursor" in the data
+            cursor: next_cursor of the previous page (implies paginate)
+            timeout_seconds: Deadline of this request, overriding the service default
+            
+        Returns:
+            Dictionary with query results. Successful results carry "route" (the rollup
+            model that answered the query, or "metricflow"; the routes of the pieces of a
+            time-chunked query joined with "+"); results served from the
+            result cache also carry "cached": True. A query past its deadline returns
+            status_code 504.
+        """
+        if not saved_query and not metrics:
+            return {"success": False, "error": "Either metrics or saved_query must be provided"}
+        
+        query_args = dict(
+            metrics=metrics,
+            group_by=group_by,
+            where=where,
+            order_by=order_by,
+            limit=limit,
+            start_time=start_time,
+            end_time=end_time,
+            saved_query=saved_query
+        )
+        
+        # CSV exports write a file as a side effect and are neither cached nor shared
+        if output_csv:
+            return await self._with_deadline(
+                self._execute_query(query_args, output_csv=output_csv), timeout_seconds, "query"
+            )
+        
+        paginate = paginate or cursor is not None
+        if paginate and (not limit or saved_query or compile_sql):
+            return {
+                "success": False,
+                "error": "Pagination requires limit (the page size) and cannot be combined with saved_query or compile_sql",
+                "status_code": 400
+            }
+        
+        cache_key = query_key(compile_sql=compile_sql, **query_args)
+        if paginate:
+            cache_key = f"{cache_key}:page:{cursor or ''}"
+        if self.result_cache is not None:
+            await cache_call(self.result_cache, "ensure_version", self.data_version())
+            cached = await cache_call(self.result_cache, "get", cache_key)
+            if cached is not None:
+                return {"success": True, "data": cached["data"], "route": cached["route"], "cached": True}
+        
+        # Compiling SQL does not touch the warehouse
+        if not compile_sql:
+            rejected = self._reject_if_circuit_open("query")
+            if rejected:
+                return rejected
+        
+        async def execute() -> Dict[str, Any]:
+            if paginate:
+                result = await self._execute_page(query_args, cursor)
+            else:
+                result = None if compile_sql else await self._execute_chunked(query_args)
+                if result is None:
+                    result = await self._execute_query(query_args, compile_sql=compile_sql)
+            if result["success"] and self.result_cache is not None:
+                await cache_call(self.result_cache, "set", cache_key, {"data": result["data"], "route": result["route"]})
+            return result
+        
+        # Identical queries arriving while this one runs wait for its result; the run is
+        # cancelled once all of them have passed their deadline or gone away
+        return await self._with_deadline(self.singleflight.do(cache_key, execute), timeout_seconds, "query")
+    
+    async def query_batch(self, queries: List[Dict[str, Any]], merge: bool = True) -> List[Dict[str, Any]]:
+        """
+        Execute several queries concurrently.
+        
+        Metric queries that only differ by their metrics are merged into one
+        multi-metric query and the result is split back per item. All executions
+        share the service's concurrency budget.
+        
+        Args:
+            queries: query() arguments for each item
+            merge: Merge compatible metric queries (only items with the same timeout_seconds)
+            
+        Returns:
+            One result dictionary per item, in request order. Items answered by a merged
+            query carry "merged": True.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, item in enumerate(queries):
+            mergeable = merge and item.get("metrics") and not item.get("saved_query") and not item.get("compile_sql")
+            if mergeable:
+                args = {name: value for name, value in item.items() if name != "timeout_seconds"}
+                shape = canonical_query(**{**args, "metrics": None})
+                key = json.dumps([shape, item.get("timeout_seconds")], sort_keys=True)
+            else:
+                key = f"item:{index}"
+            groups.setdefault(key, []).append(index)
+        
+        async def run_group(indexes: List[int]) -> None:
+            if len(indexes) == 1:
+                results[indexes[0]] = await self.query(**queries[indexes[0]])
+                return
+            
+            merged_metrics = list(dict.fromkeys(
+                metric for index in indexes for metric in queries[index]["metrics"]
+            ))
+            result = await self.query(**{**queries[indexes[0]], "metrics": merged_metrics})
+            for index in indexes:
+                results[index] = self._split_merged_result(result, merged_metrics, queries[index]["metrics"])
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        await asyncio.gather(*(run_group(indexes) for indexes in groups.values()))
+        return results
+    
+    @staticmethod
+    def _split_merged_result(
+        result: Dict[str, Any],
+        merged_metrics: List[str],
+        metrics: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Project a merged multi-metric result onto the metrics one item asked for.
+        
+        Unstructured (CLI text) results cannot be projected and are returned whole.
+        """
+        if not result["success"]:
+            return {**result, "merged": True}
+        
+        data = result["data"]
+        if not (isinstance(data, dict) and "columns" in data and "rows" in data):
+            return {**result, "merged": True}
+        
+        dropped = {metric.lower() for metric in merged_metrics} - {metric.lower() for metric in metrics}
+        keep = [index for index, column in enumerate(data["columns"]) if column.lower() not in dropped]
+        projected = {
+            "columns": [data["columns"][index] for index in keep],
+            "rows": [[row[index] for index in keep] for row in data["rows"]],
+        }
+        return {**result, "data": projected, "merged": True}
+    
+    def data_version(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Identify the semantic manifest and warehouse build results are computed from.
+        
+        Returns:
+            Tuple of (semantic manifest hash, completion time of the latest tracked model build)
+        """
+        manifest_hash = self.manifest_index.manifest_hash if self._manifest_ready() else None
+        build_version = self.build_tracker.version if self.build_tracker else None
+        return manifest_hash, build_version
+    
+    async def _execute_query(
+        self,
+        query_args: Dict[str, Any],
+        compile_sql: bool = False,
+        output_csv: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a query from a rollup, a cached plan, the in-process engine or the mf CLI.
+        
+        Args:
+            query_args: Query arguments (metrics, group_by, where, order_by, limit,
+                start_time, end_time, saved_query)
+            compile_sql: Return the generated SQL instead of running the query
+            output_csv: Optional file path to export results to CSV
+            
+        Returns:
+            Dictionary with query results and the "route" that produced them
+        """
+        if not compile_sql and not output_csv:
+            rollup_plan = await self._get_rollup_plan(query_args)
+            if rollup_plan is not None:
+                result = await self._run_statement(
+                    self.warehouse.execute,
+                    "query",
+                    sql=rollup_plan.sql,
+                    params=rollup_plan.params
+                )
+                if result["success"]:
+                    return {**result, "route": rollup_plan.rollup.name}
+                if result.get("status_code") == 429:
+                    # Shed: falling back to MetricFlow would only queue the query again
+                    return result
+        
+        result = await self._execute_metricflow(query_args, compile_sql=compile_sql, output_csv=output_csv)
+        return {**result, "route": "metricflow"}
+    
+    async def _execute_chunked(self, query_args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Run a metric time series as closed monthly pieces and a live tail.
+        
+        Closed pieces are read from the chunk cache. The pieces from the first one
+        missing from the cache through the last one (usually the tail) are computed by
+        a single _execute_query run over their range, and so through rollups and cached
+        plans like any other query; its rows are split back by month and the closed
+        months that were missing are cached.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query
+            
+        Returns:
+            The stitched result, the failed run if it covered the whole query, or None
+            if the query cannot be chunked or a run over part of it failed (the query
+            then runs whole)
+        """
+        if self.chunk_cache is None or not self._manifest_ready():
+            return None
+        chunks = plan_chunks(query_args, self.manifest_index, date.today(), self.chunk_lookback_days)
+        if chunks is None:
+            return None
+        await cache_call(self.chunk_cache, "ensure_version", self.data_version())
+        
+        keys = [query_key(**chunk_args(query_args, chunk)) if chunk.closed else None for chunk in chunks]
+        pieces = [await cache_call(self.chunk_cache, "get", key) if key else None for key in keys]
+        missing = [position for position, piece in enumerate(pieces) if piece is None]
+        first, last = (missing[0], missing[-1]) if missing else (len(chunks), len(chunks) - 1)
+        covered = chunks[first:last + 1]
+        telemetry.QUERY_TIME_CHUNKS.inc(len(chunks) - len(covered), outcome="hit")
+        
+        if covered:
+            whole = len(covered) == len(chunks)
+            args = chunk_args(query_args, covered[0], covered[-1])
+            if whole:
+                args["order_by"] = query_args["order_by"]
+            result = await self._execute_query(args)
+            for chunk in covered:
+                telemetry.QUERY_TIME_CHUNKS.inc(outcome="miss" if chunk.closed else "tail")
+            # Unstructured (CLI) output cannot be split by month
+            split_pieces = split(result["data"], covered) if result["success"] else None
+            if split_pieces is None:
+                if whole:
+                    return result
+                telemetry.QUERY_TIME_CHUNKS.inc(outcome="fallback")
+                return None
+            for position, data in enumerate(split_pieces, start=first):
+                if keys[position] and pieces[position] is None:
+                    await cache_call(self.chunk_cache, "set", keys[position], {"data": data, "route": result["route"]})
+                pieces[position] = {"data": data, "route": result["route"]}
+        
+        data = stitch([piece["data"] for piece in pieces], query_args["order_by"])
+        if data is None:
+            telemetry.QUERY_TIME_CHUNKS.inc(outcome="fallback")
+            return None
+        routes = list(dict.fromkeys(piece["route"] for piece in pieces))
+        return {"success": True, "data": data, "route": "+".join(routes)}
+    
+    async def _execute_page(self, query_args: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+        """
+        Run one page of a query with keyset pagination.
+        
+        The rollup or compiled-plan SQL of the query (without order_by and limit) is
+        wrapped in a predicate selecting the rows after the cursor, ordered by the
+        query's order_by then group-by columns. A page thus costs the same at any
+        depth (no OFFSET) and is planned once per query shape.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query; limit is the page size
+            cursor: next_cursor of the previous page, or None for the first page
+            
+        Returns:
+            Dictionary with {"columns", "rows", "next_cursor"} data (next_cursor is None
+            on the last page)
+        """
+        keys = keyset_keys(query_args["group_by"], query_args["order_by"])
+        query_hash = query_key(**{**query_args, "limit": None})
+        try:
+            values = decode_cursor(cursor, query_hash, len(keys)) if cursor else None
+        except CursorError as e:
+            return {"success": False, "error": str(e), "status_code": 400}
+        
+        base_args = {**query_args, "order_by": None, "limit": None}
+        rollup_plan = await self._get_rollup_plan(base_args)
+        if rollup_plan is not None:
+            sql, params, route = rollup_plan.sql, rollup_plan.params, rollup_plan.rollup.name
+        else:
+            plan = await self._get_plan(base_args)
+            if plan is None:
+                return {
+                    "success": False,
+                    "error": "Pagination requires direct execution from a rollup or compiled plan",
+                    "status_code": 400
+                }
+            sql, params = plan
+            route = "metricflow"
+        
+        page_size = query_args["limit"]
+        page_sql, page_params = keyset_page_sql(sql, keys, values, page_size)
+        result = await self._run_statement(
+            self.warehouse.execute,
+            "query",
+            sql=page_sql,
+            params={**params, **page_params}
+        )
+        if not result["success"]:
+            return result
+        
+        columns, rows = result["data"]["columns"], result["data"]["rows"]
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            lowered = [column.lower() for column in columns]
+            missing = [column for column, _ in keys if column not in lowered]
+            if missing:
+                return {"success": False, "error": f"Cannot paginate on {', '.join(missing)}", "status_code": 400}
+            next_cursor = encode_cursor(query_hash, [rows[-1][lowered.index(column)] for column, _ in keys])
+        
+        return {
+            "success": True,
+            "data": {"columns": columns, "rows": rows, "next_cursor": next_cursor},
+            "route": route
+        }
+    
+    async def _execute_metricflow(
+        self,
+        query_args: Dict[str, Any],
+        compile_sql: bool = False,
+        output_csv: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a query through MetricFlow: a cached plan, the in-process engine or the mf CLI.
+        
+        Args:
+            Same as _execute_query()
             
         Returns:
             Dictionary with query results
         """
+        if self.warehouse and self.plan_cache is not None and not compile_sql and not output_csv:
+            result = await self._execute_plan(query_args)
+            if result is not None:
+                return result
+        
+        if self.engine and not output_csv:
+            if compile_sql:
+                return await self._run_blocking(
+                    lambda: {"sql": self.engine.explain(**query_args)},
+                    observe=(telemetry.MF_ENGINE_SECONDS, "query --explain")
+                )
+            return await self._run_blocking(self.engine.query, observe=(telemetry.MF_ENGINE_SECONDS, "query"), **query_args)
+        
         command = ["mf", "query"]
         
-        if saved_query:
-            command.extend(["--saved-query", saved_query])
+        if query_args["saved_query"]:
+            command.extend(["--saved-query", query_args["saved_query"]])
         else:
-            if not metrics:
-                return {"success": False, "error": "Either metrics or saved_query must be provided"}
-            
-            command.extend(["--metrics", ",".join(metrics)])
+            command.extend(["--metrics", ",".join(query_args["metrics"])])
         
-        if group_by:
-            command.extend(["--group-by", ",".join(group_by)])
+        if query_args["group_by"]:
+            command.extend(["--group-by", ",".join(query_args["group_by"])])
         
-        if where:
-            for condition in where:
+        if query_args["where"]:
+            for condition in query_args["where"]:
                 command.extend(["--where", condition])
         
-        if order_by:
-            command.extend(["--order-by", ",".join(order_by)])
+        if query_args["order_by"]:
+            command.extend(["--order-by", ",".join(query_args["order_by"])])
         
-        if limit:
-            command.extend(["--limit", str(limit)])
+        if query_args["limit"]:
+            command.extend(["--limit", str(query_args["limit"])])
         
-        if start_time:
-            command.extend(["--start-time", start_time])
+        if query_args["start_time"]:
+            command.extend(["--start-time", query_args["start_time"]])
         
-        if end_time:
-            command.extend(["--end-time", end_time])
+        if query_args["end_time"]:
+            command.extend(["--end-time", query_args["end_time"]])
         
         if compile_sql:
             command.append("--explain")
@@ -250,9 +1271,265 @@ class SemanticModelService:
         if output_csv:
             command.extend(["--csv", output_csv])
         
-        return self._run_command(command)
+        return await self._run_command(command)
+    
+    async def _get_plan(self, query_args: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Return the cached compiled plan for a query, compiling its shape on a miss.
+        
+        On a plan cache miss the query shape is compiled once through MetricFlow
+        (explain) and its SQL cached as a parameterized template.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query
+            
+        Returns:
+            Tuple of (SQL template, bind parameters), or None if the query shape cannot
+            be served from a plan and must go through MetricFlow
+        """
+        if not self.warehouse or self.plan_cache is None:
+            return None
+        
+        shape, params = parameterize_query(query_args)
+        manifest_hash = self.manifest_index.manifest_hash if self._manifest_ready() else None
+        await cache_call(self.plan_cache, "ensure_version", (manifest_hash,))
+        shape_key = query_key(**shape)
+        
+        template = await cache_call(self.plan_cache, "get", shape_key)
+        if template is None:
+            with telemetry.MF_PLANNING_SECONDS.time(command="query"):
+                compiled = await self._execute_metricflow(shape, compile_sql=True)
+            if not compiled["success"]:
+                return None
+            # An empty template marks shapes whose SQL could not be parameterized
+            template = bind_compiled_sql(extract_explain_sql(compiled["data"]), params) or ""
+            await cache_call(self.plan_cache, "set", shape_key, template)
+        
+        return (template, params) if template else None
+    
+    async def _get_rollup_plan(self, query_args: Dict[str, Any]) -> Optional[RollupPlan]:
+        """
+        Return the SQL answering a query from the smallest eligible rollup.
+        
+        Rollup row estimates are re-read from the warehouse whenever the dbt manifest
+        or the data version changes.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query
+            
+        Returns:
+            A RollupPlan, or None if the query must go through MetricFlow
+        """
+        if self.rollups is None or not self.warehouse or not self._manifest_ready():
+            return None
+        
+        reloaded = self.rollups.refresh()
+        if not self.rollups.rollups:
+            return None
+        
+        version = self.data_version()
+        if reloaded or version != self._rollup_estimates_version:
+            estimated = await self._run_blocking(
+                self.rollups.load_estimates,
+                observe=(telemetry.WAREHOUSE_SECONDS, "rollup estimates"),
+                warehouse=self.warehouse
+            )
+            if estimated["success"]:
+                self._rollup_estimates_version = version
+        
+        return self.rollups.plan(query_args, self.manifest_index)
+    
+    async def _execute_plan(self, query_args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Run a query from its cached compiled plan over the warehouse pool.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query
+            
+        Returns:
+            Dictionary with query results (or a 429 result if its lane is full), or None
+            if the query must go through MetricFlow
+        """
+        plan = await self._get_plan(query_args)
+        if plan is None:
+            return None
+        
+        template, params = plan
+        result = await self._run_statement(
+            self.warehouse.execute,
+            "query",
+            sql=template,
+            params=params
+        )
+        return result if result["success"] or result.get("status_code") == 429 else None
     
-    def validate(
+    @admitted(QUERY)
+    async def stream_query(
+        self,
+        metrics: Optional[List[str]] = None,
+        group_by: Optional[List[str]] = None,
+        where: Optional[List[str]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        saved_query: Optional[str] = None,
+        timeout_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a query and return its rows as an asynchronous stream of batches.
+        
+        Rows come from a server-side cursor when a rollup or a compiled plan can answer
+        the query, so memory stays flat as the result grows. Otherwise the engine result
+        or a CSV export of the mf CLI (written to a temporary file) is streamed in batches.
+        The deadline covers the query until its first batch is available.
+        
+        Args:
+            Same as query()
+            
+        Returns:
+            Dictionary with success status and either "columns", "column_types" (the
+            type of each column declared by the semantic manifest, else from the
+            warehouse cursor; None where unknown), "batches" (an async iterator of row
+            lists) and "route", or an error message
+        """
+        if not saved_query and not metrics:
+            return {"success": False, "error": "Either metrics or saved_query must be provided"}
+        
+        query_args = dict(
+            metrics=metrics,
+            group_by=group_by,
+            where=where,
+            order_by=order_by,
+            limit=limit,
+            start_time=start_time,
+            end_time=end_time,
+            saved_query=saved_query
+        )
+        
+        rejected = self._reject_if_circuit_open("query stream")
+        if rejected:
+            return rejected
+        
+        return await self._with_deadline(self._open_stream(query_args), timeout_seconds, "query stream")
+    
+    async def _open_stream(self, query_args: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a query for stream_query() and return its columns and batches.
+        
+        Args:
+            query_args: Query arguments as passed to _execute_query
+            
+        Returns:
+            Same as stream_query()
+        """
+        plans = []
+        rollup_plan = await self._get_rollup_plan(query_args)
+        if rollup_plan is not None:
+            plans.append((rollup_plan.sql, rollup_plan.params, rollup_plan.rollup.name))
+        plan = await self._get_plan(query_args)
+        if plan is not None:
+            plans.append((*plan, "metricflow"))
+        
+        for sql, params, route in plans:
+            opened = await self._run_statement(
+                self.warehouse.open_stream,
+                "query stream",
+                discard=ResultStream.close,
+                sql=sql,
+                params=params,
+                batch_size=self.stream_batch_size
+            )
+            if opened.get("status_code") == 429:
+                return opened
+            if opened["success"]:
+                stream = opened["data"]
+                # Declared types first, so that every route yields the same Arrow schema
+                declared = self._manifest_column_types(stream.columns, query_args)
+                return {
+                    "success": True,
+                    "columns": stream.columns,
+                    "column_types": [
+                        declared_type or cursor_type
+                        for declared_type, cursor_type in zip(declared, stream.column_types)
+                    ],
+                    "batches": self._iterate_stream(stream),
+                    "route": route
+                }
+        
+        if self.engine:
+            result = await self._execute_metricflow(query_args)
+            if not result["success"]:
+                return result
+            data = result["data"]
+            return {
+                "success": True,
+                "columns": data["columns"],
+                "column_types": self._manifest_column_types(data["columns"], query_args),
+                "batches": self._iterate_rows(data["rows"]),
+                "route": "metricflow"
+            }
+        
+        handle, csv_path = tempfile.mkstemp(suffix=".csv", prefix="mf_query_")
+        os.close(handle)
+        try:
+            result = await self._execute_metricflow(query_args, output_csv=csv_path)
+        except asyncio.CancelledError:
+            os.unlink(csv_path)
+            raise
+        if not result["success"]:
+            os.unlink(csv_path)
+            return result
+        
+        csv_file = open(csv_path, newline="")
+        columns = next(csv.reader(csv_file), [])
+        return {
+            "success": True,
+            "columns": columns,
+            "column_types": self._manifest_column_types(columns, query_args),
+            "batches": self._iterate_csv(csv_file, csv_path),
+            "route": "metricflow"
+        }
+    
+    def _manifest_column_types(self, columns: List[str], query_args: Dict[str, Any]) -> List[Optional[str]]:
+        """Return the type of each result column as declared by the semantic manifest (None where unknown)."""
+        if not self._manifest_ready():
+            return [None] * len(columns)
+        types = self.manifest_index.column_types(query_args["metrics"], query_args["group_by"])
+        return [types.get(column.lower()) for column in columns]
+    
+    async def _iterate_stream(self, stream: ResultStream) -> AsyncIterator[List[List[Any]]]:
+        """Yield row batches from a server-side cursor, fetching each on the worker pool."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                rows = await loop.run_in_executor(self._executor, stream.fetch)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await loop.run_in_executor(self._executor, stream.close)
+    
+    async def _iterate_rows(self, rows: List[List[Any]]) -> AsyncIterator[List[List[Any]]]:
+        """Yield an in-memory result in batches."""
+        for start in range(0, len(rows), self.stream_batch_size):
+            yield rows[start:start + self.stream_batch_size]
+    
+    async def _iterate_csv(self, csv_file: IO[str], csv_path: str) -> AsyncIterator[List[List[Any]]]:
+        """Yield row batches from a CSV export and delete it afterwards."""
+        try:
+            reader = csv.reader(csv_file)
+            while True:
+                rows = list(itertools.islice(reader, self.stream_batch_size))
+                if not rows:
+                    break
+                yield rows
+        finally:
+            csv_file.close()
+            os.unlink(csv_path)
+    
+    @admitted(VALIDATE)
+    async def validate(
         self,
         skip_dw: bool = False,
         show_all: bool = False,
@@ -285,19 +1562,84 @@ class SemanticModelService:
         if dw_timeout:
             command.extend(["--dw-timeout", str(dw_timeout)])
         
-        return self._run_command(command)
+        return await self._run_command(command)
+    
+    def _reject_if_circuit_open(self, operation: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a 503 result if the warehouse circuit is open, None otherwise.
+        
+        Args:
+            operation: Label of the rejected operation in the rejection counter
+        """
+        if self.health_monitor is None or not self.health_monitor.circuit_open:
+            return None
+        telemetry.CIRCUIT_REJECTIONS.inc(operation=operation)
+        return {
+            "success": False,
+            "error": f"Warehouse unavailable, failing fast until it recovers: {self.health_monitor.last_error}",
+            "status_code": 503
+        }
     
-    def health_checks(self) -> Dict[str, Any]:
+    async def probe_health(self) -> Dict[str, Any]:
+        """
+        Check that the warehouse answers.
+        
+        Runs `select 1` on the warehouse pool's dedicated probe connection when the pool
+        is configured, outside the MetricFlow concurrency budget and the pooled
+        connections, so that a busy service is not reported as down. Connecting and the
+        statement are bounded by the monitor's timeout, so a probe past it does not keep
+        its thread. Otherwise falls back to health_checks().
+        
+        Returns:
+            Dictionary containing success status and data or error message
+        """
+        if self.warehouse is None:
+            result = await self.health_checks()
+            return {**result, "data": {"probe": "metricflow", "output": result["data"]}} if result["success"] else result
+        
+        timeout_seconds = self.health_monitor.timeout_seconds if self.health_monitor else 5.0
+        loop = asyncio.get_running_loop()
+        try:
+            with telemetry.WAREHOUSE_SECONDS.time(command="health probe"):
+                await loop.run_in_executor(None, functools.partial(self.warehouse.probe, timeout_seconds))
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        return {"success": True, "data": {"probe": "warehouse"}}
+    
+    async def health_status(self) -> Dict[str, Any]:
+        """
+        Return the warehouse health known to the background monitor.
+        
+        Probes once if no probe has completed yet; without a monitor, runs health_checks().
+        
+        Returns:
+            Dictionary with success status and the monitor snapshot (or health check output)
+        """
+        if self.health_monitor is None:
+            return await self.health_checks()
+        
+        if self.health_monitor.healthy is None:
+            await self.health_monitor.probe(self.probe_health)
+        snapshot = self.health_monitor.snapshot()
+        if not self.health_monitor.healthy:
+            return {"success": False, "error": snapshot["last_error"], "data": snapshot, "status_code": 503}
+        return {"success": True, "data": snapshot}
+    
+    async def health_checks(self) -> Dict[str, Any]:
         """
         Perform health check against the data platform.
         
         Returns:
             Dictionary with health check results
         """
+        if self.engine:
+            return await self._run_blocking(self.engine.health_checks, observe=(telemetry.MF_ENGINE_SECONDS, "health-checks"))
+        
         command = ["mf", "health-checks"]
-        return self._run_command(command)
+        return await self._run_command(command)
     
-    def get_metric_details(self, metric_name: str) -> Dict[str, Any]:
+    @admitted(METADATA)
+    async def get_metric_details(self, metric_name: str) -> Dict[str, Any]:
         """
         Get detailed information about a specific metric.
         
@@ -307,9 +1649,15 @@ class SemanticModelService:
         Returns:
             Dictionary with metric details
         """
-        return self.list_metrics(search=metric_name, show_all_dimensions=True)
+        if self._manifest_ready():
+            metric = self.manifest_index.get_metric(metric_name)
+            if metric is None:
+                return {"success": False, "error": f"Metric '{metric_name}' not found", "status_code": 404}
+            return {"success": True, "data": metric}
+        
+        return await self.list_metrics(search=metric_name, show_all_dimensions=True)
     
-    def query_with_filters(
+    def build_simple_query(
         self,
         metrics: List[str],
         dimensions: Optional[List[str]] = None,
@@ -318,7 +1666,7 @@ class SemanticModelService:
         limit: int = 100
     ) -> Dict[str, Any]:
         """
-        Convenience method to query metrics with common filtering patterns.
+        Translate a simplified query into query() arguments.
         
         Args:
             metrics: List of metrics to query
@@ -328,9 +1676,9 @@ class SemanticModelService:
             limit: Maximum number of rows to return
             
         Returns:
-            Dictionary with query results
+            Dictionary of metrics, group_by, where and limit arguments
         """
-        group_by = dimensions or []
+        group_by = list(dimensions or [])
         
         # Add time grain to metric_time if specified
         if time_grain:
@@ -349,9 +1697,38 @@ class SemanticModelService:
                 else:
                     where_clauses.append(f"{{{{ Dimension('{dim}') }}}} = '{value}'")
         
-        return self.query(
+        return dict(
             metrics=metrics,
             group_by=group_by,
             where=where_clauses if where_clauses else None,
             limit=limit
         )
+    
+    async def query_with_filters(
+        self,
+        metrics: List[str],
+        dimensions: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        time_grain: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Convenience method to query metrics with common filtering patterns.
+        
+        Args:
+            metrics: List of metrics to query
+            dimensions: List of dimensions to group by
+            filters: Dictionary of dimension filters
+            time_grain: Time granularity (day, week, month, quarter, year)
+            limit: Maximum number of rows to return
+            
+        Returns:
+            Dictionary with query results
+        """
+        return await self.query(**self.build_simple_query(
+            metrics=metrics,
+            dimensions=dimensions,
+            filters=filters,
+            time_grain=time_grain,
+            limit=limit
+        ))
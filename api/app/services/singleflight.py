@@ -0,0 +1,73 @@
+"""
+Coalescing of identical in-flight work.
+When a call with the same key is already running, later callers await its result
+instead of starting the work again. Once every caller has gone away (deadline or
+client disconnect), the shared run is cancelled.
+"""
+
+import asyncio
+from typing import Dict, Any, Awaitable, Callable
+
+
+class _Flight:
+    """A shared run and the number of callers still waiting for it."""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one task per key at a time and shares its result with every caller."""
+
+    def __init__(self):
+        self._inflight: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func for key, or wait for the run already in flight for key.
+
+        Args:
+            key: Identity of the work (e.g. a canonical query hash)
+            func: Coroutine factory, only called if no run is in flight
+
+        Returns:
+            The result of the (possibly shared) run
+        """
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # Shielded so that one caller going away does not cancel the run for the others
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result
+                self.cancelled += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        """Remove a finished or abandoned run, unless a newer run took its key."""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.leaders,
+            "coalesced_waiters": self.coalesced,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,231 @@
+"""
+Time-chunked execution of metric time series.
+
+A query grouped by metric_time at day or month grain and bounded by start_time is
+split at month boundaries. Months that closed more than the fact lookback ago (the
+window incremental builds of fact_sales still rewrite) cannot change until the next
+build, so their pieces are cached without expiry and only the remaining live tail is
+recomputed on each call. The pieces that are not cached are computed by one query over
+their range, whose rows are split back by month. Every group of the result falls in
+exactly one piece, so the pieces are stitched back by concatenating their rows and
+applying the query's order_by, or ordering by metric_time when it has none.
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Any, Set
+
+from app.services.manifest_index import SemanticManifestIndex
+from app.services.query_plans import metric_time_grain, snap_bounds
+
+
+# metric_time granularities whose periods never straddle a month boundary
+CHUNK_GRAINS = {"day", "month"}
+
+# Metric types whose value for a period depends on other periods
+_CROSS_PERIOD_TYPES = {"cumulative", "conversion"}
+
+# Result column holding metric_time at some granularity
+_TIME_COLUMN = re.compile(r"^metric_time(?:__\w+)?$")
+
+
+@dataclass
+class TimeChunk:
+    """A piece of a time-bounded query: the days from start to end (inclusive)."""
+    start: date
+    end: Optional[date]
+    closed: bool
+
+
+def plan_chunks(
+    query_args: Dict[str, Any],
+    index: SemanticManifestIndex,
+    today: date,
+    lookback_days: int
+) -> Optional[List[TimeChunk]]:
+    """
+    Split a query into closed monthly pieces and a live tail.
+
+    Args:
+        query_args: Query arguments (metrics, group_by, where, order_by, limit,
+            start_time, end_time, saved_query)
+        index: Semantic manifest index the metric definitions are read from
+        today: Current date
+        lookback_days: Days before today that fact builds may still rewrite
+
+    Returns:
+        The pieces in chronological order (closed months first, then the tail if the
+        range reaches past the closed months), or None if the query cannot be chunked
+        or has no closed month
+    """
+    if query_args.get("saved_query") or not query_args.get("metrics") or query_args.get("limit"):
+        return None
+    if not query_args.get("start_time"):
+        return None
+
+    grains = {metric_time_grain([item]) for item in query_args.get("group_by") or []} - {None}
+    if not grains or not grains <= CHUNK_GRAINS:
+        return None
+    if not all(_period_local(metric, index, set()) for metric in query_args["metrics"]):
+        return None
+
+    try:
+        start, end = snap_bounds(
+            query_args["start_time"], query_args.get("end_time"), metric_time_grain(query_args["group_by"])
+        )
+    except ValueError:
+        return None
+    # Bounds inside a day are compared as timestamps by MetricFlow and do not split on days
+    if any(bound is not None and bound.time() != bound.min.time() for bound in (start, end)):
+        return None
+
+    first_day = start.date()
+    last_day = end.date() if end is not None else None
+    open_from = (today - timedelta(days=lookback_days)).replace(day=1)
+
+    chunks = []
+    day = first_day
+    while day < open_from and (last_day is None or day <= last_day):
+        month_end = _next_month(day) - timedelta(days=1)
+        chunk_end = month_end if last_day is None else min(month_end, last_day)
+        chunks.append(TimeChunk(day, chunk_end, closed=True))
+        day = chunk_end + timedelta(days=1)
+    if not chunks:
+        return None
+    if last_day is None or day <= last_day:
+        chunks.append(TimeChunk(day, last_day, closed=False))
+    return chunks
+
+
+def chunk_args(query_args: Dict[str, Any], start: TimeChunk, end: Optional[TimeChunk] = None) -> Dict[str, Any]:
+    """
+    Return the query arguments covering the pieces from start to end (inclusive).
+
+    The query is unordered: ordering applies to the stitched result.
+    """
+    last = end or start
+    return {
+        **query_args,
+        "start_time": start.start.isoformat(),
+        "end_time": last.end.isoformat() if last.end is not None else None,
+        "order_by": None,
+    }
+
+
+def split(data: Any, chunks: List[TimeChunk]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Split the data of a query covering consecutive pieces into the data of each piece.
+
+    Args:
+        data: {"columns", "rows"} result of the query
+        chunks: The pieces the query covered, in chronological order
+
+    Returns:
+        One {"columns", "rows"} per piece, or None if the data is unstructured or a
+        row's metric_time cannot be read
+    """
+    if not isinstance(data, dict) or "columns" not in data or "rows" not in data:
+        return None
+    position = _time_column(data["columns"])
+    if position is None:
+        return None
+
+    starts = [chunk.start for chunk in chunks]
+    pieces = [{"columns": data["columns"], "rows": []} for _ in chunks]
+    for row in data["rows"]:
+        day = _row_date(row[position])
+        if day is None:
+            return None
+        # A month period starts before a first piece that begins mid-month
+        pieces[max(bisect.bisect_right(starts, day) - 1, 0)]["rows"].append(row)
+    return pieces
+
+
+def stitch(pieces: List[Any], order_by: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    """
+    Concatenate the {"columns", "rows"} data of the pieces and apply order_by.
+
+    Without order_by, rows are ordered by metric_time, so the result does not depend
+    on which pieces came from the cache.
+
+    Returns:
+        The stitched data, or None if a piece is unstructured (CLI text), the pieces
+        disagree on columns, an order_by field is not a result column, or the values
+        of a field cannot be compared
+    """
+    if not all(isinstance(data, dict) and "columns" in data and "rows" in data for data in pieces):
+        return None
+
+    columns = pieces[0]["columns"]
+    lowered = [column.lower() for column in columns]
+    if any([column.lower() for column in data["columns"]] != lowered for data in pieces):
+        return None
+
+    rows = [row for data in pieces for row in data["rows"]]
+    if not order_by:
+        position = _time_column(columns)
+        order_by = [columns[position]] if position is not None else []
+    for item in reversed(order_by):
+        field = item.strip().lower()
+        descending = field.startswith("-")
+        field = field.lstrip("-")
+        if field not in lowered:
+            return None
+        position = lowered.index(field)
+        # Nulls sort last ascending and first descending, as in Postgres
+        try:
+            rows.sort(
+                key=lambda row: (1, None) if row[position] is None else (0, row[position]),
+                reverse=descending
+            )
+        except TypeError:
+            return None
+    return {"columns": columns, "rows": rows}
+
+
+def _time_column(columns: List[str]) -> Optional[int]:
+    """Return the position of the first metric_time column, if any."""
+    return next(
+        (position for position, column in enumerate(columns) if _TIME_COLUMN.match(column.lower())),
+        None
+    )
+
+
+def _row_date(value: Any) -> Optional[date]:
+    """Return the day of a metric_time value (a date, datetime or ISO string)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _period_local(metric_name: str, index: SemanticManifestIndex, seen: Set[str]) -> bool:
+    """Return True if the metric's value for a period only depends on rows of that period."""
+    metric = index.metrics.get(metric_name)
+    if metric is None or metric_name in seen:
+        return False
+    if str(metric.get("type", "")).lower() in _CROSS_PERIOD_TYPES:
+        return False
+
+    type_params = metric.get("type_params") or {}
+    inputs = [type_params.get(key) for key in ("numerator", "denominator") if type_params.get(key)]
+    inputs += type_params.get("metrics") or []
+    for metric_input in inputs:
+        if metric_input.get("offset_window") or metric_input.get("offset_to_grain"):
+            return False
+        if not _period_local(metric_input.get("name"), index, seen | {metric_name}):
+            return False
+    return True
+
+
+def _next_month(day: date) -> date:
+    """Return the first day of the month after the given day."""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
@@ -0,0 +1,325 @@
+"""
+Pooled Postgres access for running compiled MetricFlow SQL directly against the warehouse.
+"""
+
+import math
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterator
+
+try:
+    import psycopg2
+    from psycopg2.pool import ThreadedConnectionPool, PoolError
+except ImportError:  # psycopg2 is optional, direct execution is disabled without it
+    psycopg2 = None
+
+
+# Result column types (see result_formats) by Postgres type OID; other types are inferred from the values
+POSTGRES_COLUMN_TYPES = {
+    16: "boolean",
+    20: "integer",
+    21: "integer",
+    23: "integer",
+    700: "float",
+    701: "float",
+    1700: "float",
+    1082: "date",
+    1114: "timestamp",
+    1184: "timestamptz",
+    25: "string",
+    1042: "string",
+    1043: "string",
+}
+
+
+def psycopg2_available() -> bool:
+    """Return True if psycopg2 can be imported in this interpreter."""
+    return psycopg2 is not None
+
+
+class PoolExhausted(Exception):
+    """Every pooled connection (or every stream slot) is in use: the service is saturated, the warehouse is not down."""
+
+
+class Statement:
+    """
+    Handle to cancel a statement running on a worker thread.
+
+    Passed to execute()/open_stream(); cancel() may be called from any thread and
+    interrupts the statement server-side (the call then raises QueryCanceledError).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: Optional[Any] = None
+        self.cancelled = False
+
+    def attach(self, conn: Any) -> None:
+        """Record the connection the statement runs on; cancels it at once if already cancelled."""
+        with self._lock:
+            self._conn = conn
+            if self.cancelled:
+                conn.cancel()
+
+    def detach(self) -> None:
+        """Forget the connection once the statement has finished."""
+        with self._lock:
+            self._conn = None
+
+    def cancel(self) -> None:
+        """Cancel the statement, if it is still running."""
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.cancel()
+
+
+class WarehousePool:
+    """Thread-safe pool of warehouse connections shared by all requests."""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, max_streams: int = 8):
+        """
+        Initialize the pool. Connections are opened by open().
+
+        Statements run on worker threads, one connection each, while an open stream
+        holds its connection between fetches without a thread. The pool therefore
+        needs a connection per worker thread (see reserve()) plus one per stream, and
+        streams beyond max_streams are refused instead of taking connections from
+        statements.
+
+        Args:
+            dsn: libpq connection string or URL (Settings.DATABASE_URL)
+            min_size: Connections kept open at all times
+            max_size: Maximum number of connections (raised by reserve() if too small)
+            max_streams: Maximum number of result streams open at the same time
+        """
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_streams = max_streams
+        self._pool: Optional["ThreadedConnectionPool"] = None
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self._probe_conn: Optional[Any] = None
+        self._probe_lock = threading.Lock()
+
+    def reserve(self, workers: int) -> None:
+        """
+        Size the pool for the threads that run statements on it.
+
+        Args:
+            workers: Threads that may hold a connection at the same time (before open())
+        """
+        self.max_size = max(self.max_size, workers + self.max_streams)
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if the pool is open."""
+        return self._pool is not None
+
+    def open(self) -> None:
+        """
+        Open the pool.
+
+        Raises:
+            RuntimeError: If psycopg2 is not installed
+            psycopg2.Error: If the warehouse cannot be reached
+        """
+        if not psycopg2_available():
+            raise RuntimeError("psycopg2 is not installed in this environment")
+        if self._pool is None:
+            self._pool = ThreadedConnectionPool(self.min_size, self.max_size, self.dsn)
+
+    def close(self) -> None:
+        """Close every pooled connection and the probe connection."""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+        with self._probe_lock:
+            if self._probe_conn is not None:
+                self._probe_conn.close()
+                self._probe_conn = None
+
+    def _getconn(self) -> Any:
+        """Check a connection out of the pool, raising PoolExhausted if none is free."""
+        if self._pool is None:
+            self.open()
+        try:
+            return self._pool.getconn()
+        except PoolError as e:
+            raise PoolExhausted(f"All {self.max_size} warehouse connections are in use") from e
+
+    def probe(self, timeout_seconds: float) -> None:
+        """
+        Run `select 1` on a connection of its own, outside the pool.
+
+        The probe neither waits for nor competes with pooled connections, so a busy
+        service is not mistaken for a down warehouse. Connecting and the statement are
+        bounded by timeout_seconds each, so a hanging probe returns on its own. The
+        connection is kept between probes and reopened after a failure.
+
+        Args:
+            timeout_seconds: Connect timeout and statement_timeout of the probe
+
+        Raises:
+            psycopg2.Error: If the warehouse does not answer
+        """
+        if not psycopg2_available():
+            raise RuntimeError("psycopg2 is not installed in this environment")
+        with self._probe_lock:
+            try:
+                if self._probe_conn is None or self._probe_conn.closed:
+                    self._probe_conn = psycopg2.connect(
+                        self.dsn,
+                        connect_timeout=max(2, math.ceil(timeout_seconds)),
+                        options=f"-c statement_timeout={int(timeout_seconds * 1000)}"
+                    )
+                    self._probe_conn.autocommit = True
+                with self._probe_conn.cursor() as cursor:
+                    cursor.execute("select 1")
+                    cursor.fetchall()
+            except Exception:
+                if self._probe_conn is not None:
+                    self._probe_conn.close()
+                    self._probe_conn = None
+                raise
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Check a connection out of the pool for the duration of the block."""
+        conn = self._getconn()
+        broken = False
+        try:
+            conn.autocommit = True
+            yield conn
+        except psycopg2.Error:
+            broken = conn.closed != 0
+            raise
+        finally:
+            self._pool.putconn(conn, close=broken)
+
+    def execute(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        statement: Optional[Statement] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a statement and return its result as columns/rows.
+
+        Args:
+            sql: SQL with pyformat placeholders (%(name)s)
+            params: Values bound to the placeholders
+            statement: Optional handle through which another thread can cancel the statement
+        """
+        with self.connection() as conn:
+            if statement is not None:
+                statement.attach(conn)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    columns = [column.name for column in cursor.description or []]
+                    rows = [list(row) for row in cursor.fetchall()] if cursor.description else []
+            finally:
+                if statement is not None:
+                    statement.detach()
+        return {"columns": columns, "rows": rows}
+
+    def open_stream(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        statement: Optional[Statement] = None
+    ) -> "ResultStream":
+        """
+        Run a statement through a server-side cursor and return a stream over its rows.
+
+        The caller must close() the stream to release its connection.
+
+        Raises:
+            PoolExhausted: If max_streams streams are already open
+
+        Args:
+            sql: SQL with pyformat placeholders (%(name)s)
+            params: Values bound to the placeholders
+            batch_size: Rows fetched from the server per batch
+            statement: Optional handle through which another thread can cancel the
+                statement until its first batch is fetched
+        """
+        if not self._streams.acquire(blocking=False):
+            raise PoolExhausted(f"All {self.max_streams} result streams are in use")
+        try:
+            conn = self._getconn()
+        except BaseException:
+            self._streams.release()
+            raise
+        return ResultStream(self, conn, sql, params, batch_size, statement)
+
+    def _release_stream(self, conn: Any, broken: bool) -> None:
+        """Return the connection of a closed stream and free its stream slot."""
+        try:
+            self._pool.putconn(conn, close=broken)
+        finally:
+            self._streams.release()
+
+
+class ResultStream:
+    """Rows of one statement fetched in batches through a server-side (named) cursor."""
+
+    def __init__(
+        self,
+        pool: WarehousePool,
+        conn: Any,
+        sql: str,
+        params: Optional[Dict[str, Any]],
+        batch_size: int,
+        statement: Optional[Statement] = None
+    ):
+        """
+        Execute the statement and fetch the first batch, so errors surface before streaming starts.
+
+        The stream owns the connection and the stream slot checked out by
+        WarehousePool.open_stream() and gives both back on close().
+        """
+        self._pool = pool
+        self._conn = conn
+        self.batch_size = batch_size
+        if statement is not None:
+            statement.attach(self._conn)
+        try:
+            # Named cursors need a transaction, which close() rolls back
+            self._conn.autocommit = False
+            self._cursor = self._conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            self._cursor.execute(sql, params)
+            self._first_batch: Optional[List[List[Any]]] = [list(row) for row in self._cursor.fetchmany(batch_size)]
+            self.columns = [column.name for column in self._cursor.description or []]
+            self.column_types = [POSTGRES_COLUMN_TYPES.get(column.type_code) for column in self._cursor.description or []]
+        except Exception:
+            self.close()
+            raise
+        finally:
+            if statement is not None:
+                statement.detach()
+
+    def fetch(self) -> List[List[Any]]:
+        """Return the next batch of rows, or an empty list once the result is exhausted."""
+        if self._first_batch is not None:
+            batch, self._first_batch = self._first_batch, None
+            return batch
+        if self._conn is None:
+            return []
+        return [list(row) for row in self._cursor.fetchmany(self.batch_size)]
+
+    def close(self) -> None:
+        """End the transaction and return the connection and stream slot to the pool."""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        broken = conn.closed != 0
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        self._pool._release_stream(conn, broken)
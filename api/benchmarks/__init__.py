@@ -0,0 +1,10 @@
+"""
+Load-test and benchmark harness for the semantic model API.
+
+Runs the application in-process against a stub `mf` executable and a local
+Postgres loaded from data/tables.sql, replays the call shapes of
+tests/api_calls.py and mf_queries/queries.bash at a configurable concurrency,
+and writes per-endpoint latency percentiles and throughput as JSON.
+
+Run with: python -m benchmarks.run --help
+"""
@@ -0,0 +1,113 @@
+"""
+Benchmark dbt project directory: the target/ artifacts the API reads and an
+`mf` executable backed by stub_mf.py.
+
+The semantic manifest and the rollup declarations are generated from the
+project's YAML, pointing at the models built by benchmarks.warehouse.
+"""
+
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+from typing import Dict, Any, List
+
+import yaml
+
+from benchmarks.warehouse import REPO_DIR, MODEL_SCHEMA
+
+
+SEMANTIC_MODELS_DIR = REPO_DIR / "models" / "semantic_models"
+ROLLUPS_SCHEMA = REPO_DIR / "models" / "rollups" / "schema.yml"
+STUB_MF = Path(__file__).resolve().parent / "stub_mf.py"
+
+
+def _ref_name(model: str) -> str:
+    """Return the model name of a ref('...') expression."""
+    return model.split("'")[1] if "'" in model else model
+
+
+def _relation(name: str) -> Dict[str, Any]:
+    """Return the node_relation of a model built in the benchmark schema."""
+    return {
+        "alias": name,
+        "schema_name": MODEL_SCHEMA,
+        "relation_name": f'"{MODEL_SCHEMA}"."{name}"',
+    }
+
+
+def _metric(metric: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a metric from YAML to its semantic manifest form (references become objects)."""
+    type_params = dict(metric.get("type_params") or {})
+    for key in ("measure", "numerator", "denominator"):
+        if isinstance(type_params.get(key), str):
+            type_params[key] = {"name": type_params[key]}
+    if type_params.get("measure"):
+        type_params["input_measures"] = [type_params["measure"]]
+    return {**metric, "type_params": type_params}
+
+
+def semantic_manifest() -> Dict[str, Any]:
+    """Build semantic_manifest.json from models/semantic_models/*.yml."""
+    semantic_models: List[Dict[str, Any]] = []
+    metrics: List[Dict[str, Any]] = []
+    saved_queries: List[Dict[str, Any]] = []
+    for path in sorted(SEMANTIC_MODELS_DIR.glob("*.yml")):
+        document = yaml.safe_load(path.read_text()) or {}
+        for model in document.get("semantic_models") or []:
+            semantic_models.append({**model, "node_relation": _relation(_ref_name(model["model"]))})
+        metrics.extend(_metric(metric) for metric in document.get("metrics") or [])
+        saved_queries.extend(document.get("saved_queries") or [])
+    return {"semantic_models": semantic_models, "metrics": metrics, "saved_queries": saved_queries}
+
+
+def manifest() -> Dict[str, Any]:
+    """Build a manifest.json holding the rollup models declared in models/rollups/schema.yml."""
+    document = yaml.safe_load(ROLLUPS_SCHEMA.read_text()) or {}
+    nodes = {}
+    for model in document.get("models") or []:
+        nodes[f"model.dwh.{model['name']}"] = {
+            "resource_type": "model",
+            "name": model["name"],
+            "alias": model["name"],
+            "schema": MODEL_SCHEMA,
+            "relation_name": f'"{MODEL_SCHEMA}"."{model["name"]}"',
+            "config": {"enabled": True, "meta": model.get("meta") or {}},
+        }
+    return {"nodes": nodes}
+
+
+def create(project_dir: Path) -> Path:
+    """
+    Write the benchmark project into a directory.
+
+    Args:
+        project_dir: Directory to create target/ and bin/ in
+
+    Returns:
+        Path of the `mf` executable
+    """
+    target = project_dir / "target"
+    target.mkdir(parents=True, exist_ok=True)
+    (target / "semantic_manifest.json").write_text(json.dumps(semantic_manifest()))
+    (target / "manifest.json").write_text(json.dumps(manifest()))
+
+    bin_dir = project_dir / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    mf = bin_dir / "mf"
+    mf.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{STUB_MF}" "$@"\n')
+    mf.chmod(mf.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return mf
+
+
+def environment(project_dir: Path, database_url: str) -> Dict[str, str]:
+    """Return the settings pointing the API at the benchmark project and warehouse."""
+    return {
+        "DBT_PROJECT_DIR": str(project_dir),
+        "DBT_MANIFEST_PATH": str(project_dir / "target" / "manifest.json"),
+        "DBT_SEMANTIC_MANIFEST_PATH": str(project_dir / "target" / "semantic_manifest.json"),
+        "DBT_RUN_RESULTS_PATH": str(project_dir / "target" / "run_results.json"),
+        "DATABASE_URL": database_url,
+        "PATH": f"{project_dir / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}",
+    }
@@ -0,0 +1,313 @@
+"""
+Benchmark runner.
+
+Loads the benchmark warehouse, writes a dbt project with a stub `mf` into a
+temporary directory, starts the application in-process (lifespan included) and
+drives every scenario through httpx at a fixed concurrency. The report holds
+latency percentiles and throughput per scenario and per endpoint; given a
+previous report as baseline, regressions beyond a threshold fail the run.
+
+Run from the api/ directory:
+
+    python -m benchmarks.run --database-url postgresql://postgres@localhost/mf_bench
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+import httpx
+
+from benchmarks import project, warehouse
+from benchmarks.scenarios import Scenario, all_scenarios
+
+
+# Report metrics compared against a baseline, and whether higher values are worse
+COMPARED_METRICS = {"p50_ms": True, "p95_ms": True, "throughput_rps": False}
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"),
+                        help="Scratch Postgres database for the benchmark warehouse (BENCHMARK_DATABASE_URL)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per scenario")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per scenario run first")
+    parser.add_argument("--scenarios", default="*",
+                        help="Comma-separated scenario names or glob patterns (e.g. 'query_*,mf_query_0*')")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--rentals", type=int, default=16044, help="Rentals (fact rows) generated in the warehouse")
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the warehouse loaded by a previous run")
+    parser.add_argument("--mf-latency-ms", type=float, default=0.0,
+                        help="Delay added to every stub mf command, standing in for MetricFlow start-up")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the query result cache")
+    parser.add_argument("--setting", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override an API setting (repeatable), e.g. DIRECT_EXECUTION_ENABLED=false")
+    parser.add_argument("--output", default="benchmark_report.json", help="Path of the JSON report")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative change of p50/p95/throughput counted as a regression")
+    return parser.parse_args(argv)
+
+
+def select_scenarios(patterns: str) -> List[Scenario]:
+    """Return the scenarios matching any of the comma-separated patterns."""
+    wanted = [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+    return [
+        scenario for scenario in all_scenarios()
+        if any(fnmatch.fnmatchcase(scenario.name, pattern) for pattern in wanted)
+    ]
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Return a percentile of sorted values, interpolating between the closest ranks."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Return the report entry of a set of requests (latencies in seconds)."""
+    values = sorted(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "status_codes": dict(sorted(statuses.items())),
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "max_ms": ms(values[-1]) if values else None,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int
+) -> Dict[str, Any]:
+    """
+    Send a scenario's request repeatedly and measure it.
+
+    Returns:
+        Raw measurements: latencies (seconds), status code counts, errors and elapsed time
+    """
+    async def send() -> int:
+        response = await client.request(
+            scenario.method, scenario.path.lstrip("/"),
+            params=scenario.params, json=scenario.json, headers=scenario.headers
+        )
+        return response.status_code
+
+    for _ in range(warmup):
+        try:
+            await send()
+        except httpx.HTTPError:
+            pass
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = str(await send())
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not status.isdigit() or int(status) >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    return {"latencies": latencies, "statuses": statuses, "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+def _merge(measurements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize several scenario measurements as one endpoint."""
+    statuses: Dict[str, int] = {}
+    for measurement in measurements:
+        for status, count in measurement["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    return summarize(
+        [latency for measurement in measurements for latency in measurement["latencies"]],
+        statuses,
+        sum(measurement["errors"] for measurement in measurements),
+        sum(measurement["elapsed"] for measurement in measurements),
+    )
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every scenario metric that regressed beyond the threshold."""
+    regressions = []
+    for name, entry in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = previous.get(metric), entry.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """Return the checked-out commit, if the tree is a git repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=warehouse.REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    """Print the per-scenario results."""
+    header = f"{'scenario':<34} {'req':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, entry in report["scenarios"].items():
+        values = [entry[key] if entry[key] is not None else float("nan") for key in
+                  ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")]
+        print(f"{name:<34} {entry['requests']:>5} {entry['errors']:>4} "
+              f"{values[0]:>9.2f} {values[1]:>9.2f} {values[2]:>9.2f} {values[3]:>9.1f}")
+
+
+async def benchmark(args: argparse.Namespace, scenarios: List[Scenario]) -> Dict[str, Any]:
+    """Start the application and run every scenario."""
+    # Imported here: settings and the service are built from the environment at import time
+    main = importlib.import_module("main")
+    settings = importlib.import_module("app.core.config").settings
+
+    measurements: Dict[str, Dict[str, Any]] = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url=f"http://benchmark{settings.API_V1_STR}/", timeout=None
+        ) as client:
+            for scenario in scenarios:
+                measurements[scenario.name] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, args.warmup
+                )
+
+    endpoints: Dict[str, List[Dict[str, Any]]] = {}
+    for scenario in scenarios:
+        endpoints.setdefault(scenario.endpoint, []).append(measurements[scenario.name])
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "api_version": settings.VERSION,
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "warmup_per_scenario": args.warmup,
+            "rentals": args.rentals,
+            "mf_latency_ms": args.mf_latency_ms,
+            "settings": {
+                "MF_EXECUTION_MODE": settings.MF_EXECUTION_MODE,
+                "MF_MAX_CONCURRENCY": settings.MF_MAX_CONCURRENCY,
+                "QUERY_CACHE_ENABLED": settings.QUERY_CACHE_ENABLED,
+                "DIRECT_EXECUTION_ENABLED": settings.DIRECT_EXECUTION_ENABLED,
+                "AGGREGATE_NAVIGATION_ENABLED": settings.AGGREGATE_NAVIGATION_ENABLED,
+                "DIMENSION_VALUE_INDEX_ENABLED": settings.DIMENSION_VALUE_INDEX_ENABLED,
+            },
+        },
+        "scenarios": {
+            scenario.name: {
+                "endpoint": scenario.endpoint,
+                **summarize(
+                    measurements[scenario.name]["latencies"],
+                    measurements[scenario.name]["statuses"],
+                    measurements[scenario.name]["errors"],
+                    measurements[scenario.name]["elapsed"],
+                ),
+            }
+            for scenario in scenarios
+        },
+        "endpoints": {endpoint: _merge(items) for endpoint, items in sorted(endpoints.items())},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    scenarios = select_scenarios(args.scenarios)
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario.name:<34} {scenario.endpoint}")
+        return 0
+    if not scenarios:
+        print(f"No scenario matches {args.scenarios!r}", file=sys.stderr)
+        return 2
+    if not args.database_url:
+        print("--database-url (or BENCHMARK_DATABASE_URL) is required", file=sys.stderr)
+        return 2
+
+    if not args.skip_load:
+        counts = warehouse.load(args.database_url, rentals=args.rentals)
+        print(f"Loaded benchmark warehouse: {counts}")
+
+    with tempfile.TemporaryDirectory(prefix="mf_benchmark_") as directory:
+        project_dir = Path(directory) / "dwh"
+        project.create(project_dir)
+        os.environ.update(project.environment(project_dir, args.database_url))
+        os.environ["MF_EXECUTION_MODE"] = "subprocess"
+        os.environ["MF_STUB_LATENCY_MS"] = str(args.mf_latency_ms)
+        if args.no_cache:
+            os.environ["QUERY_CACHE_ENABLED"] = "false"
+        for setting in args.setting:
+            name, _, value = setting.partition("=")
+            os.environ[name.strip()] = value
+
+        report = asyncio.run(benchmark(args, scenarios))
+
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print_table(report)
+    print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regression beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Request shapes replayed by the benchmark.
+
+The API scenarios mirror the calls of tests/api_calls.py, with the project's
+metric and dimension names and dates inside the generated data. The MetricFlow
+scenarios are the `mf query` commands of mf_queries/queries.bash sent to
+POST /query.
+"""
+
+import shlex
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any
+
+from benchmarks.warehouse import REPO_DIR
+
+
+QUERIES_BASH = REPO_DIR / "mf_queries" / "queries.bash"
+
+SEMANTIC_API = "/semantic-models"
+
+# `mf query` options and the /query request fields they map to
+_QUERY_OPTIONS = {
+    "--metrics": "metrics",
+    "--group-by": "group_by",
+    "--order": "order_by",
+    "--order-by": "order_by",
+    "--where": "where",
+    "--limit": "limit",
+    "--start-time": "start_time",
+    "--end-time": "end_time",
+    "--saved-query": "saved_query",
+}
+
+
+@dataclass
+class Scenario:
+    """One request shape."""
+    name: str
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Dict[str, Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def endpoint(self) -> str:
+        """Endpoint the scenario is reported under, e.g. "POST /semantic-models/query"."""
+        path = self.path
+        if path.startswith(f"{SEMANTIC_API}/metrics/"):
+            path = f"{SEMANTIC_API}/metrics/{{metric_name}}"
+        return f"{self.method} {path}"
+
+
+def api_scenarios() -> List[Scenario]:
+    """Return the call shapes of tests/api_calls.py."""
+    return [
+        Scenario("root", "GET", "/"),
+        Scenario("list_metrics", "GET", f"{SEMANTIC_API}/metrics"),
+        Scenario(
+            "list_metrics_with_search", "GET", f"{SEMANTIC_API}/metrics",
+            params={"search": "revenue", "show_all_dimensions": True},
+        ),
+        Scenario("get_metric_details", "GET", f"{SEMANTIC_API}/metrics/total_revenue"),
+        Scenario(
+            "list_dimensions", "GET", f"{SEMANTIC_API}/dimensions",
+            params={"metrics": ["total_revenue", "total_rentals"]},
+        ),
+        Scenario(
+            "list_dimension_values", "GET", f"{SEMANTIC_API}/dimension-values",
+            params={"dimension": "customer__country", "metrics": ["total_revenue"]},
+        ),
+        Scenario(
+            "list_dimension_values_with_time", "GET", f"{SEMANTIC_API}/dimension-values",
+            params={
+                "dimension": "customer__country",
+                "metrics": ["total_revenue"],
+                "start_time": "2005-06-01T00:00:00",
+                "end_time": "2005-12-31T23:59:59",
+            },
+        ),
+        Scenario("list_entities", "GET", f"{SEMANTIC_API}/entities"),
+        Scenario(
+            "list_entities_filtered", "GET", f"{SEMANTIC_API}/entities",
+            params={"metrics": ["total_revenue"]},
+        ),
+        Scenario("list_saved_queries", "GET", f"{SEMANTIC_API}/saved-queries"),
+        Scenario(
+            "list_saved_queries_with_details", "GET", f"{SEMANTIC_API}/saved-queries",
+            params={"show_exports": True, "show_parameters": True},
+        ),
+        Scenario(
+            "query_metrics", "POST", f"{SEMANTIC_API}/query",
+            json={
+                "metrics": ["total_revenue", "total_rentals"],
+                "group_by": ["metric_time__month"],
+                "order_by": ["-metric_time"],
+                "limit": 10,
+            },
+        ),
+        Scenario(
+            "query_metrics_with_filters", "POST", f"{SEMANTIC_API}/query",
+            json={
+                "metrics": ["total_revenue"],
+                "group_by": ["metric_time__day", "customer"],
+                "where": ["{{ Entity('customer') }} > 100"],
+                "order_by": ["-metric_time"],
+                "limit": 20,
+            },
+        ),
+        Scenario(
+            "query_metrics_with_time_range", "POST", f"{SEMANTIC_API}/query",
+            json={
+                "metrics": ["total_revenue"],
+                "group_by": ["metric_time__week"],
+                "start_time": "2005-06-01",
+                "end_time": "2005-12-31",
+                "order_by": ["-metric_time"],
+                "limit": 50,
+            },
+        ),
+        Scenario(
+            "query_with_compile_sql", "POST", f"{SEMANTIC_API}/query",
+            json={
+                "metrics": ["total_revenue"],
+                "group_by": ["metric_time__month"],
+                "compile_sql": True,
+                "limit": 5,
+            },
+        ),
+        Scenario(
+            "query_simple", "POST", f"{SEMANTIC_API}/query/simple",
+            json={
+                "metrics": ["total_revenue"],
+                "dimensions": ["customer__country"],
+                "time_grain": "month",
+                "limit": 10,
+            },
+        ),
+        Scenario(
+            "query_simple_with_filters", "POST", f"{SEMANTIC_API}/query/simple",
+            json={
+                "metrics": ["total_revenue", "total_rentals"],
+                "dimensions": ["store__city"],
+                "filters": {"film__rating": {"operator": "=", "value": "PG"}},
+                "time_grain": "week",
+                "limit": 25,
+            },
+        ),
+        Scenario(
+            "validate_configs", "POST", f"{SEMANTIC_API}/validate",
+            json={"skip_dw": False, "show_all": True, "verbose_issues": True},
+        ),
+        Scenario(
+            "validate_configs_skip_dw", "POST", f"{SEMANTIC_API}/validate",
+            json={"skip_dw": True, "show_all": False, "verbose_issues": False},
+        ),
+        Scenario("health_check", "GET", f"{SEMANTIC_API}/health"),
+    ]
+
+
+def parse_mf_query(command: str) -> Dict[str, Any]:
+    """
+    Convert an `mf query` command line into a /query request body.
+
+    Raises:
+        ValueError: If the command is not `mf query` or has an unknown option
+    """
+    words = shlex.split(command)
+    if words[:2] != ["mf", "query"]:
+        raise ValueError(f"Not an mf query command: {command}")
+
+    body: Dict[str, Any] = {}
+    position = 2
+    while position < len(words):
+        option = words[position]
+        if option not in _QUERY_OPTIONS or position + 1 >= len(words):
+            raise ValueError(f"Unsupported mf query option {option!r} in: {command}")
+        value = words[position + 1]
+        key = _QUERY_OPTIONS[option]
+        if key in ("metrics", "group_by", "order_by"):
+            body[key] = [item.strip() for item in value.split(",")]
+        elif key == "where":
+            body.setdefault("where", []).append(value)
+        elif key == "limit":
+            body[key] = int(value)
+        else:
+            body[key] = value
+        position += 2
+    return body
+
+
+def mf_query_scenarios() -> List[Scenario]:
+    """Return the `mf query` commands of mf_queries/queries.bash as /query scenarios."""
+    commands: List[str] = []
+    current: List[str] = []
+    for line in QUERIES_BASH.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        current.append(line.rstrip("\\").strip())
+        if not line.endswith("\\"):
+            commands.append(" ".join(current))
+            current = []
+
+    return [
+        Scenario(f"mf_query_{number:02d}", "POST", f"{SEMANTIC_API}/query", json=parse_mf_query(command))
+        for number, command in enumerate(commands, start=1)
+        if command.startswith("mf query")
+    ]
+
+
+def all_scenarios() -> List[Scenario]:
+    """Return every scenario, API calls first."""
+    return api_scenarios() + mf_query_scenarios()
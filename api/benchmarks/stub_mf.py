@@ -0,0 +1,339 @@
+"""
+Stub `mf` executable for the benchmark harness.
+
+Implements the MetricFlow CLI commands the API runs (query, list, validate-configs,
+health-checks) against the semantic manifest in target/ of the working directory
+and the warehouse at DATABASE_URL. Queries compile to plain SQL over the fact
+model and the dimension models joined through their entities, which is enough
+to exercise the API's subprocess, plan and direct execution paths with real
+result sizes. Time dimensions of the fact model hold YYYYMMDD integer keys, as in
+fact_sales; those of dimension models are dates.
+
+MF_STUB_LATENCY_MS adds a fixed delay to every command, standing in for
+MetricFlow's start-up and manifest loading cost.
+"""
+
+import csv
+import json
+import os
+import re
+import sys
+import time
+from typing import Optional, List, Dict, Any, Tuple
+
+import psycopg2
+
+
+_AGGREGATIONS = {
+    "sum": "sum({})",
+    "count": "count({})",
+    "count_distinct": "count(distinct {})",
+    "average": "avg({})",
+    "min": "min({})",
+    "max": "max({})",
+    "sum_boolean": "sum(cast({} as integer))",
+}
+_REFERENCE = re.compile(r"\{\{\s*(Dimension|TimeDimension|Entity)\('([^']*)'(?:\s*,\s*'([^']*)')?\)\s*\}\}")
+
+
+class StubError(Exception):
+    """Raised for queries the stub (or MetricFlow) rejects."""
+
+
+def _options(argv: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """Split arguments into positional words and --options (repeated --where are collected)."""
+    words: List[str] = []
+    options: Dict[str, Any] = {"where": []}
+    position = 0
+    while position < len(argv):
+        arg = argv[position]
+        if arg.startswith("--"):
+            name = arg[2:].replace("-", "_")
+            has_value = position + 1 < len(argv) and not argv[position + 1].startswith("--")
+            value = argv[position + 1] if has_value else True
+            if name == "where":
+                options["where"].append(value)
+            else:
+                options[name] = value
+            position += 2 if has_value else 1
+        else:
+            words.append(arg)
+            position += 1
+    return words, options
+
+
+def _names(value: Any) -> List[str]:
+    """Split a comma-separated option value."""
+    return [name.strip() for name in str(value or "").split(",") if name.strip()] if value is not True else []
+
+
+class Compiler:
+    """Compiles metric queries over the semantic manifest to SQL."""
+
+    def __init__(self, manifest: Dict[str, Any]):
+        self.models = {model["name"]: model for model in manifest["semantic_models"]}
+        self.metrics = {metric["name"]: metric for metric in manifest["metrics"]}
+        self.measures = {
+            measure["name"]: (model_name, measure)
+            for model_name, model in self.models.items()
+            for measure in model.get("measures") or []
+        }
+        self.fact: Optional[Dict[str, Any]] = None
+        self.joins: Dict[str, str] = {}
+
+    def _metric_measures(self, name: str) -> List[str]:
+        """Return the measures a metric is computed from."""
+        if name not in self.metrics:
+            raise StubError(f"Unable to find metric `{name}`")
+        type_params = self.metrics[name].get("type_params") or {}
+        if type_params.get("measure"):
+            return [type_params["measure"]["name"]]
+        return self._metric_measures(type_params["numerator"]["name"]) + self._metric_measures(
+            type_params["denominator"]["name"]
+        )
+
+    def _metric_sql(self, name: str) -> str:
+        """Return the aggregate expression of a metric over the fact alias f."""
+        metric = self.metrics[name]
+        type_params = metric.get("type_params") or {}
+        if type_params.get("measure"):
+            measure = self.measures[type_params["measure"]["name"]][1]
+            return _AGGREGATIONS[measure["agg"]].format(f"f.{measure.get('expr') or measure['name']}")
+        numerator = self._metric_sql(type_params["numerator"]["name"])
+        denominator = self._metric_sql(type_params["denominator"]["name"])
+        return f"cast({numerator} as double precision) / cast(nullif({denominator}, 0) as double precision)"
+
+    @staticmethod
+    def _entity_expr(model: Dict[str, Any], entity_name: str) -> Optional[str]:
+        """Return the expression of an entity in a semantic model."""
+        for entity in model.get("entities") or []:
+            if entity["name"] == entity_name:
+                return entity.get("expr") or entity["name"]
+        return None
+
+    @staticmethod
+    def _time_sql(column: str, grain: str, date_key: bool = True) -> str:
+        """Truncate a time column (a YYYYMMDD date key, or a date) to a granularity."""
+        day = f"to_date(cast({column} as text), 'YYYYMMDD')" if date_key else column
+        return day if grain == "day" else f"cast(date_trunc('{grain}', {day}) as date)"
+
+    def _join(self, entity_name: str) -> Tuple[str, Dict[str, Any]]:
+        """Join the model whose primary entity is entity_name and return its alias and model."""
+        for name, model in self.models.items():
+            if model is self.fact:
+                continue
+            primary = next((e for e in model.get("entities") or [] if e["type"] == "primary"), None)
+            if primary and primary["name"] == entity_name:
+                alias = f"j_{name}"
+                if alias not in self.joins:
+                    fact_key = self._entity_expr(self.fact, entity_name)
+                    self.joins[alias] = (
+                        f"left join {model['node_relation']['relation_name']} {alias} "
+                        f"on {alias}.{primary.get('expr') or primary['name']} = f.{fact_key}"
+                    )
+                return alias, model
+        raise StubError(f"Unable to join entity `{entity_name}`")
+
+    def resolve(self, item: str, grain: Optional[str] = None) -> Tuple[str, str]:
+        """Return (SQL expression, output column) of a group-by item or where reference."""
+        item = item.strip().lower()
+        if item == "metric_time" or item.startswith("metric_time__"):
+            grain = grain or (item.split("__")[1] if "__" in item else "day")
+            time_name = self.fact["defaults"]["agg_time_dimension"]
+            dimension = next(d for d in self.fact["dimensions"] if d["name"] == time_name)
+            return self._time_sql(f"f.{dimension.get('expr') or time_name}", grain), f"metric_time__{grain}"
+
+        parts = item.split("__")
+        if len(parts) == 1:
+            expression = self._entity_expr(self.fact, parts[0])
+            if expression is None:
+                raise StubError(f"Unable to resolve `{item}`")
+            return f"f.{expression}", item
+
+        entity_name, dimension_name = parts[0], parts[1]
+        item_grain = grain or (parts[2] if len(parts) > 2 else None)
+        local = next((d for d in self.fact.get("dimensions") or [] if d["name"] == dimension_name), None)
+        if local is not None and self._entity_expr(self.fact, entity_name) is not None:
+            alias, dimension = "f", local
+        else:
+            alias, model = self._join(entity_name)
+            dimension = next((d for d in model.get("dimensions") or [] if d["name"] == dimension_name), None)
+            if dimension is None:
+                raise StubError(f"Unable to resolve `{item}`")
+        column = f"{alias}.{dimension.get('expr') or dimension['name']}"
+        if str(dimension["type"]).lower() == "time":
+            item_grain = item_grain or "day"
+            return self._time_sql(column, item_grain, alias == "f"), f"{entity_name}__{dimension_name}__{item_grain}"
+        return column, item
+
+    def _where(self, condition: str) -> str:
+        """Replace the Jinja references of a where condition with SQL expressions."""
+        return _REFERENCE.sub(lambda m: self.resolve(m.group(2), m.group(3))[0], condition)
+
+    def start(self, metric_names: List[str]) -> None:
+        """Start a query over the semantic model holding the measures of the metrics."""
+        if not metric_names:
+            raise StubError("At least one metric is required")
+        measures = [measure for name in metric_names for measure in self._metric_measures(name)]
+        self.fact = self.models[self.measures[measures[0]][0]]
+        self.joins = {}
+
+    def from_clause(self) -> str:
+        """Return the fact relation and the joins added while resolving items."""
+        return "\n".join([f"from {self.fact['node_relation']['relation_name']} f"] + list(self.joins.values()))
+
+    def compile(self, options: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """Return the SQL of a query and its output columns."""
+        if options.get("saved_query"):
+            raise StubError(f"Unable to find saved query `{options['saved_query']}`")
+        metric_names = _names(options.get("metrics"))
+        self.start(metric_names)
+
+        select, group_by, outputs = [], [], []
+        for item in str(options.get("group_by") or "").split(","):
+            if not item.strip():
+                continue
+            expression, output = self.resolve(item)
+            select.append(f"{expression} as {output}")
+            group_by.append(expression)
+            outputs.append(output)
+        for name in metric_names:
+            select.append(f"{self._metric_sql(name)} as {name}")
+            outputs.append(name)
+
+        conditions = [f"({self._where(condition)})" for condition in options["where"]]
+        time_expression = self.resolve("metric_time__day")[0]
+        if options.get("start_time"):
+            conditions.append(f"{time_expression} >= '{options['start_time']}'")
+        if options.get("end_time"):
+            conditions.append(f"{time_expression} <= '{options['end_time']}'")
+
+        order_by = []
+        for item in str(options.get("order_by") or options.get("order") or "").split(","):
+            item = item.strip().lower()
+            if not item:
+                continue
+            name = item.lstrip("-")
+            column = name if name in outputs else next((o for o in outputs if o.startswith(f"{name}__")), None)
+            if column is None:
+                raise StubError(f"Order by item `{name}` is not in the query")
+            order_by.append(f"{column}{' desc' if item.startswith('-') else ''}")
+
+        sql = f"select {', '.join(select)}\n{self.from_clause()}"
+        if conditions:
+            sql += f"\nwhere {' and '.join(conditions)}"
+        if group_by:
+            sql += f"\ngroup by {', '.join(group_by)}"
+        if order_by:
+            sql += f"\norder by {', '.join(order_by)}"
+        if options.get("limit"):
+            sql += f"\nlimit {int(options['limit'])}"
+        return sql, outputs
+
+
+def _execute(sql: str, params: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """Run SQL on DATABASE_URL and return (columns, rows)."""
+    connection = psycopg2.connect(os.environ["DATABASE_URL"])
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else []
+            columns = [column.name for column in cursor.description or []]
+        return columns, rows
+    finally:
+        connection.close()
+
+
+def _table(columns: List[str], rows: List[Tuple[Any, ...]]) -> str:
+    """Render rows as a plain text table, the way `mf query` prints results."""
+    cells = [[str(value) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in cells)
+    return "\n".join(lines)
+
+
+def _query(compiler: Compiler, options: Dict[str, Any]) -> None:
+    """mf query [--explain] [--csv PATH]"""
+    sql, _ = compiler.compile(options)
+    if options.get("explain"):
+        print("🔎 SQL (remove --explain to see data or add --show-dataflow-plan to see the generated dataflow plan):")
+        print(sql)
+        return
+
+    columns, rows = _execute(sql.replace("%", "%%"))
+    if options.get("csv"):
+        with open(options["csv"], "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        print(f"🖨 Successfully written query output to {options['csv']}")
+        return
+    print(_table(columns, rows))
+
+
+def _list(compiler: Compiler, manifest: Dict[str, Any], what: str, options: Dict[str, Any]) -> None:
+    """mf list metrics|dimensions|entities|saved-queries|dimension-values"""
+    if what == "metrics":
+        for metric in manifest["metrics"]:
+            if not options.get("search") or str(options["search"]).lower() in metric["name"]:
+                print(f"• {metric['name']}")
+    elif what == "saved-queries":
+        for saved_query in manifest.get("saved_queries") or []:
+            print(f"• {saved_query['name']}")
+    elif what in ("dimensions", "entities"):
+        key = "dimensions" if what == "dimensions" else "entities"
+        for model in manifest["semantic_models"]:
+            for item in model.get(key) or []:
+                print(f"• {item['name']}")
+    elif what == "dimension-values":
+        compiler.start(_names(options.get("metrics")))
+        expression, _ = compiler.resolve(str(options["dimension"]))
+        time_expression = compiler.resolve("metric_time__day")[0]
+        conditions = [f"{expression} is not null"]
+        params = {}
+        for key, operator in (("start_time", ">="), ("end_time", "<=")):
+            if options.get(key):
+                conditions.append(f"{time_expression} {operator} %({key})s")
+                params[key] = options[key]
+        _, rows = _execute(f"select distinct {expression}\n{compiler.from_clause()}\nwhere {' and '.join(conditions)}\norder by 1", params)
+        for (value,) in rows:
+            print(f"• {value}")
+    else:
+        raise StubError(f"No such command 'list {what}'")
+
+
+def main(argv: List[str]) -> int:
+    delay = float(os.environ.get("MF_STUB_LATENCY_MS", "0")) / 1000
+    if delay:
+        time.sleep(delay)
+
+    words, options = _options(argv)
+    try:
+        with open(os.path.join("target", "semantic_manifest.json")) as handle:
+            manifest = json.load(handle)
+        compiler = Compiler(manifest)
+        command = words[0] if words else ""
+        if command == "query":
+            _query(compiler, options)
+        elif command == "list" and len(words) > 1:
+            _list(compiler, manifest, words[1], options)
+        elif command == "validate-configs":
+            if not options.get("skip_dw"):
+                for model in manifest["semantic_models"]:
+                    _execute(f"select * from {model['node_relation']['relation_name']} limit 1")
+            print("✔ 🎉 Successfully validated the semantics of built manifest (ERRORS: 0, FUTURE_ERRORS: 0, WARNINGS: 0)")
+        elif command == "health-checks":
+            _execute("select 1")
+            print("• ✔️ postgres - SELECT 1: Success")
+        else:
+            raise StubError(f"No such command '{command}'")
+    except (StubError, psycopg2.Error, OSError, KeyError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,193 @@
+"""
+Benchmark warehouse: the DVD rental source schema with generated rows and the
+dbt models the semantic layer reads.
+
+data/tables.sql is a schema-only dump, so its tables are filled with
+deterministic synthetic data, and fact_sales and the dimensions are built from
+them into the `main` schema with the same columns as the dbt models. The rollup
+models are built from their own SQL in models/rollups.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Any
+
+import psycopg2
+
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+TABLES_SQL = REPO_DIR / "data" / "tables.sql"
+ROLLUPS_DIR = REPO_DIR / "models" / "rollups"
+
+# Schema the models are built into
+MODEL_SCHEMA = "main"
+
+# Objects data/tables.sql references but does not create
+_PREREQUISITES = """
+drop schema if exists public cascade;
+drop schema if exists main cascade;
+create schema public;
+create schema main;
+create domain public.year as integer check (value >= 1901 and value <= 2155);
+create type public.mpaa_rating as enum ('G', 'PG', 'PG-13', 'R', 'NC-17');
+"""
+
+_SEQUENCE = re.compile(r"nextval\('(public\.\w+)'::regclass\)")
+_OWNER = re.compile(r"^ALTER TABLE .* OWNER TO .*;$", re.MULTILINE)
+_REF = re.compile(r"\{\{\s*ref\('(\w+)'\)\s*\}\}")
+_DATE_KEY_MACRO = re.compile(r"\{\{\s*(date_to_key|key_to_date)\('([^']+)'\)\s*\}\}")
+
+# SQL emitted by the macros of macros/date_keys.sql, which rollup models call
+_DATE_KEY_SQL = {
+    "date_to_key": (
+        "(extract(year from {0})::int * 10000"
+        " + extract(month from {0})::int * 100"
+        " + extract(day from {0})::int)"
+    ),
+    "key_to_date": "make_date(({0})::int / 10000, ({0})::int / 100 % 100, ({0})::int % 100)",
+}
+
+# Synthetic rows for the source tables; %(rentals)s sets the size of the fact table
+_DATA = """
+select setseed(0.42);
+
+insert into public.language (name)
+select name from unnest(array['English', 'Italian', 'Japanese', 'Mandarin', 'French', 'German']) name;
+
+insert into public.country (country)
+select 'Country ' || lpad(n::text, 3, '0') from generate_series(1, 109) n;
+
+insert into public.city (city, country_id)
+select 'City ' || lpad(n::text, 3, '0'), 1 + (n %% 109) from generate_series(1, 600) n;
+
+insert into public.address (address, district, city_id, postal_code, phone)
+select n || ' Main Street', 'District ' || (n %% 40), 1 + (n %% 600), lpad(n::text, 5, '0'), '555' || n
+from generate_series(1, 605) n;
+
+insert into public.staff (first_name, last_name, address_id, email, store_id, username)
+values ('Mike', 'Hillyer', 1, 'mike@sakilastaff.com', 1, 'Mike'),
+       ('Jon', 'Stephens', 2, 'jon@sakilastaff.com', 2, 'Jon');
+
+insert into public.store (manager_staff_id, address_id) values (1, 1), (2, 2);
+
+insert into public.film (title, description, release_year, language_id, rental_duration,
+                         rental_rate, length, rating, fulltext)
+select title, 'A film', 2006, 1, 3 + (n %% 5), (array[0.99, 2.99, 4.99])[1 + n %% 3],
+       46 + (n * 7) %% 140, (enum_range(null::public.mpaa_rating))[1 + n %% 5], to_tsvector(title)
+from (select n, 'Film ' || lpad(n::text, 4, '0') as title from generate_series(1, 1000) n) f;
+
+insert into public.customer (store_id, first_name, last_name, email, address_id, activebool, create_date, active)
+select 1 + (n %% 2), 'First' || n, 'Last' || n, 'customer' || n || '@sakilacustomer.org',
+       5 + (n %% 600), true, date '2006-02-14', case when n %% 40 = 0 then 0 else 1 end
+from generate_series(1, 599) n;
+
+insert into public.inventory (film_id, store_id)
+select 1 + (n %% 1000), 1 + (n %% 2) from generate_series(1, 4581) n;
+
+insert into public.rental (rental_date, inventory_id, customer_id, return_date, staff_id)
+select rental_date, 1 + floor(random() * 4581)::int, 1 + floor(random() * 599)::int,
+       case when random() < 0.99 then rental_date + (1 + floor(random() * 9)::int) * interval '1 day' end,
+       1 + floor(random() * 2)::int
+from (
+    select timestamp '2005-05-24' + random() * (timestamp '2006-02-14' - timestamp '2005-05-24') as rental_date
+    from generate_series(1, %(rentals)s)
+) r;
+
+insert into public.payment (customer_id, staff_id, rental_id, amount, payment_date)
+select r.customer_id, r.staff_id, r.rental_id, (array[0.99, 2.99, 4.99, 5.99, 7.99])[1 + r.rental_id %% 5],
+       r.rental_date + interval '1 hour'
+from public.rental r;
+"""
+
+# The dbt models served by the semantic layer (dim_customer without SCD history)
+_MODELS = """
+create table main.dim_calendar as
+select to_char(d.date_day, 'YYYYMMDD')::integer as date_key,
+       d.date_day,
+       extract(dow from d.date_day) as day_of_week,
+       extract(day from d.date_day) as day_of_month,
+       extract(month from d.date_day) as date_month,
+       extract(year from d.date_day) as date_year,
+       to_char(d.date_day, 'YYYY-MM') as year_month
+from (
+    select generate_series(date '2005-01-01', date '2007-12-31', interval '1 day')::date as date_day
+    union all
+    select date '9999-12-31'
+) d;
+
+create table main.dim_customer as
+select c.customer_id as customer_key, c.customer_id, c.first_name, c.last_name, c.email,
+       c.active = 1 as is_active, c.create_date, ci.city, co.country, true as is_current
+from public.customer c
+join public.address a on a.address_id = c.address_id
+join public.city ci on ci.city_id = a.city_id
+join public.country co on co.country_id = ci.country_id;
+
+create table main.dim_film as
+select f.film_id, f.title, f.release_year, f.rental_duration, f.rental_rate, f.length,
+       f.rating::text as rating, trim(l.name) as language_name
+from public.film f
+join public.language l on l.language_id = f.language_id;
+
+create table main.dim_store as
+select s.store_id, st.first_name || ' ' || st.last_name as manager_name, ci.city, co.country
+from public.store s
+join public.staff st on st.staff_id = s.manager_staff_id
+join public.address a on a.address_id = s.address_id
+join public.city ci on ci.city_id = a.city_id
+join public.country co on co.country_id = ci.country_id;
+
+create table main.fact_sales as
+select r.rental_id,
+       i.film_id,
+       r.customer_id as customer_key,
+       i.store_id,
+       to_char(r.rental_date, 'YYYYMMDD')::integer as rental_date_key,
+       coalesce(to_char(r.return_date, 'YYYYMMDD')::integer, 99991231) as return_date_key,
+       p.amount
+from public.rental r
+join public.inventory i on i.inventory_id = r.inventory_id
+left join public.payment p on p.rental_id = r.rental_id;
+"""
+
+
+def load(database_url: str, rentals: int = 16044) -> Dict[str, Any]:
+    """
+    Recreate the benchmark warehouse.
+
+    Drops and recreates the public and main schemas of the database, so it must
+    be a scratch database.
+
+    Args:
+        database_url: Postgres connection URL
+        rentals: Number of rentals (fact rows) to generate
+
+    Returns:
+        Row counts of the built models
+    """
+    schema = TABLES_SQL.read_text()
+    sequences = sorted(set(_SEQUENCE.findall(schema)))
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.execute(_PREREQUISITES)
+            for sequence in sequences:
+                cursor.execute(f"create sequence {sequence}")
+            cursor.execute(_OWNER.sub("", schema))
+            cursor.execute(_DATA, {"rentals": rentals})
+            cursor.execute(_MODELS)
+            models = ["fact_sales", "dim_customer", "dim_film", "dim_store", "dim_calendar"]
+            for path in sorted(ROLLUPS_DIR.glob("*.sql")):
+                sql = _REF.sub(lambda match: f"{MODEL_SCHEMA}.{match.group(1)}", path.read_text())
+                sql = _DATE_KEY_MACRO.sub(lambda match: _DATE_KEY_SQL[match.group(1)].format(match.group(2)), sql)
+                cursor.execute(f"create table {MODEL_SCHEMA}.{path.stem} as {sql}")
+                models.append(path.stem)
+            cursor.execute("analyze")
+
+            counts = {}
+            for model in models:
+                cursor.execute(f"select count(*) from {MODEL_SCHEMA}.{model}")
+                counts[model] = cursor.fetchone()[0]
+        return counts
+    finally:
+        connection.close()
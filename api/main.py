@@ -7,10 +7,13 @@ semantic models generated by dbt.
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from contextlib import asynccontextmanager
 
 from app.routers import semantic_models
 from app.core.config import settings
+from app.core.telemetry import REGISTRY, MetricsMiddleware
+from app.schemas.semantic_models import QueryRequest
 
 
 @asynccontextmanager
@@ -20,9 +23,31 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     print("Starting dbt Semantic Model API...")
+    if semantic_models.semantic_service.load_engine():
+        print("MetricFlow engine loaded in-process")
+    elif settings.MF_EXECUTION_MODE == "engine":
+        print(f"MetricFlow engine unavailable, using the mf CLI: {semantic_models.semantic_service.engine_error}")
+    if not semantic_models.semantic_service.open_warehouse() and semantic_models.semantic_service.warehouse_error:
+        print(f"Warehouse pool not opened: {semantic_models.semantic_service.warehouse_error}")
+    if semantic_models.semantic_service.start_health_monitor():
+        print(f"Probing warehouse health every {settings.HEALTH_CHECK_INTERVAL_SECONDS}s")
+    if settings.WARMUP_ENABLED:
+        # Hot queries are validated like /query bodies; compile-only and paged forms are not cached
+        warmup_queries = [
+            QueryRequest(**item).model_dump(exclude={"compile_sql", "paginate", "cursor"})
+            for item in settings.WARMUP_QUERIES
+        ]
+        semantic_models.semantic_service.start_warmup(
+            saved_queries=settings.WARMUP_SAVED_QUERIES,
+            queries=warmup_queries
+        )
+        print(f"Warming up (saved queries: {settings.WARMUP_SAVED_QUERIES}, hot queries: {len(warmup_queries)})")
     yield
     # Shutdown
     print("Shutting down dbt Semantic Model API...")
+    await semantic_models.semantic_service.stop_warmup()
+    await semantic_models.semantic_service.stop_health_monitor()
+    semantic_models.semantic_service.shutdown()
 
 
 app = FastAPI(
@@ -42,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency, count and in-flight metrics per route
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(
     semantic_models.router,
@@ -58,6 +86,21 @@ async def root():
         "version": settings.VERSION
     }
 
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the startup warmup has finished"""
+    readiness = semantic_models.semantic_service.readiness()
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of API and service metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,17 @@
+{#
+    Conversions between dates and integer date keys (yyyymmdd, e.g. 20050524, with
+    var('default_date_key') 99991231 for unknown dates) as plain expressions, so models
+    do not join dim_calendar just to translate one into the other. Both propagate nulls.
+    Membership of the keys in dim_calendar is checked by the fact and mart tests.
+#}
+
+{% macro date_to_key(date_expr) -%}
+  (extract(year from {{ date_expr }})::int * 10000
+   + extract(month from {{ date_expr }})::int * 100
+   + extract(day from {{ date_expr }})::int)
+{%- endmacro %}
+
+
+{% macro key_to_date(key_expr) -%}
+  make_date(({{ key_expr }})::int / 10000, ({{ key_expr }})::int / 100 % 100, ({{ key_expr }})::int % 100)
+{%- endmacro %}
@@ -0,0 +1,98 @@
+{#
+    Indexes declared per model in YAML and built after every build by the build_indexes()
+    post-hook (run outside the model transaction, see dbt_project.yml):
+
+        meta:
+          indexes:
+            - columns: [customer_key]
+              unique: true
+            - columns: ["tsrange(valid_from, valid_to, '[]')"]
+              type: gist
+              where: valid_from <= valid_to
+            - columns: [rental_date_key]
+              include: [store_id, film_id, amount]
+              where: amount is not null
+
+    Index names are derived from the table and the definition, so changing a definition
+    builds a new index and the one it replaces is dropped. Tables rebuilt by dbt get plain
+    CREATE INDEX; incremental models, which are read while they are updated, get
+    CREATE INDEX CONCURRENTLY (on partitioned tables: per partition, then attached to an
+    index created on the parent only).
+#}
+
+{% macro managed_index_name(table_name, index) -%}
+  {%- set columns = modules.re.sub('[^a-z0-9_]+', '_', (index['columns'] | join('_')) | lower).strip('_') -%}
+  {%- set hash = local_md5(tojson(index, sort_keys=True))[:8] -%}
+  {{- (table_name ~ '__' ~ columns)[:50] ~ '__' ~ hash -}}
+{%- endmacro %}
+
+
+{% macro create_index_sql(relation, index, name, concurrently=false, only=false) -%}
+  create {% if index.get('unique') %}unique {% endif -%}
+  index {% if concurrently %}concurrently {% endif -%}
+  if not exists "{{ name }}"
+  on {% if only %}only {% endif %}{{ relation }}
+  {%- if index.get('type') %} using {{ index['type'] }}{% endif %}
+  ({{ index['columns'] | join(', ') }})
+  {%- if index.get('include') %} include ({{ index['include'] | join(', ') }}){% endif %}
+  {%- if index.get('where') %} where {{ index['where'] }}{% endif %}
+{%- endmacro %}
+
+
+{% macro build_indexes() -%}
+  {%- if execute and config.get('materialized') in ['table', 'incremental'] -%}
+  {%- set indexes = config.get('meta', {}).get('indexes', []) -%}
+  {%- set concurrently = config.get('materialized') == 'incremental' -%}
+  {%- set partitioned = config.get('partition_by') is not none -%}
+  {%- set declared = [] -%}
+
+  {%- if indexes -%}
+  {#- indexes left invalid by a failed concurrent build are skipped by "if not exists": drop them -#}
+  {%- set invalid = run_query(
+      "select c.relname from pg_index x join pg_class c on c.oid = x.indexrelid "
+      ~ "join pg_namespace n on n.oid = c.relnamespace "
+      ~ "where not x.indisvalid and c.relkind = 'i' and n.nspname = '" ~ this.schema ~ "'"
+  ).columns[0].values() -%}
+  {%- endif -%}
+
+  {%- for index in indexes -%}
+    {%- set name = managed_index_name(this.identifier, index) -%}
+    {%- do declared.append(name) -%}
+
+    {%- if concurrently and partitioned -%}
+      {%- do run_query(create_index_sql(this, index, name, only=true)) -%}
+      {%- set unindexed = run_query(
+          "select c.relname from pg_inherits i join pg_class c on c.oid = i.inhrelid "
+          ~ "where i.inhparent = '" ~ this.schema ~ "." ~ this.identifier ~ "'::regclass "
+          ~ "and not exists (select 1 from pg_inherits ii join pg_index x on x.indexrelid = ii.inhrelid "
+          ~ "where ii.inhparent = '" ~ this.schema ~ "." ~ name ~ "'::regclass and x.indrelid = c.oid)"
+      ).columns[0].values() -%}
+      {%- for partition_name in unindexed -%}
+        {%- set partition = this.incorporate(path={"identifier": partition_name}) -%}
+        {%- set child = managed_index_name(partition_name, index) -%}
+        {%- if child in invalid -%}
+          {%- do run_query('drop index concurrently if exists ' ~ this.schema ~ '."' ~ child ~ '"') -%}
+        {%- endif -%}
+        {%- do run_query(create_index_sql(partition, index, child, concurrently=true)) -%}
+        {%- do run_query('alter index ' ~ this.schema ~ '."' ~ name ~ '" attach partition ' ~ this.schema ~ '."' ~ child ~ '"') -%}
+      {%- endfor -%}
+    {%- else -%}
+      {%- if concurrently and name in invalid -%}
+        {%- do run_query('drop index concurrently if exists ' ~ this.schema ~ '."' ~ name ~ '"') -%}
+      {%- endif -%}
+      {%- do run_query(create_index_sql(this, index, name, concurrently=concurrently)) -%}
+    {%- endif -%}
+  {%- endfor -%}
+
+  {#- managed indexes (<table>__<columns>__<hash>) no longer declared -#}
+  {%- set existing = run_query(
+      "select c.relname, c.relkind from pg_index x join pg_class c on c.oid = x.indexrelid "
+      ~ "where x.indrelid = '" ~ this.schema ~ "." ~ this.identifier ~ "'::regclass "
+      ~ "and c.relname ~ '^" ~ this.identifier ~ "__.*__[0-9a-f]{8}$'"
+  ) -%}
+  {%- for row in existing.rows if row[0] not in declared -%}
+    {%- set drop_concurrently = concurrently and row[1] == 'i' -%}
+    {%- do run_query('drop index ' ~ ('concurrently ' if drop_concurrently else '') ~ 'if exists ' ~ this.schema ~ '."' ~ row[0] ~ '"') -%}
+  {%- endfor -%}
+  {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,148 @@
+{#
+    Monthly range partitioning for models configured with
+
+        partition_by={'field': 'rental_date_key', 'data_type': 'date_key'}   -- integer YYYYMMDD keys
+        partition_by={'field': 'rental_date', 'data_type': 'date'}
+
+    The table is created as a native partitioned table with one partition per month
+    present in the data plus a default partition, so date-bounded queries are pruned to
+    the months they touch. Models add the sync_monthly_partitions() post-hook, which
+    names partitions after their table once dbt has swapped it in and moves months
+    merged into the default partition by incremental runs to partitions of their own.
+#}
+
+{% macro postgres__create_table_as(temporary, relation, sql) -%}
+  {%- set partition_by = config.get('partition_by') -%}
+  {%- if partition_by and not temporary -%}
+    {{ create_monthly_partitioned_table_as(relation, sql, partition_by) }}
+  {%- else -%}
+    {{ dbt.postgres__create_table_as(temporary, relation, sql) }}
+  {%- endif -%}
+{%- endmacro %}
+
+
+{# First day of the month of a partition key value, as a date #}
+{% macro partition_month(field, data_type) -%}
+  {%- if data_type == 'date_key' -%}
+    date_trunc('month', {{ key_to_date(field) }})::date
+  {%- elif data_type == 'date' -%}
+    date_trunc('month', {{ field }})::date
+  {%- else -%}
+    {{ exceptions.raise_compiler_error("partition_by data_type must be 'date' or 'date_key', got '" ~ data_type ~ "'") }}
+  {%- endif -%}
+{%- endmacro %}
+
+
+{# Partition bound of a month held in the plpgsql variable `month_start`, as text #}
+{% macro partition_bound(data_type, months=0) -%}
+  {%- if data_type == 'date_key' -%}
+    to_char(month_start + interval '{{ months }} month', 'YYYYMMDD')
+  {%- else -%}
+    (month_start + interval '{{ months }} month')::date::text
+  {%- endif -%}
+{%- endmacro %}
+
+
+{% macro create_monthly_partitioned_table_as(relation, sql, partition_by) -%}
+  {%- set field = partition_by['field'] -%}
+  {%- set data_type = partition_by.get('data_type', 'date') -%}
+  {%- set source = relation.identifier ~ '__dbt_partition_source' -%}
+  {%- set sql_header = config.get('sql_header', none) -%}
+
+  {{ sql_header if sql_header is not none }}
+
+  create temporary table "{{ source }}" on commit drop as (
+    {{ sql }}
+  );
+
+  create table {{ relation }} (like "{{ source }}")
+  partition by range ({{ field }});
+
+  do $$
+  declare
+    month_start date;
+  begin
+    for month_start in
+      select distinct {{ partition_month(field, data_type) }}
+      from "{{ source }}"
+      where {{ field }} is not null
+    loop
+      execute format(
+        'create table %I.%I partition of %I.%I for values from (%L) to (%L)',
+        '{{ relation.schema }}', '{{ relation.identifier }}_p' || to_char(month_start, 'YYYYMM'),
+        '{{ relation.schema }}', '{{ relation.identifier }}',
+        {{ partition_bound(data_type) }}, {{ partition_bound(data_type, 1) }}
+      );
+    end loop;
+  end $$;
+
+  create table {{ relation.schema }}."{{ relation.identifier }}_pdefault"
+  partition of {{ relation }} default;
+
+  insert into {{ relation }}
+  select * from "{{ source }}";
+{%- endmacro %}
+
+
+{% macro sync_monthly_partitions() -%}
+  {%- set partition_by = config.get('partition_by') -%}
+  {%- if partition_by and execute -%}
+  {%- set field = partition_by['field'] -%}
+  {%- set data_type = partition_by.get('data_type', 'date') -%}
+  do $$
+  declare
+    schema_name text := '{{ this.schema }}';
+    table_name text := '{{ this.identifier }}';
+    part record;
+    wanted text;
+    holder text;
+    month_start date;
+    lower_bound text;
+    upper_bound text;
+  begin
+    -- a table built as <model>__dbt_tmp keeps its partition names when dbt renames it,
+    -- and the previous build (now <model>__dbt_backup) still holds the <model>_p* names
+    for part in
+      select c.relname as name, substring(c.relname from '_p([^_]+)$') as suffix
+      from pg_inherits i
+      join pg_class c on c.oid = i.inhrelid
+      where i.inhparent = format('%I.%I', schema_name, table_name)::regclass
+    loop
+      wanted := table_name || '_p' || part.suffix;
+      continue when part.name = wanted;
+      select p.relname into holder
+      from pg_class c
+      join pg_namespace n on n.oid = c.relnamespace
+      join pg_inherits i on i.inhrelid = c.oid
+      join pg_class p on p.oid = i.inhparent
+      where n.nspname = schema_name and c.relname = wanted;
+      if holder is not null then
+        execute format('alter table %I.%I rename to %I', schema_name, wanted, holder || '_p' || part.suffix);
+      end if;
+      execute format('alter table %I.%I rename to %I', schema_name, part.name, wanted);
+    end loop;
+
+    -- months first loaded by an incremental merge land in the default partition
+    for month_start in
+      execute format(
+        'select distinct {{ partition_month(field, data_type) | replace("'", "''") | replace("%", "%%") }} from %I.%I where {{ field }} is not null',
+        schema_name, table_name || '_pdefault'
+      )
+    loop
+      wanted := table_name || '_p' || to_char(month_start, 'YYYYMM');
+      lower_bound := {{ partition_bound(data_type) }};
+      upper_bound := {{ partition_bound(data_type, 1) }};
+      execute format('create table %I.%I (like %I.%I including defaults)', schema_name, wanted, schema_name, table_name);
+      execute format(
+        'with moved as (delete from %I.%I where {{ field }} >= %L and {{ field }} < %L returning *) '
+        'insert into %I.%I select * from moved',
+        schema_name, table_name || '_pdefault', lower_bound, upper_bound, schema_name, wanted
+      );
+      execute format(
+        'alter table %I.%I attach partition %I.%I for values from (%L) to (%L)',
+        schema_name, table_name, schema_name, wanted, lower_bound, upper_bound
+      );
+    end loop;
+  end $$;
+  {%- endif -%}
+{%- endmacro %}
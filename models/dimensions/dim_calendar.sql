@@ -6,7 +6,7 @@ with time_spine as (
 )
 
 select
-  to_char(date_day, 'YYYYMMDD')::integer as date_key,
+  {{ date_to_key('d.date_day') }} as date_key,
   d.date_day,
   extract(dow from d.date_day)     as day_of_week,
   extract(day from date_day)       as day_of_month,
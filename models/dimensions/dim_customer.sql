@@ -1,9 +1,34 @@
+{{
+  config(
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key='customer_key'
+  )
+}}
+
 with 
+{% if is_incremental() %}
+-- customers with snapshot versions inserted or closed since the last run;
+-- all of their versions are recomputed, the other customers are left alone
+watermark as (
+    select max(dbt_updated_at) as "since"
+    from {{ this }}
+),
+changed as (
+    select distinct customer_id
+    from {{ ref('sna_customer_check') }}
+    where dbt_updated_at > (select since from watermark)
+       or dbt_valid_to > (select since from watermark)
+),
+{% endif %}
 customer as (
 
     select *,
         row_number() over (partition by customer_id order by last_update) as "prog"
     from {{ ref('sna_customer_check') }}
+    {% if is_incremental() %}
+    where customer_id in (select customer_id from changed)
+    {% endif %}
 
 ),
 
@@ -35,7 +60,8 @@ select
     coalesce(dbt_valid_to, v.end_date) as valid_to,
     case
         when dbt_valid_to is null then true else false
-    end as is_current
+    end as is_current,
+    current_timestamp as dbt_updated_at
 
 from customer c
 cross join vars v
\ No newline at end of file
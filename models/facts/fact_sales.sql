@@ -1,7 +1,41 @@
+{{
+  config(
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key='rental_id',
+    partition_by={'field': 'rental_date_key', 'data_type': 'date_key'},
+    post_hook="{{ sync_monthly_partitions() }}"
+  )
+}}
+
 with 
+vars as (
+    select {{var("default_date_key")}}::int as "default_date_key"
+),
+{% if is_incremental() %}
+-- rentals rented, returned or paid within the lookback window before the latest loaded rental day
+-- are re-merged, so late returns and late payments update rows already loaded
+watermark as (
+    select {{ key_to_date('max(rental_date_key)') }} - {{var("fact_lookback_days")}} as "since"
+    from {{ this }}
+),
+{% endif %}
+payment as (
+    select * 
+    from {{ ref('mid_payment') }}
+),
 rental as (
     select * 
     from {{ ref('stg_rental') }}
+    {% if is_incremental() %}
+    where rental_day >= (select since from watermark)
+       or return_day >= (select since from watermark)
+       or rental_id in (
+            select rental_id
+            from payment
+            where last_payment_date >= (select since from watermark)
+       )
+    {% endif %}
 ),
 inventory as (
     select * 
@@ -11,21 +45,10 @@ store as (
     select * 
     from {{ ref('stg_store') }}
 ),
-calendar as (
-    select * 
-    from {{ref('dim_calendar')}}    
-),
 customer as (
     select * 
     from {{ ref('dim_customer') }}
 ),
-payment as (
-    select * 
-    from {{ ref('mid_payment') }}
-),
-vars as (
-    select {{var("default_date_key")}}::int as "default_date_key"
-),
 fact as (
 
     select
@@ -33,10 +56,11 @@ fact as (
         i.film_id,
         cs.customer_key,
         i.store_id,
-        cd.date_key as rental_date_key,
-        coalesce(cr.date_key, default_date_key) as return_date_key,
+        {{ date_to_key('r.rental_day') }} as rental_date_key,
+        coalesce({{ date_to_key('r.return_day') }}, default_date_key) as return_date_key,
         --p.payment_date,
-        pm.amount
+        pm.amount,
+        current_timestamp as dbt_updated_at
     from rental r
     cross join vars va
     inner join inventory i
@@ -46,16 +70,9 @@ fact as (
     inner join customer cs
          on cs.customer_id = r.customer_id
         and r.rental_date between cs.valid_from AND cs.valid_to
-    inner join calendar cd 
-        on cd.date_day = r.rental_day
-    left join calendar cr
-        on cr.date_day = r.return_day        
     left join payment pm
         on pm.rental_id   = r.rental_id         
 )
 
 select *
 from fact
-{% if is_incremental() %}
-where rental_date_key > (select max(rental_date_key) from {{ this }})
-{% endif %}
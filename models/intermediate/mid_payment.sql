@@ -3,6 +3,6 @@ with payment as  (
     select * 
     from {{ ref('stg_payment') }}
 )
-select rental_id, sum(amount)  as amount
+select rental_id, sum(amount)  as amount, max(payment_date) as last_payment_date
 from payment
 group by rental_id
\ No newline at end of file
@@ -1,13 +1,21 @@
 {{
   config(
-    materialized='table',
-    schema='marts'
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key='rental_id',
+    schema='marts',
+    partition_by={'field': 'rental_date', 'data_type': 'date'},
+    post_hook="{{ sync_monthly_partitions() }}"
   )
 }}
 
 with fact_sales as (
     select * 
     from {{ ref('fact_sales') }}
+    {% if is_incremental() %}
+    -- only the fact rows merged since the last run
+    where dbt_updated_at > (select max(dbt_updated_at) from {{ this }})
+    {% endif %}
 ),
 
 dim_customer as (
@@ -15,11 +23,6 @@ dim_customer as (
     from {{ ref('dim_customer') }}
 ),
 
-dim_calendar as (
-    select * 
-    from {{ ref('dim_calendar') }}
-),
-
 dim_film as (
     select * 
     from {{ ref('dim_film') }}
@@ -38,17 +41,14 @@ joined as (
         fs.film_id,
         df.title as film_title,
         fs.store_id,
-        dcal.date_day as rental_date,
-        dret.date_day as return_date,
+        {{ key_to_date('fs.rental_date_key') }} as rental_date,
+        {{ key_to_date('fs.return_date_key') }} as return_date,
         fs.amount as rental_amount,
-        (dret.date_day::date - dcal.date_day::date) as rental_days
+        ({{ key_to_date('fs.return_date_key') }} - {{ key_to_date('fs.rental_date_key') }}) as rental_days,
+        fs.dbt_updated_at
     from fact_sales fs
     left join dim_customer dc
         on fs.customer_key = dc.customer_key
-    left join dim_calendar dcal
-        on fs.rental_date_key = dcal.date_key
-    left join dim_calendar dret
-        on fs.return_date_key = dret.date_key
     left join dim_film df
         on fs.film_id = df.film_id
     left join dim_store ds
@@ -0,0 +1,17 @@
+with 
+fact_sales as (
+    select * 
+    from {{ ref('fact_sales') }}
+)
+
+select
+    {{ key_to_date('fs.rental_date_key') }} as metric_time__day,
+    fs.store_id as store,
+    fs.film_id as film,
+    sum(fs.amount) as total_revenue,
+    count(fs.rental_id) as rental_count
+from fact_sales fs
+group by 
+    fs.rental_date_key,
+    fs.store_id,
+    fs.film_id
@@ -0,0 +1,21 @@
+with 
+fact_sales as (
+    select * 
+    from {{ ref('fact_sales') }}
+),
+customer as (
+    select * 
+    from {{ ref('dim_customer') }}
+)
+
+select
+    date_trunc('month', {{ key_to_date('fs.rental_date_key') }})::date as metric_time__month,
+    cs.country as customer__country,
+    sum(fs.amount) as total_revenue,
+    count(fs.rental_id) as rental_count
+from fact_sales fs
+inner join customer cs
+    on cs.customer_key = fs.customer_key
+group by 
+    date_trunc('month', {{ key_to_date('fs.rental_date_key') }})::date,
+    cs.country
@@ -0,0 +1,14 @@
+-- Test to ensure every rental and return date of mart_sales is a dim_calendar day
+-- Dates are derived from the fact date keys arithmetically (key_to_date), not by joining the calendar
+
+select
+    ms.rental_id,
+    ms.rental_date,
+    ms.return_date
+from {{ ref('mart_sales') }} ms
+left join {{ ref('dim_calendar') }} rc
+    on rc.date_day = ms.rental_date
+left join {{ ref('dim_calendar') }} tc
+    on tc.date_day = ms.return_date
+where rc.date_day is null
+   or tc.date_day is null